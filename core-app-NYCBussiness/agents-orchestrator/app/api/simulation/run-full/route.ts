@@ -78,6 +78,8 @@ export async function POST(request: NextRequest) {
       previousMonthState,
       sessionId, // NEW: Session ID to fetch previous state
       initialBudget, // NEW: For fallback
+      eventsData: precomputedEvents, // Optional: events agent output already computed (backend batch runs)
+      trendsAnalysis: precomputedTrends, // Optional: trends agent output already computed
     } = body;
     
     // Validate required fields
@@ -164,7 +166,12 @@ export async function POST(request: NextRequest) {
     console.log('🌍 PHASE 2: External Analysis (parallel)...');
     const phase2Start = Date.now();
     
-    const [eventsData, trendsAnalysis] = await Promise.all([
+    // Backend batch runs (/api/simulation/run-months) pipeline the events + trends
+    // agents ahead of the financial chain and pass their outputs in
+    const [eventsData, trendsAnalysis] = precomputedEvents ? [
+      precomputedEvents,
+      precomputedTrends ?? null
+    ] : await Promise.all([
       generateBusinessEvent(
         businessType,
         location,
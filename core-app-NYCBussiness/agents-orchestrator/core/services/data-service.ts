@@ -5,6 +5,7 @@
 import type { 
   SurvivalData, 
   CountySurvivalStats, 
+  SurvivalBundle,
   CensusData, 
   DetailedCensusData,
   GoogleTrendsData 
@@ -112,6 +113,31 @@ export class DataService {
     }
   }
   
+  /**
+   * Survival pentru business type + statistici county + safest/riskiest într-un singur request
+   */
+  async getSurvivalBundle(
+    businessType: string,
+    county: string,
+    limit: number = 5
+  ): Promise<SurvivalBundle | null> {
+    try {
+      const response = await fetch(
+        `${this.backendUrl}/api/survival/bundle?business_type=${encodeURIComponent(businessType)}&county=${encodeURIComponent(county)}&limit=${limit}`
+      );
+      
+      if (!response.ok) {
+        console.warn(`No survival bundle for ${businessType} in ${county}`);
+        return null;
+      }
+      
+      return await response.json();
+    } catch (error) {
+      console.error('Failed to fetch survival bundle:', error);
+      return null;
+    }
+  }
+  
   // ============================================
   // CENSUS DATA
   // ============================================
@@ -220,19 +246,19 @@ export class DataService {
     countyStats: CountySurvivalStats | null;
     trendsData: GoogleTrendsData | null;
   }> {
-    const [censusData, detailedCensusData, survivalData, countyStats, trendsData] = await Promise.all([
+    // Survival + statistici county vin dintr-un singur call (/api/survival/bundle)
+    const [censusData, detailedCensusData, survivalBundle, trendsData] = await Promise.all([
       this.getCensusData(lat, lng),
       this.getDetailedCensusData(lat, lng),
-      this.getSurvivalDataForBusiness(businessType, county),
-      this.getCountySurvivalStats(county),
+      this.getSurvivalBundle(businessType, county),
       this.getGoogleTrendsData(businessType),
     ]);
     
     return {
       censusData,
       detailedCensusData,
-      survivalData,
-      countyStats,
+      survivalData: survivalBundle?.business_survival ?? null,
+      countyStats: survivalBundle?.statistics ?? null,
       trendsData,
     };
   }
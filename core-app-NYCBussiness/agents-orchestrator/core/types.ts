@@ -104,6 +104,21 @@ export interface CountySurvivalStats {
   }>;
 }
 
+export interface SurvivalBundle {
+  county: string;
+  business_type: string;
+  business_survival: SurvivalData | null;
+  county_total: {
+    county_name: string;
+    overall_survival_rate: number;
+    total_firms_2017: number;
+    interpretation: string;
+  } | null;
+  statistics: CountySurvivalStats | null;
+  safest_industries: CountySurvivalStats["safest_industries"];
+  riskiest_industries: CountySurvivalStats["high_risk_industries"];
+}
+
 // ============================================
 // GOOGLE TRENDS DATA
 // ============================================
@@ -0,0 +1,129 @@
+"""
+Vectorized precomputation of ACS derived statistics for every tract.
+
+Computes poverty_rate, high_income_households_rate, bachelor_plus_rate,
+renter_rate and work_from_home_rate (plus the high-income / bachelor+ counts)
+for all tracts of an ACS year at once with NumPy column operations, and stores
+them in the precomputed columns of acs_tract_data. Request handlers read these
+columns instead of deriving them per call. stats_computed_at marks a row as
+computed; a statistic whose ACS inputs are missing is stored as NULL.
+
+Usage:
+    python acs_statistics.py [year]
+"""
+
+import sys
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from database import SessionLocal, AcsTractData
+
+# Variables needed for the derived statistics
+_COLUMNS = [
+    "B01003_001E", "B17001_002E",
+    "B19001_001E", "B19001_013E", "B19001_014E", "B19001_015E", "B19001_016E", "B19001_017E",
+    "B15003_001E", "B15003_022E", "B15003_023E", "B15003_025E",
+    "B25003_001E", "B25003_003E",
+    "B08301_001E", "B08301_021E",
+]
+
+DERIVED_RATE_FIELDS = [
+    "poverty_rate",
+    "high_income_households_rate",
+    "bachelor_plus_rate",
+    "renter_rate",
+    "work_from_home_rate",
+]
+DERIVED_COUNT_FIELDS = ["high_income_count", "bachelor_plus_count"]
+
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _columns(rows: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """Parse the raw ACS string values into float columns (NaN when missing)."""
+    return {
+        code: np.fromiter((_to_float(r.get(code)) for r in rows), dtype=np.float64, count=len(rows))
+        for code in _COLUMNS
+    }
+
+
+def _safe_rate(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """numerator / denominator * 100 rounded to 2 decimals; 0 where denominator <= 0."""
+    rate = np.zeros_like(numerator)
+    np.divide(numerator, denominator, out=rate, where=denominator > 0)
+    rate = np.round(rate * 100, 2)
+    # Missing inputs stay missing instead of silently becoming 0
+    rate[np.isnan(numerator) | np.isnan(denominator)] = np.nan
+    return rate
+
+
+def compute_derived_statistics(rows: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """Derived statistics for all rows at once; same formulas as build_acs_profile."""
+    c = _columns(rows)
+
+    high_income = (
+        c["B19001_013E"] + c["B19001_014E"] + c["B19001_015E"] + c["B19001_016E"] + c["B19001_017E"]
+    )
+    bachelor_plus = c["B15003_022E"] + c["B15003_023E"] + c["B15003_025E"]
+
+    return {
+        "poverty_rate": _safe_rate(c["B17001_002E"], c["B01003_001E"]),
+        "high_income_households_rate": _safe_rate(high_income, c["B19001_001E"]),
+        "bachelor_plus_rate": _safe_rate(bachelor_plus, c["B15003_001E"]),
+        "renter_rate": _safe_rate(c["B25003_003E"], c["B25003_001E"]),
+        "work_from_home_rate": _safe_rate(c["B08301_021E"], c["B08301_001E"]),
+        "high_income_count": high_income,
+        "bachelor_plus_count": bachelor_plus,
+    }
+
+
+def _py(value: float, as_int: bool = False) -> Optional[float]:
+    if np.isnan(value):
+        return None
+    return int(value) if as_int else float(value)
+
+
+def derived_statistics_from_record(record: AcsTractData) -> Optional[Dict[str, Any]]:
+    """Precomputed columns of an acs_tract_data row as a derived_statistics dict (None if not computed)."""
+    if record.stats_computed_at is None:
+        return None
+    return {field: getattr(record, field) for field in DERIVED_RATE_FIELDS + DERIVED_COUNT_FIELDS}
+
+
+def precompute_acs_statistics(db: Session, year: str) -> int:
+    """Compute and store derived statistics for every tract of an ACS year. Returns rows updated."""
+    records = db.query(AcsTractData).filter(AcsTractData.acs_year == year).order_by(AcsTractData.id).all()
+    if not records:
+        return 0
+
+    stats = compute_derived_statistics([r.acs_values or {} for r in records])
+    computed_at = datetime.utcnow()
+
+    for i, record in enumerate(records):
+        for field in DERIVED_RATE_FIELDS:
+            setattr(record, field, _py(stats[field][i]))
+        for field in DERIVED_COUNT_FIELDS:
+            setattr(record, field, _py(stats[field][i], as_int=True))
+        record.stats_computed_at = computed_at
+
+    db.commit()
+    print(f"✅ Derived statistics precomputed for {len(records)} tracts (ACS {year})")
+    return len(records)
+
+
+if __name__ == "__main__":
+    from detailed_analysis_service import ACS_YEAR
+
+    db = SessionLocal()
+    try:
+        precompute_acs_statistics(db, sys.argv[1] if len(sys.argv) > 1 else ACS_YEAR)
+    finally:
+        db.close()
@@ -0,0 +1,526 @@
+"""
+Area Analysis Persistence Service
+
+An area analysis is content-addressed: one AreaOverview row per
+(tract FIPS, census data vintage) and one DetailedAreaAnalysis row per
+(area, ACS year). Launches for an already analyzed tract reuse the stored
+rows instead of inserting new ones. Only tract-level data is shared: such a
+launch gets its own id, an area_overview_alias row holding the launcher's
+coordinates (and block), so /api/get-area and the agents see the location
+that was actually launched. Old ids collapsed by migrate_dedupe_areas.py
+resolve the same way.
+
+The censusData payload sent to the agents (and returned by /api/get-area) is
+built once per area, stored pre-serialized in area_overview.census_payload
+and served as bytes from an in-memory LRU (get_census_payload); the launch's
+coordinates are appended to those bytes on the way out.
+"""
+
+import json
+import os
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import select, text, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from database import AreaOverview, AreaOverviewAlias, DetailedAreaAnalysis
+from census_service import CENSUS_DATA_VINTAGE
+from detailed_analysis_service import ACS_YEAR
+from ttl_cache import TTLCache, MISSING
+
+CENSUS_PAYLOAD_CACHE_SIZE = int(os.getenv("CENSUS_PAYLOAD_CACHE_SIZE", "2048"))
+
+# Area payloads only change when a detailed analysis is attached, which replaces the entry
+_payload_cache = TTLCache(maxsize=CENSUS_PAYLOAD_CACHE_SIZE, ttl=7 * 24 * 3600)
+# Requested id -> (canonical id, launch latitude, launch longitude) (aliases never change)
+_launches = TTLCache(maxsize=CENSUS_PAYLOAD_CACHE_SIZE, ttl=7 * 24 * 3600)
+
+# Launch ids come from the area_overview sequence, so they never collide with an area id
+_NEXT_LAUNCH_ID = text("SELECT nextval('area_overview_id_seq')")
+
+
+def make_analysis_key(state: str, county: str, tract: str, vintage: str = CENSUS_DATA_VINTAGE) -> str:
+    """Content key for an area analysis: "<full_tract_id>:<vintage>"."""
+    return f"{state}{county}{tract}:{vintage}"
+
+
+def resolve_launch(db: Session, area_id: int) -> Tuple[int, Optional[float], Optional[float]]:
+    """(canonical id, latitude, longitude) of a launch or collapsed id; no own location -> (area_id, None, None)."""
+    alias = db.query(
+        AreaOverviewAlias.canonical_id, AreaOverviewAlias.latitude, AreaOverviewAlias.longitude
+    ).filter(AreaOverviewAlias.old_id == area_id).first()
+    if not alias:
+        return area_id, None, None
+    return alias.canonical_id, alias.latitude, alias.longitude
+
+
+def resolve_area_id(db: Session, area_id: int) -> int:
+    """Map a (possibly collapsed) area_overview id to its canonical id."""
+    return resolve_launch(db, area_id)[0]
+
+
+def get_area(db: Session, area_id: int) -> Optional[AreaOverview]:
+    """AreaOverview by id, following aliases of collapsed duplicates."""
+    return db.query(AreaOverview).filter(AreaOverview.id == resolve_area_id(db, area_id)).first()
+
+
+def get_detailed_for_area(db: Session, area_id: int) -> Optional[DetailedAreaAnalysis]:
+    return db.query(DetailedAreaAnalysis).filter(
+        DetailedAreaAnalysis.area_overview_id == resolve_area_id(db, area_id)
+    ).order_by(DetailedAreaAnalysis.id).first()
+
+
+def _int_or_none(value: Any) -> Optional[int]:
+    return int(value) if value else None
+
+
+def build_area_record(census_data: Dict[str, Any]) -> AreaOverview:
+    """AreaOverview din rezultatul analyze_area()."""
+    demo = census_data.get("demographics", {})
+    fips = census_data.get("fips_codes", {})
+
+    return AreaOverview(
+        analysis_key=make_analysis_key(fips.get("state"), fips.get("county"), fips.get("tract")),
+        latitude=census_data.get("latitude"),
+        longitude=census_data.get("longitude"),
+        state_fips=fips.get("state"),
+        county_fips=fips.get("county"),
+        tract_fips=fips.get("tract"),
+        area_name=census_data.get("area_name"),
+
+        # Demographics
+        total_population=_int_or_none(demo.get("B01001_001E")),
+        median_age=float(demo.get("B01002_001E")) if demo.get("B01002_001E") else None,
+        median_household_income=_int_or_none(demo.get("B19013_001E")),
+        per_capita_income=_int_or_none(demo.get("B19301_001E")),
+        poverty_population=_int_or_none(demo.get("B17001_002E")),
+        poverty_rate=demo.get("poverty_rate"),
+
+        # Education
+        total_population_25_plus=_int_or_none(demo.get("B15003_001E")),
+        bachelors_degree=_int_or_none(demo.get("B15003_022E")),
+        masters_degree=_int_or_none(demo.get("B15003_023E")),
+        doctorate_degree=_int_or_none(demo.get("B15003_025E")),
+
+        # Housing
+        total_housing_units=_int_or_none(demo.get("B25003_001E")),
+        owner_occupied=_int_or_none(demo.get("B25003_002E")),
+        renter_occupied=_int_or_none(demo.get("B25003_003E")),
+        renter_rate=demo.get("renter_rate"),
+        median_gross_rent=_int_or_none(demo.get("B25031_001E")),
+        median_home_value=_int_or_none(demo.get("B25077_001E")),
+
+        # Employment
+        total_workforce=_int_or_none(demo.get("C24050_001E")),
+        finance_insurance_real_estate=_int_or_none(demo.get("C24050_007E")),
+        arts_entertainment_hospitality=_int_or_none(demo.get("C24050_018E")),
+        professional_services=_int_or_none(demo.get("C24050_029E")),
+    )
+
+
+def build_detailed_record(area_id: int, detailed_data: Dict[str, Any]) -> DetailedAreaAnalysis:
+    """DetailedAreaAnalysis din rezultatul analyze_area_detailed()."""
+    detail_demo = detailed_data.get("demographics_detailed", {})
+    detail_fips = detailed_data.get("fips_codes", {})
+    detail_stats = detailed_data.get("derived_statistics", {})
+
+    # Helper function pentru a extrage valoarea dintr-un dict cu structura {value, label}
+    def get_value(code):
+        item = detail_demo.get(code, {})
+        if isinstance(item, dict):
+            val = item.get("value")
+            if val and val != "N/A":
+                try:
+                    return int(val)
+                except (ValueError, TypeError):
+                    try:
+                        return float(val)
+                    except (ValueError, TypeError):
+                        return None
+        return None
+
+    return DetailedAreaAnalysis(
+        area_overview_id=area_id,
+        latitude=detailed_data.get("latitude"),
+        longitude=detailed_data.get("longitude"),
+        state_fips=detail_fips.get("state"),
+        county_fips=detail_fips.get("county"),
+        tract_fips=detail_fips.get("tract"),
+        block_fips=detail_fips.get("block"),
+        full_tract_id=detail_fips.get("full_tract_id"),
+        full_block_id=detail_fips.get("full_block_id"),
+        area_name=detailed_data.get("area_name"),
+        analysis_year=detailed_data.get("year", ACS_YEAR),
+
+        # Demographics
+        total_population=get_value("B01003_001E"),
+        median_age=get_value("B01002_001E"),
+
+        # Income
+        median_household_income=get_value("B19013_001E"),
+        per_capita_income=get_value("B19301_001E"),
+        total_households=get_value("B19001_001E"),
+        households_75k_99k=get_value("B19001_013E"),
+        households_100k_124k=get_value("B19001_014E"),
+        households_125k_149k=get_value("B19001_015E"),
+        households_150k_199k=get_value("B19001_016E"),
+        households_200k_plus=get_value("B19001_017E"),
+
+        # Education
+        total_population_25_plus=get_value("B15003_001E"),
+        bachelors_degree=get_value("B15003_022E"),
+        masters_degree=get_value("B15003_023E"),
+        doctorate_degree=get_value("B15003_025E"),
+
+        # Housing
+        total_housing_units=get_value("B25003_001E"),
+        renter_occupied=get_value("B25003_003E"),
+        median_rent_as_percent_income=get_value("B25071_001E"),
+
+        # Transportation
+        total_workers_16_plus=get_value("B08301_001E"),
+        public_transportation=get_value("B08301_010E"),
+        work_from_home=get_value("B08301_021E"),
+
+        # Poverty
+        poverty_population=get_value("B17001_002E"),
+
+        # Derived statistics
+        poverty_rate=detail_stats.get("poverty_rate"),
+        high_income_households_rate=detail_stats.get("high_income_households_rate"),
+        high_income_count=detail_stats.get("high_income_count"),
+        bachelor_plus_rate=detail_stats.get("bachelor_plus_rate"),
+        bachelor_plus_count=detail_stats.get("bachelor_plus_count"),
+        renter_rate=detail_stats.get("renter_rate"),
+        work_from_home_rate=detail_stats.get("work_from_home_rate"),
+
+        # Raw JSON pentru backup
+        raw_demographics_json=detail_demo,
+        raw_derived_stats_json=detail_stats
+    )
+
+
+# (cod ACS, coloană AreaOverview, label)
+AREA_PAYLOAD_FIELDS = [
+    ("B01001_001E", "total_population", "Total Population"),
+    ("B01002_001E", "median_age", "Median Age"),
+    ("B19013_001E", "median_household_income", "Median Household Income"),
+    ("B19301_001E", "per_capita_income", "Per Capita Income"),
+    ("B15003_001E", "total_population_25_plus", "Total Population 25+"),
+    ("B15003_022E", "bachelors_degree", "Bachelor's Degree"),
+    ("B15003_023E", "masters_degree", "Master's Degree"),
+    ("B15003_025E", "doctorate_degree", "Doctorate Degree"),
+    ("C24050_001E", "total_workforce", "Total Workforce"),
+    ("C24050_007E", "finance_insurance_real_estate", "Finance/Insurance/Real Estate"),
+    ("C24050_018E", "arts_entertainment_hospitality", "Arts/Entertainment/Hospitality"),
+    ("C24050_029E", "professional_services", "Professional Services"),
+    ("B17001_002E", "poverty_population", "Poverty Population"),
+    ("B25003_001E", "total_housing_units", "Total Housing Units"),
+    ("B25003_003E", "renter_occupied", "Renter Occupied"),
+    ("B25031_001E", "median_gross_rent", "Median Gross Rent"),
+    ("B25077_001E", "median_home_value", "Median Home Value"),
+]
+
+# (cod ACS, coloană DetailedAreaAnalysis, label)
+DETAILED_PAYLOAD_FIELDS = [
+    ("B19001_013E", "households_75k_99k", "Households $75k-$99k"),
+    ("B19001_014E", "households_100k_124k", "Households $100k-$124k"),
+    ("B19001_015E", "households_125k_149k", "Households $125k-$149k"),
+    ("B19001_016E", "households_150k_199k", "Households $150k-$199k"),
+    ("B19001_017E", "households_200k_plus", "Households $200k+"),
+]
+
+
+def _format_census_value(value, label):
+    return {
+        "value": value if value is not None else "N/A",
+        "label": label
+    }
+
+
+def build_census_payload(area: AreaOverview, detailed: Optional[DetailedAreaAnalysis]) -> Dict[str, Any]:
+    """censusData în formatul așteptat de agenți (next-month) și de /api/get-area."""
+    demo = {code: _format_census_value(getattr(area, column), label) for code, column, label in AREA_PAYLOAD_FIELDS}
+    derived = {}
+
+    if detailed:
+        for code, column, label in DETAILED_PAYLOAD_FIELDS:
+            demo[code] = _format_census_value(getattr(detailed, column), label)
+
+        # Statistici derivate pre-calculate (acs_statistics.py)
+        derived = {
+            "poverty_rate": detailed.poverty_rate or 0,
+            "high_income_households_rate": detailed.high_income_households_rate or 0,
+            "bachelor_plus_rate": detailed.bachelor_plus_rate or 0,
+            "renter_rate": detailed.renter_rate or 0,
+            "work_from_home_rate": detailed.work_from_home_rate or 0,
+        }
+
+    return {
+        "demographics_detailed": demo,
+        "derived_statistics": derived,
+        "fips_codes": {
+            "state": area.state_fips,
+            "county": area.county_fips,
+            "tract": area.tract_fips,
+        },
+        "area_name": area.area_name or "Unknown Area",
+    }
+
+
+def store_census_payload(area: AreaOverview, detailed: Optional[DetailedAreaAnalysis]) -> bytes:
+    """Serializează payload-ul (doar date de tract) o singură dată în area.census_payload (commit-ul e al apelantului)."""
+    raw = json.dumps(build_census_payload(area, detailed), separators=(",", ":"), default=str)
+    area.census_payload = raw
+    _payload_cache.delete(area.id)
+    return raw.encode()
+
+
+def _payload_entry(area_id: int, area_name: Optional[str], latitude: float, longitude: float, raw: bytes) -> Dict[str, Any]:
+    entry = {
+        "area_id": area_id,
+        "area_name": area_name,
+        "latitude": latitude,
+        "longitude": longitude,
+        "census_bytes": raw,
+    }
+    _payload_cache.set(area_id, entry)
+    return entry
+
+
+def _at_launch(entry: Dict[str, Any], latitude: Optional[float], longitude: Optional[float]) -> Dict[str, Any]:
+    """Intrarea zonei cu locația lansării: coordonatele sunt adăugate la finalul payload-ului
+    (payload-urile vechi le conțin deja pe ale primei lansări; ultima cheie câștigă la parsare)."""
+    if latitude is None:
+        latitude, longitude = entry["latitude"], entry["longitude"]
+    location = json.dumps({"latitude": latitude, "longitude": longitude}, separators=(",", ":")).encode()
+    return {
+        **entry,
+        "latitude": latitude,
+        "longitude": longitude,
+        "census_bytes": entry["census_bytes"][:-1] + b"," + location[1:],
+    }
+
+
+def get_census_payload(db: Session, area_id: int) -> Optional[Dict[str, Any]]:
+    """
+    {area_id (canonic), area_name, latitude, longitude, census_bytes} pentru o lansare.
+    Din memorie fără nicio interogare; altfel o singură coloană din DB; zonele
+    vechi fără payload sunt completate acum (o singură dată).
+    """
+    launch = _launches.get(area_id)
+    if launch is MISSING:
+        launch = resolve_launch(db, area_id)
+        _launches.set(area_id, launch)
+    canonical_id, latitude, longitude = launch
+
+    entry = _payload_cache.get(canonical_id)
+    if entry is not MISSING:
+        return _at_launch(entry, latitude, longitude)
+
+    row = db.query(
+        AreaOverview.area_name, AreaOverview.latitude, AreaOverview.longitude, AreaOverview.census_payload
+    ).filter(AreaOverview.id == canonical_id).first()
+    if not row:
+        _launches.delete(area_id)
+        return None
+
+    if row.census_payload is not None:
+        entry = _payload_entry(canonical_id, row.area_name, row.latitude, row.longitude, row.census_payload.encode())
+        return _at_launch(entry, latitude, longitude)
+
+    area = db.query(AreaOverview).filter(AreaOverview.id == canonical_id).first()
+    raw = store_census_payload(area, get_detailed_for_area(db, canonical_id))
+    db.commit()
+    return _at_launch(_payload_entry(canonical_id, area.area_name, area.latitude, area.longitude, raw), latitude, longitude)
+
+
+def splice_json(fields: Dict[str, Any], raw_fields: Dict[str, bytes]) -> bytes:
+    """JSON object bytes from `fields` plus already serialized values, without re-encoding them."""
+    parts = [json.dumps(fields, separators=(",", ":"), default=str).encode()[:-1]]
+    for name, raw in raw_fields.items():
+        if len(parts) > 1 or fields:
+            parts.append(b",")
+        parts.append(json.dumps(name).encode() + b":" + raw)
+    parts.append(b"}")
+    return b"".join(parts)
+
+
+def _find_area(db: Session, analysis_key: str) -> Optional[AreaOverview]:
+    return db.query(AreaOverview).filter(
+        AreaOverview.analysis_key == analysis_key
+    ).order_by(AreaOverview.id).first()
+
+
+def _launch_block(detailed_data: Optional[Dict[str, Any]]) -> Optional[str]:
+    return (detailed_data or {}).get("fips_codes", {}).get("block")
+
+
+def _new_launch(launch_id: int, area: AreaOverview, census_data: Dict[str, Any],
+                detailed_data: Optional[Dict[str, Any]]) -> AreaOverviewAlias:
+    """Alias row for a launch that reused `area`: its own id, pointing at the shared tract data."""
+    return AreaOverviewAlias(
+        old_id=launch_id,
+        canonical_id=area.id,
+        latitude=census_data.get("latitude"),
+        longitude=census_data.get("longitude"),
+        block_fips=_launch_block(detailed_data),
+    )
+
+
+def _set_launch_block(launch_id: int, block: str):
+    # Lansarea streaming primește blocul abia odată cu analiza detaliată
+    return update(AreaOverviewAlias).where(
+        AreaOverviewAlias.old_id == launch_id, AreaOverviewAlias.block_fips.is_(None)
+    ).values(block_fips=block)
+
+
+def _find_detailed(db: Session, area_id: int, year: str) -> Optional[DetailedAreaAnalysis]:
+    return db.query(DetailedAreaAnalysis).filter(
+        DetailedAreaAnalysis.area_overview_id == area_id,
+        DetailedAreaAnalysis.analysis_year == year
+    ).order_by(DetailedAreaAnalysis.id).first()
+
+
+def get_or_create_area(
+    db: Session,
+    census_data: Dict[str, Any],
+    detailed_data: Optional[Dict[str, Any]] = None,
+    launch_id: Optional[int] = None
+) -> Tuple[AreaOverview, Optional[DetailedAreaAnalysis], bool, int]:
+    """
+    Return the stored analysis for this tract/vintage, inserting it only the first time.
+
+    Returns (area, detailed, created, launch_id). launch_id is the id handed to
+    the client: area.id for the launch that created the row, otherwise a new
+    alias row with this launch's location. Pass launch_id back to attach a later
+    detailed analysis to the same launch. A concurrent insert of the same key
+    loses on the unique index and re-reads the winner's row.
+    """
+    new_area = build_area_record(census_data)
+    analysis_key = new_area.analysis_key
+    created = False
+
+    area = _find_area(db, analysis_key)
+    if not area:
+        try:
+            db.add(new_area)
+            db.commit()
+            area = new_area
+            created = True
+        except IntegrityError:
+            db.rollback()
+            area = _find_area(db, analysis_key)
+            if area is None:
+                # Not a lost race on analysis_key (another constraint failed)
+                raise
+
+    if created:
+        launch_id = area.id
+    elif launch_id is None:
+        launch_id = db.execute(_NEXT_LAUNCH_ID).scalar()
+        db.add(_new_launch(launch_id, area, census_data, detailed_data))
+        db.commit()
+    elif launch_id != area.id and _launch_block(detailed_data):
+        db.execute(_set_launch_block(launch_id, _launch_block(detailed_data)))
+        db.commit()
+
+    detailed = None
+    detailed_created = False
+    if detailed_data:
+        year = detailed_data.get("year", ACS_YEAR)
+        detailed = _find_detailed(db, area.id, year)
+        if not detailed:
+            try:
+                detailed = build_detailed_record(area.id, detailed_data)
+                db.add(detailed)
+                db.commit()
+                detailed_created = True
+            except Exception as e:
+                print(f"Eroare la salvarea datelor detaliate: {e}")
+                # Nu oprim procesul dacă datele detaliate nu se salvează
+                db.rollback()
+                detailed = _find_detailed(db, area.id, year)
+
+    if area.census_payload is None or detailed_created:
+        store_census_payload(area, detailed)
+        db.commit()
+
+    return area, detailed, created, launch_id
+
+
+async def _find_area_async(db: AsyncSession, analysis_key: str) -> Optional[AreaOverview]:
+    result = await db.execute(
+        select(AreaOverview).where(AreaOverview.analysis_key == analysis_key).order_by(AreaOverview.id)
+    )
+    return result.scalars().first()
+
+
+async def _find_detailed_async(db: AsyncSession, area_id: int, year: str) -> Optional[DetailedAreaAnalysis]:
+    result = await db.execute(
+        select(DetailedAreaAnalysis).where(
+            DetailedAreaAnalysis.area_overview_id == area_id,
+            DetailedAreaAnalysis.analysis_year == year
+        ).order_by(DetailedAreaAnalysis.id)
+    )
+    return result.scalars().first()
+
+
+async def get_or_create_area_async(
+    db: AsyncSession,
+    census_data: Dict[str, Any],
+    detailed_data: Optional[Dict[str, Any]] = None,
+    launch_id: Optional[int] = None
+) -> Tuple[AreaOverview, Optional[DetailedAreaAnalysis], bool, int]:
+    """get_or_create_area() on an AsyncSession (async launch-business pipeline)."""
+    new_area = build_area_record(census_data)
+    analysis_key = new_area.analysis_key
+    created = False
+
+    area = await _find_area_async(db, analysis_key)
+    if not area:
+        try:
+            db.add(new_area)
+            await db.commit()
+            area = new_area
+            created = True
+        except IntegrityError:
+            await db.rollback()
+            area = await _find_area_async(db, analysis_key)
+            if area is None:
+                raise
+
+    if created:
+        launch_id = area.id
+    elif launch_id is None:
+        launch_id = (await db.execute(_NEXT_LAUNCH_ID)).scalar()
+        db.add(_new_launch(launch_id, area, census_data, detailed_data))
+        await db.commit()
+    elif launch_id != area.id and _launch_block(detailed_data):
+        await db.execute(_set_launch_block(launch_id, _launch_block(detailed_data)))
+        await db.commit()
+
+    detailed = None
+    detailed_created = False
+    if detailed_data:
+        year = detailed_data.get("year", ACS_YEAR)
+        detailed = await _find_detailed_async(db, area.id, year)
+        if not detailed:
+            try:
+                detailed = build_detailed_record(area.id, detailed_data)
+                db.add(detailed)
+                await db.commit()
+                detailed_created = True
+            except Exception as e:
+                print(f"Eroare la salvarea datelor detaliate: {e}")
+                await db.rollback()
+                detailed = await _find_detailed_async(db, area.id, year)
+
+    # Payload-ul pentru agenți se construiește la lansare, nu la fiecare next-month
+    if area.census_payload is None or detailed_created:
+        store_census_payload(area, detailed)
+        await db.commit()
+
+    return area, detailed, created, launch_id
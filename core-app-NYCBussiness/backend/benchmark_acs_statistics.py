@@ -0,0 +1,79 @@
+"""
+Benchmark: per-request derivation of ACS statistics vs precomputed lookup.
+
+Runs over every NY tract in the local ACS snapshot (ny_acs_tracts_<year>.csv),
+or over ~5,300 synthetic tracts when no snapshot is available.
+
+    python benchmark_acs_statistics.py
+"""
+
+import os
+import time
+
+import numpy as np
+
+from acs_statistics import compute_derived_statistics, DERIVED_RATE_FIELDS, DERIVED_COUNT_FIELDS
+from detailed_analysis_service import ACS_VARIABLES, ACS_YEAR, build_acs_profile
+from populate_acs_data import snapshot_path, load_snapshot
+
+NY_TRACT_COUNT = 5300
+
+
+def synthetic_rows(n: int = NY_TRACT_COUNT):
+    rng = np.random.default_rng(42)
+    rows = []
+    for i in range(n):
+        row = {code: str(int(rng.integers(0, 5000))) for code in ACS_VARIABLES if code != "NAME"}
+        row.update({"NAME": f"Census Tract {i}", "state": "36", "county": "061", "tract": f"{i:06d}"})
+        rows.append(row)
+    return rows
+
+
+def main():
+    path = snapshot_path(ACS_YEAR)
+    rows = load_snapshot(path) if os.path.exists(path) else synthetic_rows()
+    print(f"Tracts: {len(rows)} ({'snapshot' if os.path.exists(path) else 'synthetic'})")
+
+    fips_list = [
+        {"state": r["state"], "county": r["county"], "tract": r["tract"],
+         "full_tract_id": f"{r['state']}{r['county']}{r['tract']}"}
+        for r in rows
+    ]
+
+    # 1. Per-request derivation (what every launch used to do)
+    start = time.perf_counter()
+    scalar = [build_acs_profile(f, r)["derived_statistics"] for f, r in zip(fips_list, rows)]
+    per_request_s = time.perf_counter() - start
+
+    # 2. Batch precomputation (one pass for all tracts)
+    start = time.perf_counter()
+    stats = compute_derived_statistics(rows)
+    batch_s = time.perf_counter() - start
+
+    fields = DERIVED_RATE_FIELDS + DERIVED_COUNT_FIELDS
+    precomputed = {
+        f["full_tract_id"]: {field: stats[field][i] for field in fields}
+        for i, f in enumerate(fips_list)
+    }
+
+    # 3. Per-request lookup of the precomputed values
+    start = time.perf_counter()
+    for f in fips_list:
+        precomputed[f["full_tract_id"]]
+    lookup_s = time.perf_counter() - start
+
+    # Sanity check: both paths agree
+    mismatches = sum(
+        1 for i, s in enumerate(scalar)
+        if s and not np.isclose(s["poverty_rate"], stats["poverty_rate"][i], equal_nan=True)
+    )
+
+    n = len(rows)
+    print(f"Per-request derivation: {per_request_s * 1000:8.2f} ms total, {per_request_s / n * 1e6:7.2f} µs/tract")
+    print(f"Vectorized batch:       {batch_s * 1000:8.2f} ms total, {batch_s / n * 1e6:7.2f} µs/tract")
+    print(f"Precomputed lookup:     {lookup_s * 1000:8.2f} ms total, {lookup_s / n * 1e6:7.2f} µs/tract")
+    print(f"Mismatches (poverty_rate): {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Builds the boundary files used by geocoding_service.LocalGeocoder:
+ny_tracts_2020.geojson and ny_blocks_2020.geojson (paths overridable with
+NY_TRACTS_GEOJSON / NY_BLOCKS_GEOJSON).
+
+Sources (first match wins), per layer:
+1. Local TIGER/Line zip next to this script (offline runs):
+   tl_2020_36_tract.zip, tl_2020_36_tabblock20.zip
+2. www2.census.gov/geo/tiger/TIGER2020 - the zip is kept next to this
+   script so the next run can be offline
+
+The shapefile is converted with a small built-in reader (Polygon records +
+DBF attributes), keeping only the FIPS properties the geocoder reads and
+coordinates rounded to 6 decimals (~0.1 m).
+
+Usage:
+    python build_ny_boundaries.py            # build missing files only
+    python build_ny_boundaries.py --refresh  # rebuild both files
+"""
+
+import io
+import json
+import os
+import struct
+import sys
+import zipfile
+from typing import Dict, Iterator, List, Tuple
+
+import requests
+
+from geocoding_service import BLOCKS_GEOJSON_PATH, NY_STATE_FIPS, TRACTS_GEOJSON_PATH
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+TIGER_URL = "https://www2.census.gov/geo/tiger/TIGER2020/{layer}/{name}"
+
+# (TIGER layer dir, zip name, output path, properties kept)
+LAYERS = {
+    "tracts": ("TRACT", f"tl_2020_{NY_STATE_FIPS}_tract.zip", TRACTS_GEOJSON_PATH,
+               ["STATEFP", "COUNTYFP", "TRACTCE"]),
+    "blocks": ("TABBLOCK20", f"tl_2020_{NY_STATE_FIPS}_tabblock20.zip", BLOCKS_GEOJSON_PATH,
+               ["STATEFP20", "COUNTYFP20", "TRACTCE20", "BLOCKCE20"]),
+}
+
+SHP_POLYGON = 5
+COORD_DECIMALS = 6
+
+
+def read_dbf(data: bytes) -> Iterator[Dict[str, str]]:
+    """Records of a dBASE III file as {field: stripped text}."""
+    count, header_len, record_len = struct.unpack("<IHH", data[4:12])
+    fields = []
+    offset = 32
+    while data[offset] != 0x0D:
+        name = data[offset:offset + 11].split(b"\x00", 1)[0].decode("ascii")
+        fields.append((name, data[offset + 16]))
+        offset += 32
+
+    for i in range(count):
+        record = data[header_len + i * record_len:header_len + (i + 1) * record_len]
+        if record[:1] == b"*":  # Deleted
+            continue
+        values, pos = {}, 1
+        for name, length in fields:
+            values[name] = record[pos:pos + length].decode("latin-1").strip()
+            pos += length
+        yield values
+
+
+def _signed_area(ring: List[Tuple[float, float]]) -> float:
+    return sum(x1 * y2 - x2 * y1 for (x1, y1), (x2, y2) in zip(ring, ring[1:] + ring[:1])) / 2
+
+
+def read_shp_polygons(data: bytes) -> Iterator[List[List[List[Tuple[float, float]]]]]:
+    """
+    Polygon records of a .shp file as lists of polygons (exterior ring + holes).
+    Shapefile exteriors are clockwise and holes follow their exterior.
+    """
+    offset = 100
+    while offset < len(data):
+        _, content_words = struct.unpack(">ii", data[offset:offset + 8])
+        content = data[offset + 8:offset + 8 + content_words * 2]
+        offset += 8 + content_words * 2
+
+        shape_type = struct.unpack("<i", content[:4])[0]
+        if shape_type != SHP_POLYGON:
+            yield []  # Null shape: keeps records aligned with the DBF
+            continue
+
+        num_parts, num_points = struct.unpack("<ii", content[36:44])
+        parts = list(struct.unpack(f"<{num_parts}i", content[44:44 + 4 * num_parts]))
+        coords = struct.unpack(f"<{2 * num_points}d", content[44 + 4 * num_parts:44 + 4 * num_parts + 16 * num_points])
+        points = list(zip(coords[0::2], coords[1::2]))
+
+        polygons = []
+        for start, end in zip(parts, parts[1:] + [num_points]):
+            ring = points[start:end]
+            if _signed_area(ring) <= 0 or not polygons:
+                polygons.append([ring])
+            else:
+                polygons[-1].append(ring)
+        yield polygons
+
+
+def shapefile_to_geojson(shp: bytes, dbf: bytes, properties: List[str]) -> Dict:
+    """FeatureCollection (Polygon / MultiPolygon) with only `properties` kept."""
+    features = []
+    for polygons, record in zip(read_shp_polygons(shp), read_dbf(dbf)):
+        if not polygons:
+            continue
+        rounded = [
+            [[[round(x, COORD_DECIMALS), round(y, COORD_DECIMALS)] for x, y in ring] for ring in polygon]
+            for polygon in polygons
+        ]
+        geometry = (
+            {"type": "Polygon", "coordinates": rounded[0]} if len(rounded) == 1
+            else {"type": "MultiPolygon", "coordinates": rounded}
+        )
+        features.append({
+            "type": "Feature",
+            "properties": {name: record.get(name) for name in properties},
+            "geometry": geometry,
+        })
+    return {"type": "FeatureCollection", "features": features}
+
+
+def load_tiger_zip(layer_dir: str, zip_name: str) -> bytes:
+    path = os.path.join(SCRIPT_DIR, zip_name)
+    if os.path.exists(path):
+        print(f"📂 Loading local TIGER file: {path}")
+        with open(path, "rb") as f:
+            return f.read()
+
+    url = TIGER_URL.format(layer=layer_dir, name=zip_name)
+    print(f"🌐 Downloading {url}...")
+    response = requests.get(url, timeout=(10, 300))
+    response.raise_for_status()
+    with open(path, "wb") as f:
+        f.write(response.content)
+    print(f"💾 TIGER file kept at {path}")
+    return response.content
+
+
+def build_layer(name: str, refresh: bool = False) -> bool:
+    layer_dir, zip_name, output, properties = LAYERS[name]
+    if os.path.exists(output) and not refresh:
+        print(f"✅ {output} already exists - skipping {name}")
+        return True
+
+    with zipfile.ZipFile(io.BytesIO(load_tiger_zip(layer_dir, zip_name))) as archive:
+        stem = zip_name[:-len(".zip")]
+        collection = shapefile_to_geojson(archive.read(f"{stem}.shp"), archive.read(f"{stem}.dbf"), properties)
+
+    # Write next to the target, then swap: a running geocoder never reads a partial file
+    tmp = f"{output}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(collection, f, separators=(",", ":"))
+    os.replace(tmp, output)
+    print(f"✅ {name}: {len(collection['features'])} features written to {output}")
+    return True
+
+
+def build_ny_boundaries(refresh: bool = False) -> bool:
+    print("🗺️  Building NY boundary files for the local geocoder...")
+    try:
+        return all(build_layer(name, refresh) for name in LAYERS)
+    except Exception as e:
+        print(f"❌ Error building boundary files: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    ok = build_ny_boundaries(refresh="--refresh" in sys.argv)
+    sys.exit(0 if ok else 1)
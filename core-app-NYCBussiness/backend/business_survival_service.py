@@ -3,13 +3,36 @@ Business Survival Rate Service
 
 Provides data on 5-year survival rates for businesses by industry and county in NY.
 Source: NY BDS (Business Dynamics Statistics) 2017-2022
+Served from the in-memory survival_index (loaded at startup, no SQL per request).
 """
 
+import numpy as np
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from database import BusinessSurvival
 from typing import List, Dict, Optional
 
+from business_type_classifier import business_type_classifier
+from survival_index import SurvivalIndex, get_survival_index, register_reload_hook
+from survival_ranks import rank_table_for
+
+# Industry labels of the loaded data feed the classifier's label index
+register_reload_hook(lambda index: business_type_classifier.set_labels(index.label))
+
+# `db` is only used to load the index if startup has not loaded it yet
+
+
+def _rate(index: SurvivalIndex, i: int) -> float:
+    return float(index.rate[i])
+
+
+def _firms(index: SurvivalIndex, i: int) -> int:
+    return int(index.firms[i])
+
+
+def _first_label_match(index: SurvivalIndex, county_name: str, industry_label: str) -> Optional[int]:
+    """County row of the industry label the text clearly refers to (typo tolerant, never ambiguous)."""
+    label = index.best_label(industry_label)
+    return index.find_label(county_name, label) if label is not None else None
+
 
 def get_survival_rate_by_industry(
     db: Session,
@@ -28,29 +51,26 @@ def get_survival_rate_by_industry(
     Returns:
         Dict with survival rate and firm statistics
     """
-    query = db.query(BusinessSurvival).filter(
-        BusinessSurvival.county_name == county_name
-    )
+    index = get_survival_index(db)
     
     if naics_code:
-        query = query.filter(BusinessSurvival.naics_code == naics_code)
+        i = index.find(county_name, naics_code)
     elif industry_label:
-        query = query.filter(
-            BusinessSurvival.naics_industry_label.ilike(f"%{industry_label}%")
-        )
-    
-    result = query.first()
+        i = _first_label_match(index, county_name, industry_label)
+    else:
+        rows = np.flatnonzero(index.county == county_name)
+        i = int(rows[0]) if len(rows) else None
     
-    if not result:
+    if i is None:
         return None
     
     return {
-        "county_name": result.county_name,
-        "industry": result.naics_industry_label,
-        "naics_code": result.naics_code,
-        "firms_2017_start_pool": result.firms_2017_start_pool,
-        "survival_rate_5_year": result.aggregate_5_year_survival_pct,
-        "interpretation": get_survival_interpretation(result.aggregate_5_year_survival_pct)
+        "county_name": index.county[i],
+        "industry": index.label[i],
+        "naics_code": index.naics[i],
+        "firms_2017_start_pool": _firms(index, i),
+        "survival_rate_5_year": _rate(index, i),
+        "interpretation": get_survival_interpretation(_rate(index, i))
     }
 
 
@@ -69,28 +89,22 @@ def get_all_industries_for_county(
     Returns:
         List of industries with survival rates
     """
-    query = db.query(BusinessSurvival).filter(
-        BusinessSurvival.county_name == county_name
-    )
-    
-    if exclude_total:
-        query = query.filter(
-            BusinessSurvival.naics_code != "00"
-        )
+    index = get_survival_index(db)
+    rows = list(index.county_rows(county_name))
     
-    results = query.order_by(
-        BusinessSurvival.aggregate_5_year_survival_pct.desc()
-    ).all()
+    if not exclude_total and county_name in index.county_total:
+        rows.append(index.county_total[county_name])
+        rows.sort(key=lambda i: -index.rate[i])
     
     return [
         {
-            "industry": r.naics_industry_label,
-            "naics_code": r.naics_code,
-            "survival_rate": r.aggregate_5_year_survival_pct,
-            "firms_count": r.firms_2017_start_pool,
-            "risk_level": get_risk_level(r.aggregate_5_year_survival_pct)
+            "industry": index.label[i],
+            "naics_code": index.naics[i],
+            "survival_rate": _rate(index, i),
+            "firms_count": _firms(index, i),
+            "risk_level": get_risk_level(_rate(index, i))
         }
-        for r in results
+        for i in rows
     ]
 
 
@@ -98,22 +112,57 @@ def get_county_total_survival(db: Session, county_name: str) -> Optional[Dict]:
     """
     Get overall survival rate for all sectors in a county.
     """
-    result = db.query(BusinessSurvival).filter(
-        BusinessSurvival.county_name == county_name,
-        BusinessSurvival.naics_code == "00"
-    ).first()
+    index = get_survival_index(db)
+    i = index.county_total.get(county_name)
     
-    if not result:
+    if i is None:
         return None
     
     return {
-        "county_name": result.county_name,
-        "overall_survival_rate": result.aggregate_5_year_survival_pct,
-        "total_firms_2017": result.firms_2017_start_pool,
-        "interpretation": get_survival_interpretation(result.aggregate_5_year_survival_pct)
+        "county_name": index.county[i],
+        "overall_survival_rate": _rate(index, i),
+        "total_firms_2017": _firms(index, i),
+        "interpretation": get_survival_interpretation(_rate(index, i))
     }
 
 
+def search_industries(db: Session, query: str, limit: int = 10) -> List[Dict]:
+    """
+    Fuzzy industry label search, ranked by trigram similarity.
+    """
+    index = get_survival_index(db)
+    return [
+        {
+            "industry": label,
+            "naics_code": index.naics[int(np.flatnonzero(index.label == label)[0])],
+            "similarity": similarity
+        }
+        for label, similarity in index.search_labels(query, limit)
+    ]
+
+
+def get_county_survival_ranks(
+    db: Session,
+    county_name: str,
+    naics_code: str = None
+) -> List[Dict]:
+    """
+    How a county ranks among all counties for each of its industries
+    (or only `naics_code`): rank, percentile, z-score, state averages.
+    """
+    index = get_survival_index(db)
+    table = rank_table_for(index)
+    
+    if naics_code:
+        i = index.find(county_name, naics_code)
+        return [table.row(i)] if i is not None else []
+    
+    rows = list(index.county_rows(county_name))
+    if county_name in index.county_total:
+        rows.insert(0, index.county_total[county_name])
+    return [table.row(i) for i in rows]
+
+
 def get_industry_comparison_across_counties(
     db: Session,
     naics_code: str = None,
@@ -123,27 +172,53 @@ def get_industry_comparison_across_counties(
     """
     Compare survival rates for same industry across different counties.
     """
-    query = db.query(BusinessSurvival)
+    index = get_survival_index(db)
     
     if naics_code:
-        query = query.filter(BusinessSurvival.naics_code == naics_code)
+        rows = index.naics_sorted.get(naics_code, np.empty(0, dtype=np.int64))
     elif industry_label:
-        query = query.filter(
-            BusinessSurvival.naics_industry_label.ilike(f"%{industry_label}%")
-        )
-    
-    results = query.order_by(
-        BusinessSurvival.aggregate_5_year_survival_pct.desc()
-    ).limit(limit).all()
+        labels = [label for label, _ in index.search_labels(industry_label, limit=len(index.label_search))]
+        rows = index.order_desc[index.label_rows(labels)[index.order_desc]]
+    else:
+        rows = index.order_desc
     
     return [
         {
-            "county": r.county_name,
-            "industry": r.naics_industry_label,
-            "survival_rate": r.aggregate_5_year_survival_pct,
-            "firms_count": r.firms_2017_start_pool
+            "county": index.county[i],
+            "industry": index.label[i],
+            "survival_rate": _rate(index, i),
+            "firms_count": _firms(index, i)
+        }
+        for i in rows[:limit]
+    ]
+
+
+def _highest(index: SurvivalIndex, county_name: str, limit: int) -> List[Dict]:
+    return [
+        {
+            "industry": index.label[i],
+            "naics_code": index.naics[i],
+            "survival_rate": _rate(index, i),
+            "firms_count": _firms(index, i)
+        }
+        for i in index.county_rows(county_name)[:limit]
+    ]
+
+
+def _lowest(index: SurvivalIndex, county_name: str, limit: int) -> List[Dict]:
+    rows = index.county_rows(county_name)
+    # Only industries with enough data; ascending = desc order reversed, ties in id order
+    rows = rows[index.firms[rows] >= 10]
+    ascending = rows[np.argsort(index.rate[rows], kind="stable")]
+    return [
+        {
+            "industry": index.label[i],
+            "naics_code": index.naics[i],
+            "survival_rate": _rate(index, i),
+            "firms_count": _firms(index, i),
+            "risk_level": "HIGH"
         }
-        for r in results
+        for i in ascending[:limit]
     ]
 
 
@@ -155,22 +230,7 @@ def get_highest_survival_industries(
     """
     Get industries with highest survival rates in a county.
     """
-    results = db.query(BusinessSurvival).filter(
-        BusinessSurvival.county_name == county_name,
-        BusinessSurvival.naics_code != "00"  # Exclude total
-    ).order_by(
-        BusinessSurvival.aggregate_5_year_survival_pct.desc()
-    ).limit(limit).all()
-    
-    return [
-        {
-            "industry": r.naics_industry_label,
-            "naics_code": r.naics_code,
-            "survival_rate": r.aggregate_5_year_survival_pct,
-            "firms_count": r.firms_2017_start_pool
-        }
-        for r in results
-    ]
+    return _highest(get_survival_index(db), county_name, limit)
 
 
 def get_lowest_survival_industries(
@@ -181,50 +241,60 @@ def get_lowest_survival_industries(
     """
     Get industries with lowest survival rates in a county (highest risk).
     """
-    results = db.query(BusinessSurvival).filter(
-        BusinessSurvival.county_name == county_name,
-        BusinessSurvival.naics_code != "00",
-        BusinessSurvival.firms_2017_start_pool >= 10  # Only industries with enough data
-    ).order_by(
-        BusinessSurvival.aggregate_5_year_survival_pct.asc()
-    ).limit(limit).all()
+    return _lowest(get_survival_index(db), county_name, limit)
+
+
+def _statistics(index: SurvivalIndex, county_name: str, safest: List[Dict], riskiest: List[Dict]) -> Optional[Dict]:
+    rows = index.county_rows(county_name)
     
-    return [
-        {
-            "industry": r.naics_industry_label,
-            "naics_code": r.naics_code,
-            "survival_rate": r.aggregate_5_year_survival_pct,
-            "firms_count": r.firms_2017_start_pool,
-            "risk_level": "HIGH"
-        }
-        for r in results
-    ]
+    if not len(rows):
+        return None
+    
+    survival_rates = index.rate[rows]
+    
+    return {
+        "county": county_name,
+        "total_industries": len(rows),
+        "average_survival_rate": round(float(survival_rates.mean()), 2),
+        "highest_survival": float(survival_rates.max()),
+        "lowest_survival": float(survival_rates.min()),
+        "industries_above_70pct": int((survival_rates >= 70).sum()),
+        "industries_below_60pct": int((survival_rates < 60).sum()),
+        "high_risk_industries": riskiest[:3],
+        "safest_industries": safest[:3]
+    }
 
 
 def get_survival_statistics(db: Session, county_name: str) -> Dict:
     """
     Get comprehensive survival statistics for a county.
     """
-    industries = db.query(BusinessSurvival).filter(
-        BusinessSurvival.county_name == county_name,
-        BusinessSurvival.naics_code != "00"
-    ).all()
-    
-    if not industries:
-        return None
-    
-    survival_rates = [i.aggregate_5_year_survival_pct for i in industries]
+    index = get_survival_index(db)
+    return _statistics(index, county_name, _highest(index, county_name, 3), _lowest(index, county_name, 3))
+
+
+def get_survival_bundle(
+    db: Session,
+    business_type: str,
+    county_name: str,
+    limit: int = 5
+) -> Dict:
+    """
+    Everything a simulation needs about survival in one pass over the index:
+    business type survival, county total, statistics, safest and riskiest industries.
+    """
+    index = get_survival_index(db)
+    safest = _highest(index, county_name, max(limit, 3))
+    riskiest = _lowest(index, county_name, max(limit, 3))
     
     return {
         "county": county_name,
-        "total_industries": len(industries),
-        "average_survival_rate": round(sum(survival_rates) / len(survival_rates), 2),
-        "highest_survival": max(survival_rates),
-        "lowest_survival": min(survival_rates),
-        "industries_above_70pct": len([r for r in survival_rates if r >= 70]),
-        "industries_below_60pct": len([r for r in survival_rates if r < 60]),
-        "high_risk_industries": get_lowest_survival_industries(db, county_name, 3),
-        "safest_industries": get_highest_survival_industries(db, county_name, 3)
+        "business_type": business_type,
+        "business_survival": find_business_type_survival(db, business_type, county_name),
+        "county_total": get_county_total_survival(db, county_name),
+        "statistics": _statistics(index, county_name, safest, riskiest),
+        "safest_industries": safest[:limit],
+        "riskiest_industries": riskiest[:limit]
     }
 
 
@@ -236,62 +306,26 @@ def find_business_type_survival(
     """
     Find survival rate by business type keywords.
     
-    Maps common business types to NAICS industries:
+    Maps common business types to NAICS industries (business_type_classifier):
     - coffee shop, cafe, restaurant -> Accommodation and food services (72)
     - retail, store, shop -> Retail trade (44-45)
     - tech, software, IT -> Professional, scientific, and technical services (54)
     - etc.
+    Words of the business type that appear in an industry label also count.
     """
-    # Business type to NAICS mapping
-    type_mapping = {
-        "coffee": "Accommodation and food services",
-        "cafe": "Accommodation and food services",
-        "restaurant": "Accommodation and food services",
-        "food": "Accommodation and food services",
-        "bar": "Accommodation and food services",
-        "retail": "Retail trade",
-        "store": "Retail trade",
-        "shop": "Retail trade",
-        "boutique": "Retail trade",
-        "tech": "Professional, scientific, and technical services",
-        "software": "Professional, scientific, and technical services",
-        "consulting": "Professional, scientific, and technical services",
-        "it": "Professional, scientific, and technical services",
-        "health": "Health care and social assistance",
-        "medical": "Health care and social assistance",
-        "clinic": "Health care and social assistance",
-        "fitness": "Arts, entertainment, and recreation",
-        "gym": "Arts, entertainment, and recreation",
-        "salon": "Other services (except public administration)",
-        "repair": "Other services (except public administration)",
-        "construction": "Construction",
-        "contractor": "Construction",
-    }
-    
-    # Find matching industry
-    business_lower = business_type.lower()
-    industry_label = None
+    index = get_survival_index(db)
     
-    for keyword, industry in type_mapping.items():
-        if keyword in business_lower:
-            industry_label = industry
-            break
-    
-    if not industry_label:
-        # Try direct search in industry labels
-        result = db.query(BusinessSurvival).filter(
-            BusinessSurvival.county_name == county_name,
-            BusinessSurvival.naics_industry_label.ilike(f"%{business_type}%")
-        ).first()
-        
-        if result:
-            return get_survival_rate_by_industry(
-                db, county_name, 
-                industry_label=result.naics_industry_label
-            )
-        return None
+    # Candidates are ranked; the first one with data in this county wins
+    for industry_label, _ in business_type_classifier.classify(business_type):
+        i = index.find_label(county_name, industry_label)
+        if i is not None:
+            return get_survival_rate_by_industry(db, county_name, industry_label=index.label[i])
     
-    return get_survival_rate_by_industry(db, county_name, industry_label=industry_label)
+    # Last resort: fuzzy match on the industry labels (partial words, typos)
+    i = _first_label_match(index, county_name, business_type)
+    if i is not None:
+        return get_survival_rate_by_industry(db, county_name, industry_label=index.label[i])
+    return None
 
 
 # Helper functions
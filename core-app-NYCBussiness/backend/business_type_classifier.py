@@ -0,0 +1,164 @@
+"""
+Business type -> BDS industry (NAICS label) classifier.
+
+Free-text business types ("IT consulting", "coffee shops") are matched on
+whole tokens, never substrings, so short keys like "it" no longer match
+"Utilities" or "fitness". Two indexes are built once:
+
+- Keyword phrases (TYPE_MAPPING, one or more words) in a dict keyed by token
+  tuple; the input is scanned with every phrase length up to the longest
+  key, so a lookup costs O(len(input) * MAX_PHRASE_TOKENS) dict probes no
+  matter how many keywords are added
+- Every naics_industry_label, token -> labels, weighted by inverse label
+  frequency (loaded from the survival index, refreshed on reload); stopwords
+  and generic label words ("and", "services", "trade") are not indexed, and a
+  label matched without any keyword must cover LABEL_MIN_COVERAGE of the input
+
+classify() returns ranked (label, score) candidates; results per normalized
+business type are memoized in an LRU that is cleared when labels change.
+"""
+
+import math
+import os
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
+
+CLASSIFIER_CACHE_SIZE = int(os.getenv("BUSINESS_TYPE_CACHE_SIZE", "4096"))
+
+FOOD = "Accommodation and food services"
+RETAIL = "Retail trade"
+PROFESSIONAL = "Professional, scientific, and technical services"
+HEALTH = "Health care and social assistance"
+ARTS = "Arts, entertainment, and recreation"
+OTHER = "Other services (except public administration)"
+CONSTRUCTION = "Construction"
+
+# Keyword (word or phrase) -> industry label; earlier keys win ties
+TYPE_MAPPING: Dict[str, str] = {
+    "coffee": FOOD,
+    "coffee shop": FOOD,
+    "cafe": FOOD,
+    "restaurant": FOOD,
+    "food": FOOD,
+    "food truck": FOOD,
+    "bar": FOOD,
+    "bakery": FOOD,
+    "hotel": FOOD,
+    "retail": RETAIL,
+    "store": RETAIL,
+    "shop": RETAIL,
+    "boutique": RETAIL,
+    "tech": PROFESSIONAL,
+    "software": PROFESSIONAL,
+    "consulting": PROFESSIONAL,
+    "it": PROFESSIONAL,
+    "it services": PROFESSIONAL,
+    "health": HEALTH,
+    "medical": HEALTH,
+    "clinic": HEALTH,
+    "fitness": ARTS,
+    "gym": ARTS,
+    "salon": OTHER,
+    "hair salon": OTHER,
+    "repair": OTHER,
+    "construction": CONSTRUCTION,
+    "contractor": CONSTRUCTION,
+}
+
+KEYWORD_WEIGHT = 10.0
+# A label matched only through its own words must cover this share of the input's words
+LABEL_MIN_COVERAGE = float(os.getenv("BUSINESS_TYPE_LABEL_MIN_COVERAGE", "0.5"))
+
+# Connectives and words shared by many NAICS labels carry no industry signal
+# (compared after _normalize_token, hence "service", "companie")
+LABEL_STOPWORDS = {
+    "a", "an", "and", "for", "in", "of", "on", "or", "the", "to", "with",
+    "service", "trade", "other", "except", "public", "administration",
+    "support", "management", "companie", "enterprise", "all", "total", "sector",
+}
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def _normalize_token(token: str) -> str:
+    # Naive plural folding: shops -> shop, cafes -> cafe (not "business", "fitness")
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    return [_normalize_token(t) for t in _TOKEN.findall(text.lower())]
+
+
+class BusinessTypeClassifier:
+    """Token/phrase matcher over the keyword map and the industry labels."""
+
+    def __init__(self, mapping: Dict[str, str]):
+        self.phrases: Dict[Tuple[str, ...], Tuple[str, int]] = {}
+        for priority, (keyword, label) in enumerate(mapping.items()):
+            self.phrases.setdefault(tuple(tokenize(keyword)), (label, priority))
+        self.max_phrase = max((len(p) for p in self.phrases), default=1)
+        self.label_tokens: Dict[str, Dict[str, float]] = {}
+        self._classify = lru_cache(maxsize=CLASSIFIER_CACHE_SIZE)(self._rank)
+
+    def set_labels(self, labels: Iterable[str]) -> None:
+        """Index industry labels by token with IDF weights; clears memoized results."""
+        labels = sorted({l for l in labels if l and l != "Total for all sectors"})
+        postings: Dict[str, set] = {}
+        for label in labels:
+            for token in set(tokenize(label)) - LABEL_STOPWORDS:
+                postings.setdefault(token, set()).add(label)
+
+        self.label_tokens = {
+            token: {label: math.log(1 + len(labels) / len(owners)) for label in owners}
+            for token, owners in postings.items()
+        }
+        self._classify.cache_clear()
+
+    def classify(self, business_type: str) -> List[Tuple[str, float]]:
+        """Ranked (industry label, score) candidates, best first; [] if nothing matches."""
+        return list(self._classify(" ".join(tokenize(business_type or ""))))
+
+    def _rank(self, normalized: str) -> Tuple[Tuple[str, float], ...]:
+        tokens = normalized.split()
+        scores: Dict[str, float] = {}
+        priority: Dict[str, int] = {}
+
+        for start in range(len(tokens)):
+            for length in range(1, min(self.max_phrase, len(tokens) - start) + 1):
+                hit = self.phrases.get(tuple(tokens[start:start + length]))
+                if hit:
+                    label, rank = hit
+                    scores[label] = scores.get(label, 0.0) + KEYWORD_WEIGHT * length
+                    priority[label] = min(priority.get(label, rank), rank)
+
+        content = {token for token in tokens if token not in LABEL_STOPWORDS}
+        label_scores: Dict[str, float] = {}
+        label_hits: Dict[str, int] = {}
+        for token in content:
+            for label, weight in self.label_tokens.get(token, {}).items():
+                label_scores[label] = label_scores.get(label, 0.0) + weight
+                label_hits[label] = label_hits.get(label, 0) + 1
+
+        for label, weight in label_scores.items():
+            # Label words alone must explain most of the input ("dog walking" is not "Transportation")
+            if label in scores or label_hits[label] >= LABEL_MIN_COVERAGE * len(content):
+                scores[label] = scores.get(label, 0.0) + weight
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], priority.get(item[0], len(self.phrases))))
+        return tuple((label, round(score, 4)) for label, score in ranked)
+
+    def stats(self) -> Dict[str, int]:
+        info = self._classify.cache_info()
+        return {
+            "keywords": len(self.phrases),
+            "label_tokens": len(self.label_tokens),
+            "cache_size": info.currsize,
+            "cache_hits": info.hits,
+            "cache_misses": info.misses,
+        }
+
+
+business_type_classifier = BusinessTypeClassifier(TYPE_MAPPING)
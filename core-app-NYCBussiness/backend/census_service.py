@@ -1,53 +1,91 @@
-import requests
+import copy
 import json
 import os
 from typing import Optional, Dict, Any
 from dotenv import load_dotenv
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from database import SessionLocal, CensusTractData
+from database import SessionLocal, AsyncSessionLocal, CensusTractData
+from geocoding_service import parse_coordinates, resolve_fips
+from singleflight import SingleFlight
 
 load_dotenv()
 
+# Anul datelor din ny_tract_clusters_2022.csv (folosit în cheia de deduplicare a analizelor)
+CENSUS_DATA_VINTAGE = "2022"
+
+# O singură interogare per tract, chiar dacă zeci de lansări concurente cer aceeași zonă
+census_flight = SingleFlight("census_tract")
+
 def get_census_tract(lat: str, lon: str) -> Optional[Dict[str, str]]:
     """
     Convertește coordonatele (lat, lon) în FIPS codes (State, County, Tract).
-    MODIFICAT: Folosește geocoding API pentru a obține FIPS, apoi verifică în baza de date locală.
+    MODIFICAT: Folosește resolve_fips() (cache LRU + Postgres în fața geocoderului
+    local); API-ul Geocoding este folosit doar dacă fișierele de granițe lipsesc.
     """
     
     print(f"--- Geocoding {lat}, {lon} ---")
-    url = (
-        f"https://geocoding.geo.census.gov/geocoder/geographies/coordinates"
-        f"?x={lon}&y={lat}"
-        f"&benchmark=Public_AR_Current"
-        f"&vintage=Current_Current"
-        f"&format=json"
-    )
-    
-    try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-        
-        tracts = data.get('result', {}).get('geographies', {}).get('Census Tracts', [])
-        
-        if not tracts:
-            print("Nu s-a găsit niciun Census Tract pentru aceste coordonate.")
-            return None
-            
-        tract_info = tracts[0]
-        fips = {
-            "state": tract_info.get('STATE'),
-            "county": tract_info.get('COUNTY'),
-            "tract": tract_info.get('TRACT')
-        }
-        
-        print(f"Zonă găsită: State={fips['state']}, County={fips['county']}, Tract={fips['tract']}")
-        return fips
-        
-    except requests.exceptions.RequestException as e:
-        print(f"Eroare la interogarea API-ului Geocoding: {e}")
+
+    point = parse_coordinates(lat, lon)
+    if point is None:
+        print(f"Coordonate invalide: {lat!r}, {lon!r}")
+        return None
+
+    fips = resolve_fips(*point)
+    if not fips:
+        print("Nu s-a găsit niciun Census Tract pentru aceste coordonate.")
         return None
 
+    print(f"Zonă găsită: State={fips['state']}, County={fips['county']}, Tract={fips['tract']}")
+    return {
+        "state": fips["state"],
+        "county": fips["county"],
+        "tract": fips["tract"],
+    }
+
+
+def census_record_to_dict(fips_codes: Dict[str, str], record: CensusTractData) -> Dict[str, Any]:
+    """Convertește un rând CensusTractData în formatul compatibil cu API-ul vechi."""
+    result = {
+        "fips_codes": fips_codes,
+        "area_name": record.area_name or "N/A",
+        "demographics": {
+            "NAME": record.area_name,
+            "B01001_001E": str(int(record.resident_population_total)) if record.resident_population_total else None,
+            "B01002_001E": str(record.resident_median_age) if record.resident_median_age else None,
+            "B19013_001E": str(int(record.resident_median_household_income)) if record.resident_median_household_income else None,
+            "B19301_001E": None,  # Nu avem acest câmp în CSV
+            "B17001_002E": str(int(record.resident_population_total * record.pct_poverty)) if (record.resident_population_total and record.pct_poverty) else None,
+            "B15003_001E": None,  # Nu avem total population 25+
+            "B15003_022E": str(int(record.resident_population_total * record.pct_bachelors)) if (record.resident_population_total and record.pct_bachelors) else None,
+            "B15003_023E": None,  # Nu avem masters degree separat
+            "B15003_025E": None,  # Nu avem doctorate separat
+            "B25003_001E": None,  # Nu avem total housing units
+            "B25003_002E": None,  # Nu avem owner occupied
+            "B25003_003E": None,  # Poate fi calculat din pct_renters dacă avem total
+            "B25031_001E": None,  # Nu avem median rent
+            "B25077_001E": None,  # Nu avem median home value
+            "C24050_001E": str(int(record.workforce_total_jobs)) if record.workforce_total_jobs else None,
+            "C24050_007E": None,  # Nu avem finance/insurance
+            "C24050_018E": None,  # Nu avem arts/entertainment
+            "C24050_029E": str(int(record.workforce_total_jobs * record.pct_jobs_prof_services)) if (record.workforce_total_jobs and record.pct_jobs_prof_services) else None,
+
+            # Date calculate
+            "poverty_rate": round(record.pct_poverty * 100, 2) if record.pct_poverty else 0,
+            "renter_rate": round(record.pct_renters * 100, 2) if record.pct_renters else 0,
+
+            # Date suplimentare din CSV
+            "cluster": record.cluster,
+            "pct_bachelors": record.pct_bachelors,
+            "pct_jobs_young": record.pct_jobs_young,
+            "pct_jobs_high_earn": record.pct_jobs_high_earn,
+            "pct_jobs_prof_services": record.pct_jobs_prof_services,
+            "pct_jobs_healthcare": record.pct_jobs_healthcare,
+        }
+    }
+
+    return result
+
 
 def get_census_data_from_db(fips_codes: Dict[str, str]) -> Optional[Dict[str, Any]]:
     """
@@ -82,46 +120,7 @@ def get_census_data_from_db(fips_codes: Dict[str, str]) -> Optional[Dict[str, An
         
         print(f"✅ Date găsite în DB pentru: {census_record.area_name}")
         
-        # Convertim datele din DB în formatul compatibil cu API-ul vechi
-        result = {
-            "fips_codes": fips_codes,
-            "area_name": census_record.area_name or "N/A",
-            "demographics": {
-                "NAME": census_record.area_name,
-                "B01001_001E": str(int(census_record.resident_population_total)) if census_record.resident_population_total else None,
-                "B01002_001E": str(census_record.resident_median_age) if census_record.resident_median_age else None,
-                "B19013_001E": str(int(census_record.resident_median_household_income)) if census_record.resident_median_household_income else None,
-                "B19301_001E": None,  # Nu avem acest câmp în CSV
-                "B17001_002E": str(int(census_record.resident_population_total * census_record.pct_poverty)) if (census_record.resident_population_total and census_record.pct_poverty) else None,
-                "B15003_001E": None,  # Nu avem total population 25+
-                "B15003_022E": str(int(census_record.resident_population_total * census_record.pct_bachelors)) if (census_record.resident_population_total and census_record.pct_bachelors) else None,
-                "B15003_023E": None,  # Nu avem masters degree separat
-                "B15003_025E": None,  # Nu avem doctorate separat
-                "B25003_001E": None,  # Nu avem total housing units
-                "B25003_002E": None,  # Nu avem owner occupied
-                "B25003_003E": None,  # Poate fi calculat din pct_renters dacă avem total
-                "B25031_001E": None,  # Nu avem median rent
-                "B25077_001E": None,  # Nu avem median home value
-                "C24050_001E": str(int(census_record.workforce_total_jobs)) if census_record.workforce_total_jobs else None,
-                "C24050_007E": None,  # Nu avem finance/insurance
-                "C24050_018E": None,  # Nu avem arts/entertainment
-                "C24050_029E": str(int(census_record.workforce_total_jobs * census_record.pct_jobs_prof_services)) if (census_record.workforce_total_jobs and census_record.pct_jobs_prof_services) else None,
-                
-                # Date calculate
-                "poverty_rate": round(census_record.pct_poverty * 100, 2) if census_record.pct_poverty else 0,
-                "renter_rate": round(census_record.pct_renters * 100, 2) if census_record.pct_renters else 0,
-                
-                # Date suplimentare din CSV
-                "cluster": census_record.cluster,
-                "pct_bachelors": census_record.pct_bachelors,
-                "pct_jobs_young": census_record.pct_jobs_young,
-                "pct_jobs_high_earn": census_record.pct_jobs_high_earn,
-                "pct_jobs_prof_services": census_record.pct_jobs_prof_services,
-                "pct_jobs_healthcare": census_record.pct_jobs_healthcare,
-            }
-        }
-        
-        return result
+        return census_record_to_dict(fips_codes, census_record)
         
     except Exception as e:
         print(f"❌ Eroare la interogarea bazei de date: {e}")
@@ -130,6 +129,32 @@ def get_census_data_from_db(fips_codes: Dict[str, str]) -> Optional[Dict[str, An
         db.close()
 
 
+async def get_census_data_from_db_async(fips_codes: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    """Varianta async a get_census_data_from_db() (sesiune pe engine-ul asyncpg)."""
+
+    if not fips_codes:
+        print("Interogare Census omisă (nu s-au găsit FIPS codes).")
+        return None
+
+    fips_full = f"{fips_codes['state']}{fips_codes['county']}{fips_codes['tract']}"
+
+    try:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(CensusTractData).where(CensusTractData.fips_tract_full == fips_full)
+            )
+            census_record = result.scalars().first()
+    except Exception as e:
+        print(f"❌ Eroare la interogarea bazei de date: {e}")
+        return None
+
+    if not census_record:
+        print(f"❌ Nu s-au găsit date în DB pentru FIPS: {fips_full}")
+        return None
+
+    return census_record_to_dict(fips_codes, census_record)
+
+
 def get_census_data(fips_codes: Dict[str, str], api_key: str) -> Optional[Dict[str, Any]]:
     """
     FUNCȚIE DEPRECATED - Păstrată pentru compatibilitate.
@@ -139,25 +164,51 @@ def get_census_data(fips_codes: Dict[str, str], api_key: str) -> Optional[Dict[s
     return get_census_data_from_db(fips_codes)
 
 
-def analyze_area(lat: str, lon: str) -> Optional[Dict[str, Any]]:
+def analyze_area(lat: str, lon: str, fips: Optional[Dict[str, str]] = None) -> Optional[Dict[str, Any]]:
     """
     Funcție principală care face analiza completă a zonei.
     MODIFICAT: Folosește baza de date locală în loc de API-ul Census.
+    Dacă `fips` este dat (rezolvat o singură dată de launch_business), geocodarea este omisă.
     """
     
     print(f"*** Începere analiză de piață pentru ({lat}, {lon}) ***")
-    fips_codes = get_census_tract(lat, lon)
+    if fips:
+        fips_codes = {"state": fips["state"], "county": fips["county"], "tract": fips["tract"]}
+    else:
+        fips_codes = get_census_tract(lat, lon)
     
     if not fips_codes:
         return None
     
-    # Folosim noua funcție care citește din DB
-    census_data = get_census_data_from_db(fips_codes)
+    # Folosim noua funcție care citește din DB (coalescată per tract)
+    full_tract_id = f"{fips_codes['state']}{fips_codes['county']}{fips_codes['tract']}"
+    census_data = census_flight.do(full_tract_id, get_census_data_from_db, fips_codes)
     
     if census_data:
+        # Copie profundă: rezultatul (inclusiv dicționarele interne) este partajat între cererile coalescate
+        census_data = copy.deepcopy(census_data)
         # Adăugăm coordonatele originale
         census_data["latitude"] = float(lat)
         census_data["longitude"] = float(lon)
         
     print("*** Analiză finalizată ***")
     return census_data
+
+
+async def analyze_area_async(lat: str, lon: str, fips: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    """
+    Varianta async a analyze_area() pentru pipeline-ul async din launch_business.
+    `fips` este rezolvat în prealabil de resolve_fips_async().
+    """
+
+    fips_codes = {"state": fips["state"], "county": fips["county"], "tract": fips["tract"]}
+    full_tract_id = f"{fips_codes['state']}{fips_codes['county']}{fips_codes['tract']}"
+    census_data = await census_flight.do_async(full_tract_id, get_census_data_from_db_async, fips_codes)
+
+    if census_data:
+        # Copie profundă: rezultatul (inclusiv dicționarele interne) este partajat între cererile coalescate
+        census_data = copy.deepcopy(census_data)
+        census_data["latitude"] = float(lat)
+        census_data["longitude"] = float(lon)
+
+    return census_data
@@ -1,7 +1,8 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Text, JSON, ForeignKey, DECIMAL, UniqueConstraint
+from sqlalchemy import create_engine, Column, Integer, String, Float, Date, DateTime, Text, JSON, ForeignKey, DECIMAL, UniqueConstraint, Boolean, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from datetime import datetime
 import os
 import uuid
@@ -14,15 +15,26 @@ DATABASE_URL = f"postgresql://{os.getenv('POSTGRES_USER')}:{os.getenv('POSTGRES_
 
 engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Async engine (asyncpg) pentru pipeline-urile async (launch-business)
+ASYNC_DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
+
+async_engine = create_async_engine(ASYNC_DATABASE_URL, pool_size=20, max_overflow=20)
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
 Base = declarative_base()
 
 class AreaOverview(Base):
+    """Date la nivel de tract (partajate de toate lansările din același tract)"""
     __tablename__ = "area_overview"
     
     id = Column(Integer, primary_key=True, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     
-    # Location Info
+    # Cheie de conținut: "<full_tract_id>:<vintage date census>" - o analiză per tract
+    # (pe tabele vechi indexul unic apare după migrate_dedupe_areas.py - vezi SCHEMA_INDEXES)
+    analysis_key = Column(String(32))
+    
+    # Location Info (a primei lansări; lansările ulterioare au locația în area_overview_alias)
     latitude = Column(Float, nullable=False)
     longitude = Column(Float, nullable=False)
     state_fips = Column(String(2))
@@ -57,6 +69,32 @@ class AreaOverview(Base):
     finance_insurance_real_estate = Column(Integer)
     arts_entertainment_hospitality = Column(Integer)
     professional_services = Column(Integer)
+    
+    # censusData pentru agenți, serializat o singură dată (area_service.store_census_payload)
+    census_payload = Column(Text)
+
+    __table_args__ = (
+        UniqueConstraint('analysis_key', name='uix_area_overview_analysis_key'),
+    )
+
+
+class AreaOverviewAlias(Base):
+    """
+    ID-uri de area_overview care nu au rând propriu -> ID-ul canonic, cu locația lansării:
+    duplicate eliminate la deduplicare și lansări care au refolosit analiza unui tract
+    (ID luat din secvența area_overview, deci nu se suprapune cu ID-urile zonelor).
+    Permite ca /api/get-area/{area_id} să rezolve ID-urile salvate de frontend cu coordonatele lor.
+    """
+    __tablename__ = "area_overview_alias"
+
+    old_id = Column(Integer, primary_key=True)
+    canonical_id = Column(Integer, ForeignKey('area_overview.id', ondelete='CASCADE'), nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Locația acestei lansări (NULL pentru alias-uri vechi: se folosește locația zonei)
+    latitude = Column(Float)
+    longitude = Column(Float)
+    block_fips = Column(String(4))
 
 
 class DetailedAreaAnalysis(Base):
@@ -127,6 +165,10 @@ class DetailedAreaAnalysis(Base):
     raw_demographics_json = Column(JSON)
     raw_derived_stats_json = Column(JSON)
 
+    __table_args__ = (
+        UniqueConstraint('area_overview_id', 'analysis_year', name='uix_detailed_area_year'),
+    )
+
 
 class CensusTractData(Base):
     """Tabelă pentru datele pre-încărcate din CSV (ny_tract_clusters_2022.csv)"""
@@ -162,6 +204,110 @@ class CensusTractData(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
+class AcsTractData(Base):
+    """
+    Tabelă pentru datele ACS 5-year pre-încărcate pe tract (populate_acs_data.py).
+    O linie per (full_tract_id, acs_year); valorile brute pentru toate ACS_VARIABLES.
+    """
+    __tablename__ = "acs_tract_data"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    full_tract_id = Column(String(11), nullable=False, index=True)  # State+County+Tract
+    acs_year = Column(String(4), nullable=False)
+
+    state_fips = Column(String(2))
+    county_fips = Column(String(3), index=True)
+    tract_fips = Column(String(6))
+    area_name = Column(String(255))
+
+    # {"B01003_001E": "2259", ...} - valorile brute exact cum le returnează API-ul ACS
+    acs_values = Column(JSON, nullable=False)
+
+    # Statistici derivate pre-calculate vectorizat (acs_statistics.py)
+    poverty_rate = Column(Float)
+    high_income_households_rate = Column(Float)
+    high_income_count = Column(Integer)
+    bachelor_plus_rate = Column(Float)
+    bachelor_plus_count = Column(Integer)
+    renter_rate = Column(Float)
+    work_from_home_rate = Column(Float)
+    # Marcajul "statistici calculate": o rată nedefinită (valori ACS lipsă) rămâne NULL
+    stats_computed_at = Column(DateTime)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint('full_tract_id', 'acs_year', name='uix_acs_tract_year'),
+    )
+
+
+class GeocodeCache(Base):
+    """
+    Persistent geocode cache keyed by quantized lat/lon.
+    found=False rows are negative entries (water, out of state).
+    """
+    __tablename__ = "geocode_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    # Quantized "lat,lon" key (e.g. "40.7128,-74.0060")
+    quant_key = Column(String(32), unique=True, nullable=False, index=True)
+
+    found = Column(Boolean, nullable=False, default=True)
+    fips_json = Column(JSON)  # {state, county, tract, block, full_tract_id, full_block_id}
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
+class TrendsCache(Base):
+    """
+    Persistent Google Trends result cache keyed by keywords + geo + timeframe.
+    Rows are served fresh until fresh_until and stale (while a refresh runs)
+    until stale_until.
+    """
+    __tablename__ = "trends_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    # "<keyword1,keyword2,...>|<geo>|<timeframe>" (lowercased)
+    cache_key = Column(String(512), unique=True, nullable=False, index=True)
+    keywords = Column(JSON, nullable=False)
+    geo = Column(String(16), nullable=False)
+    timeframe = Column(String(32), nullable=False)
+
+    payload = Column(JSON, nullable=False)  # Successful get_business_trends() result
+
+    fetched_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    fresh_until = Column(DateTime, nullable=False)
+    stale_until = Column(DateTime, nullable=False, index=True)
+
+
+class TrendsTimeSeries(Base):
+    """
+    Daily Google Trends interest per keyword and geo (trends_timeseries.py).
+    Values from successive fetches are rescaled onto the stored series via the
+    overlapping days, so the table holds one continuous, comparable history.
+    """
+    __tablename__ = "trends_timeseries"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    keyword = Column(String(128), nullable=False, index=True)
+    geo = Column(String(16), nullable=False)
+    date = Column(Date, nullable=False)
+    value = Column(Float, nullable=False)
+    is_partial = Column(Boolean, default=False)  # Current day, overwritten by the next fetch
+
+    fetched_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint('keyword', 'geo', 'date', name='uix_trends_keyword_geo_date'),
+    )
+
+
 class BusinessSurvival(Base):
     """
     Tabelă pentru Business Survival Rates - NY BDS 2017-2022
@@ -278,9 +424,50 @@ class SimulationMonthlyState(Base):
     )
 
 
+# Coloane adăugate după crearea inițială a tabelelor (create_all nu modifică tabele existente)
+SCHEMA_UPGRADES = [
+    ("area_overview", "analysis_key", "VARCHAR(32)"),
+    ("area_overview", "census_payload", "TEXT"),
+    ("area_overview_alias", "latitude", "DOUBLE PRECISION"),
+    ("area_overview_alias", "longitude", "DOUBLE PRECISION"),
+    ("area_overview_alias", "block_fips", "VARCHAR(4)"),
+    ("acs_tract_data", "poverty_rate", "DOUBLE PRECISION"),
+    ("acs_tract_data", "high_income_households_rate", "DOUBLE PRECISION"),
+    ("acs_tract_data", "high_income_count", "INTEGER"),
+    ("acs_tract_data", "bachelor_plus_rate", "DOUBLE PRECISION"),
+    ("acs_tract_data", "bachelor_plus_count", "INTEGER"),
+    ("acs_tract_data", "renter_rate", "DOUBLE PRECISION"),
+    ("acs_tract_data", "work_from_home_rate", "DOUBLE PRECISION"),
+    ("acs_tract_data", "stats_computed_at", "TIMESTAMP"),
+]
+
+
+# Indexuri unice declarate pe modele după crearea tabelelor (aceleași nume ca în migrate_dedupe_areas.py)
+SCHEMA_INDEXES = [
+    ("uix_area_overview_analysis_key", "area_overview", "analysis_key"),
+    ("uix_detailed_area_year", "detailed_area_analysis", "area_overview_id, analysis_year"),
+]
+
+
+def ensure_schema_upgrades():
+    """Add columns and unique indexes introduced after a table was first created (idempotent)."""
+    with engine.begin() as conn:
+        for table, column, ddl_type in SCHEMA_UPGRADES:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} {ddl_type}"))
+
+    for name, table, columns in SCHEMA_INDEXES:
+        try:
+            with engine.begin() as conn:
+                conn.execute(text(f"CREATE UNIQUE INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
+        except Exception as e:
+            # Tabelă veche cu duplicate: indexul se creează după deduplicare
+            print(f"⚠️ Index unic {name} lipsă (rulează migrate_dedupe_areas.py): {e}")
+
+
 def init_db():
     """Initialize database tables"""
     Base.metadata.create_all(bind=engine)
+    ensure_schema_upgrades()
 
 def get_db():
     """Dependency for FastAPI to get database session"""
@@ -289,3 +476,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    """Dependency for FastAPI to get an async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
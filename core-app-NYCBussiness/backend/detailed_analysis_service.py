@@ -1,8 +1,16 @@
 import requests
+import httpx
+import copy
 import json
 import os
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from dotenv import load_dotenv
+from sqlalchemy import select
+from database import SessionLocal, AsyncSessionLocal, AcsTractData
+from acs_statistics import derived_statistics_from_record
+from geocoding_service import parse_coordinates, resolve_fips
+from http_client import http_get, async_http_client
+from singleflight import SingleFlight
 
 load_dotenv()
 
@@ -33,158 +41,204 @@ ACS_VARIABLES = {
 
 ACS_YEAR = "2021"
 
+# Un singur fetch ACS per tract pentru cererile concurente
+acs_flight = SingleFlight("acs_tract")
+
 
 def get_full_geocoding(lat: str, lon: str) -> Optional[Dict[str, str]]:
     """Convertește coordonatele în FIPS codes (State, County, Tract, Block)."""
     
     print(f"--- DETAILED ANALYSIS: Geocoding {lat}, {lon} ---")
-    url = (
-        f"https://geocoding.geo.census.gov/geocoder/geographies/coordinates"
-        f"?x={lon}&y={lat}"
-        f"&benchmark=Public_AR_Current"
-        f"&vintage=Current_Current"
-        f"&format=json"
-    )
+
+    point = parse_coordinates(lat, lon)
+    if point is None:
+        print(f"Coordonate invalide: {lat!r}, {lon!r}")
+        return None
+
+    fips = resolve_fips(*point)
+    if not fips or not fips.get("block"):
+        print("Eroare: Nu s-au găsit Census Tract sau Block pentru aceste coordonate.")
+        return None
+
+    print(f"Zonă Găsită (FIPS):")
+    print(f"  State:  {fips['state']}")
+    print(f"  County: {fips['county']}")
+    print(f"  Tract:  {fips['tract']}")
+    print(f"  Block:  {fips['block']}\n")
+    return fips
+
+
+ACS_API_URL = "https://api.census.gov/data/{year}/acs/acs5"
+
+
+def build_acs_profile(
+    fips: Dict[str, str],
+    raw: Dict[str, Any],
+    year: str = ACS_YEAR,
+    derived_statistics: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Construiește profilul structurat (demographics_detailed + derived_statistics) din valorile ACS brute.
+    Dacă `derived_statistics` este dat (pre-calculat de acs_statistics.py), nu se mai recalculează.
+    """
+
+    # Convertim rezultatele într-un format structurat
+    result = {
+        "fips_codes": fips,
+        "area_name": raw.get("NAME", "N/A"),
+        "year": year,
+        "demographics_detailed": {}
+    }
+    
+    # Procesăm fiecare variabilă
+    for code, name in ACS_VARIABLES.items():
+        value = raw.get(code, None)
+        result["demographics_detailed"][code] = {
+            "value": value,
+            "label": name
+        }
+    
+    if derived_statistics is not None:
+        result["derived_statistics"] = derived_statistics
+        return result
     
+    # Calculăm procente și statistici derivate
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
+        total_pop = int(raw.get('B01003_001E', 0))
+        poverty_pop = int(raw.get('B17001_002E', 0))
+        poverty_rate = (poverty_pop / total_pop * 100) if total_pop > 0 else 0
         
-        geographies = data.get('result', {}).get('geographies', {})
-        tracts = geographies.get('Census Tracts', []) 
-        blocks = geographies.get('2020 Census Blocks', []) 
+        total_households = int(raw.get('B19001_001E', 0))
+        high_income_hh = (
+            int(raw.get('B19001_013E', 0)) +
+            int(raw.get('B19001_014E', 0)) +
+            int(raw.get('B19001_015E', 0)) +
+            int(raw.get('B19001_016E', 0)) +
+            int(raw.get('B19001_017E', 0))
+        )
+        high_income_rate = (high_income_hh / total_households * 100) if total_households > 0 else 0
         
-        if not tracts or not blocks:
-            print("Eroare: Nu s-au găsit Census Tract sau Block pentru aceste coordonate.")
-            return None
-            
-        tract_info = tracts[0]
-        block_info = blocks[0]
+        total_edu = int(raw.get('B15003_001E', 0))
+        bachelor_plus = (
+            int(raw.get('B15003_022E', 0)) +
+            int(raw.get('B15003_023E', 0)) +
+            int(raw.get('B15003_025E', 0))
+        )
+        bachelor_plus_rate = (bachelor_plus / total_edu * 100) if total_edu > 0 else 0
         
-        fips = {
-            "state": tract_info.get('STATE'),
-            "county": tract_info.get('COUNTY'),
-            "tract": tract_info.get('TRACT'),
-            "block": block_info.get('BLOCK'),
-            "full_tract_id": f"{tract_info.get('STATE')}{tract_info.get('COUNTY')}{tract_info.get('TRACT')}",
-            "full_block_id": f"{block_info.get('STATE')}{block_info.get('COUNTY')}{block_info.get('TRACT')}{block_info.get('BLOCK')}",
-        }
+        total_housing = int(raw.get('B25003_001E', 0))
+        renter_housing = int(raw.get('B25003_003E', 0))
+        renter_rate = (renter_housing / total_housing * 100) if total_housing > 0 else 0
         
-        print(f"Zonă Găsită (FIPS):")
-        print(f"  State:  {fips['state']}")
-        print(f"  County: {fips['county']}")
-        print(f"  Tract:  {fips['tract']}")
-        print(f"  Block:  {fips['block']}\n")
-        return fips
+        total_workers = int(raw.get('B08301_001E', 0))
+        work_from_home = int(raw.get('B08301_021E', 0))
+        wfh_rate = (work_from_home / total_workers * 100) if total_workers > 0 else 0
         
-    except requests.exceptions.RequestException as e:
-        print(f"Eroare la interogarea API-ului Geocoding: {e}")
-        return None
+        result["derived_statistics"] = {
+            "poverty_rate": round(poverty_rate, 2),
+            "high_income_households_rate": round(high_income_rate, 2),
+            "bachelor_plus_rate": round(bachelor_plus_rate, 2),
+            "renter_rate": round(renter_rate, 2),
+            "work_from_home_rate": round(wfh_rate, 2),
+            "high_income_count": high_income_hh,
+            "bachelor_plus_count": bachelor_plus
+        }
+        
+    except Exception as e:
+        print(f"Eroare la calcularea statisticilor derivate: {e}")
+        result["derived_statistics"] = {}
+    
+    return result
 
 
-def get_acs_detailed_profile(fips: Dict[str, str], api_key: str, year: str = ACS_YEAR) -> Optional[Dict[str, Any]]:
-    """Interoghează API-ul Census (ACS) pentru profilul rezidențial detaliat al TRACT-ului."""
-    
-    print(f"--- Profil REZIDENȚIAL DETALIAT (ACS {year}) ---")
-    print(f"Nivel: Census Tract ({fips['full_tract_id']})\n")
+def get_acs_profile_from_db(fips: Dict[str, str], year: str = ACS_YEAR) -> Optional[Dict[str, Any]]:
+    """Citește profilul ACS din tabela locală acs_tract_data (populată de populate_acs_data.py)."""
 
-    if not api_key or api_key == "CHEIA_TA_CENSUS_AICI":
-        print("Interogare ACS omisă (API Key lipsește).")
+    db = SessionLocal()
+    try:
+        record = db.query(AcsTractData).filter(
+            AcsTractData.full_tract_id == fips['full_tract_id'],
+            AcsTractData.acs_year == year
+        ).first()
+
+        if not record:
+            print(f"Nu există date ACS locale pentru tract {fips['full_tract_id']} ({year}).")
+            return None
+
+        return build_acs_profile(fips, record.acs_values, year, derived_statistics_from_record(record))
+
+    except Exception as e:
+        print(f"❌ Eroare la interogarea tabelei ACS locale: {e}")
         return None
+    finally:
+        db.close()
 
+
+def fetch_acs_county_tracts(state: str, county: str, api_key: str, year: str = ACS_YEAR) -> List[Dict[str, Any]]:
+    """
+    Descarcă toate ACS_VARIABLES pentru TOATE tract-urile unui county într-un singur apel (for=tract:*).
+    Returnează o listă de dict-uri {cod_variabilă: valoare, "state", "county", "tract"}.
+    """
     variables_to_get = ",".join(ACS_VARIABLES.keys())
-    
+
     url = (
-        f"https://api.census.gov/data/{year}/acs/acs5" 
+        f"{ACS_API_URL.format(year=year)}"
+        f"?get={variables_to_get}"
+        f"&for=tract:*"
+        f"&in=state:{state}+county:{county}"
+        f"&key={api_key}"
+    )
+
+    response = http_get(url)
+    response.raise_for_status()
+    data = response.json()
+
+    if not data or len(data) < 2:
+        return []
+
+    headers = data[0]
+    return [dict(zip(headers, values)) for values in data[1:]]
+
+
+def _acs_tract_url(fips: Dict[str, str], api_key: str, year: str) -> str:
+    variables_to_get = ",".join(ACS_VARIABLES.keys())
+    return (
+        f"{ACS_API_URL.format(year=year)}"
         f"?get={variables_to_get}"
         f"&for=tract:{fips['tract']}"
         f"&in=state:{fips['state']}+county:{fips['county']}"
         f"&key={api_key}"
     )
-    
+
+
+def _parse_acs_tract_response(fips: Dict[str, str], data: List[List[str]], year: str) -> Optional[Dict[str, Any]]:
+    if not data or len(data) < 2:
+        print("Nu s-au găsit date ACS pentru acest tract.")
+        return None
+
+    headers = data[0]
+    values = data[1]
+    raw = dict(zip(headers, values))
+
+    return build_acs_profile(fips, raw, year)
+
+
+def fetch_acs_tract_profile(fips: Dict[str, str], api_key: str, year: str = ACS_YEAR) -> Optional[Dict[str, Any]]:
+    """Interoghează API-ul Census (ACS) pentru un singur tract (fallback când tabela locală nu are date)."""
+
+    if not api_key or api_key == "CHEIA_TA_CENSUS_AICI":
+        print("Interogare ACS omisă (API Key lipsește).")
+        return None
+
     response = None
     try:
-        response = requests.get(url)
+        response = http_get(_acs_tract_url(fips, api_key, year))
         response.raise_for_status()
-        data = response.json()
-        
-        if not data or len(data) < 2:
-            print("Nu s-au găsit date ACS pentru acest tract.")
-            return None
-
-        headers = data[0]
-        values = data[1]
-        raw = dict(zip(headers, values))
-
-        # Convertim rezultatele într-un format structurat
-        result = {
-            "fips_codes": fips,
-            "area_name": raw.get("NAME", "N/A"),
-            "year": year,
-            "demographics_detailed": {}
-        }
-        
-        # Procesăm fiecare variabilă
-        for code, name in ACS_VARIABLES.items():
-            value = raw.get(code, None)
-            result["demographics_detailed"][code] = {
-                "value": value,
-                "label": name
-            }
-        
-        # Calculăm procente și statistici derivate
-        try:
-            total_pop = int(raw.get('B01003_001E', 0))
-            poverty_pop = int(raw.get('B17001_002E', 0))
-            poverty_rate = (poverty_pop / total_pop * 100) if total_pop > 0 else 0
-            
-            total_households = int(raw.get('B19001_001E', 0))
-            high_income_hh = (
-                int(raw.get('B19001_013E', 0)) +
-                int(raw.get('B19001_014E', 0)) +
-                int(raw.get('B19001_015E', 0)) +
-                int(raw.get('B19001_016E', 0)) +
-                int(raw.get('B19001_017E', 0))
-            )
-            high_income_rate = (high_income_hh / total_households * 100) if total_households > 0 else 0
-            
-            total_edu = int(raw.get('B15003_001E', 0))
-            bachelor_plus = (
-                int(raw.get('B15003_022E', 0)) +
-                int(raw.get('B15003_023E', 0)) +
-                int(raw.get('B15003_025E', 0))
-            )
-            bachelor_plus_rate = (bachelor_plus / total_edu * 100) if total_edu > 0 else 0
-            
-            total_housing = int(raw.get('B25003_001E', 0))
-            renter_housing = int(raw.get('B25003_003E', 0))
-            renter_rate = (renter_housing / total_housing * 100) if total_housing > 0 else 0
-            
-            total_workers = int(raw.get('B08301_001E', 0))
-            work_from_home = int(raw.get('B08301_021E', 0))
-            wfh_rate = (work_from_home / total_workers * 100) if total_workers > 0 else 0
-            
-            result["derived_statistics"] = {
-                "poverty_rate": round(poverty_rate, 2),
-                "high_income_households_rate": round(high_income_rate, 2),
-                "bachelor_plus_rate": round(bachelor_plus_rate, 2),
-                "renter_rate": round(renter_rate, 2),
-                "work_from_home_rate": round(wfh_rate, 2),
-                "high_income_count": high_income_hh,
-                "bachelor_plus_count": bachelor_plus
-            }
-            
-        except Exception as e:
-            print(f"Eroare la calcularea statisticilor derivate: {e}")
-            result["derived_statistics"] = {}
-        
-        print("✓ Date ACS detaliate obținute cu succes")
-        return result
+        return _parse_acs_tract_response(fips, response.json(), year)
         
     except requests.exceptions.RequestException as e:
         print(f"Eroare HTTP la interogarea ACS API: {e}")
-        if response:
+        if response is not None:
             print(f"Răspuns Server (Text): {response.text}")
         return None
     except Exception as e:
@@ -192,25 +246,55 @@ def get_acs_detailed_profile(fips: Dict[str, str], api_key: str, year: str = ACS
         return None
 
 
-def analyze_area_detailed(lat: str, lon: str) -> Optional[Dict[str, Any]]:
-    """Funcție principală care face analiza detaliată a zonei (similar cu app4.py)."""
+def get_acs_detailed_profile(fips: Dict[str, str], api_key: Optional[str] = None, year: str = ACS_YEAR) -> Optional[Dict[str, Any]]:
+    """
+    Profilul rezidențial detaliat al TRACT-ului.
+    MODIFICAT: Citește din tabela locală acs_tract_data; API-ul ACS este apelat
+    doar pentru tract-urile care lipsesc și doar dacă există CENSUS_API_KEY.
+    """
     
+    print(f"--- Profil REZIDENȚIAL DETALIAT (ACS {year}) ---")
+    print(f"Nivel: Census Tract ({fips['full_tract_id']})\n")
+
+    result = get_acs_profile_from_db(fips, year)
+    if result:
+        print("✓ Date ACS detaliate obținute din baza de date locală")
+        return result
+
+    result = fetch_acs_tract_profile(fips, api_key, year)
+    if result:
+        print("✓ Date ACS detaliate obținute cu succes")
+    return result
+
+
+def analyze_area_detailed(lat: str, lon: str, fips: Optional[Dict[str, str]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Funcție principală care face analiza detaliată a zonei (similar cu app4.py).
+    Dacă `fips` este dat (rezolvat o singură dată de launch_business), geocodarea este omisă.
+    """
+    
+    # Cheia API este necesară doar pentru fallback-ul la API-ul ACS (tract lipsă din tabela locală)
     api_key = os.getenv('CENSUS_API_KEY')
     
     print(f"*** Începere analiză ultra-locală pentru ({lat}, {lon}) ***")
     
-    if not api_key or api_key == "CHEIA_TA_CENSUS_AICI":
-        print("EROARE: Cheie CENSUS_API_KEY lipsește.")
-        return None
-    
-    fips_codes = get_full_geocoding(lat, lon)
+    if fips:
+        fips_codes = fips if fips.get("block") else None
+    else:
+        fips_codes = get_full_geocoding(lat, lon)
     
     if not fips_codes:
         return None
     
-    acs_data = get_acs_detailed_profile(fips_codes, api_key, ACS_YEAR)
+    acs_data = acs_flight.do(
+        (fips_codes["full_tract_id"], ACS_YEAR),
+        get_acs_detailed_profile, fips_codes, api_key, ACS_YEAR
+    )
     
     if acs_data:
+        # Copie profundă: rezultatul (inclusiv dicționarele interne) este partajat între cererile coalescate (block-ul poate diferi)
+        acs_data = copy.deepcopy(acs_data)
+        acs_data["fips_codes"] = fips_codes
         # Adăugăm coordonatele originale
         acs_data["latitude"] = float(lat)
         acs_data["longitude"] = float(lon)
@@ -218,3 +302,90 @@ def analyze_area_detailed(lat: str, lon: str) -> Optional[Dict[str, Any]]:
         
     print("*** Analiză detaliată finalizată ***\n")
     return acs_data
+
+
+# ========================================
+# ASYNC PIPELINE (launch_business)
+# ========================================
+
+async def get_acs_profile_from_db_async(fips: Dict[str, str], year: str = ACS_YEAR) -> Optional[Dict[str, Any]]:
+    """Varianta async a get_acs_profile_from_db()."""
+
+    try:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(AcsTractData).where(
+                    AcsTractData.full_tract_id == fips['full_tract_id'],
+                    AcsTractData.acs_year == year
+                )
+            )
+            record = result.scalars().first()
+    except Exception as e:
+        print(f"❌ Eroare la interogarea tabelei ACS locale: {e}")
+        return None
+
+    if not record:
+        print(f"Nu există date ACS locale pentru tract {fips['full_tract_id']} ({year}).")
+        return None
+
+    return build_acs_profile(fips, record.acs_values, year, derived_statistics_from_record(record))
+
+
+async def fetch_acs_tract_profile_async(fips: Dict[str, str], api_key: str, year: str = ACS_YEAR) -> Optional[Dict[str, Any]]:
+    """Varianta async a fetch_acs_tract_profile() pe clientul httpx partajat."""
+
+    if not api_key or api_key == "CHEIA_TA_CENSUS_AICI":
+        print("Interogare ACS omisă (API Key lipsește).")
+        return None
+
+    response = None
+    try:
+        response = await async_http_client.get(_acs_tract_url(fips, api_key, year))
+        response.raise_for_status()
+        return _parse_acs_tract_response(fips, response.json(), year)
+
+    except httpx.HTTPError as e:
+        print(f"Eroare HTTP la interogarea ACS API: {e}")
+        if response is not None:
+            print(f"Răspuns Server (Text): {response.text}")
+        return None
+    except Exception as e:
+        print(f"Eroare la parsarea datelor ACS: {e}")
+        return None
+
+
+async def get_acs_detailed_profile_async(fips: Dict[str, str], api_key: Optional[str] = None, year: str = ACS_YEAR) -> Optional[Dict[str, Any]]:
+    """Tabela locală acs_tract_data întâi, API-ul ACS doar pentru tract-urile lipsă."""
+
+    result = await get_acs_profile_from_db_async(fips, year)
+    if result:
+        return result
+
+    return await fetch_acs_tract_profile_async(fips, api_key, year)
+
+
+async def analyze_area_detailed_async(lat: str, lon: str, fips: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    """
+    Varianta async a analyze_area_detailed() pentru pipeline-ul async din launch_business.
+    `fips` este rezolvat în prealabil de resolve_fips_async().
+    """
+
+    fips_codes = fips if fips.get("block") else None
+    if not fips_codes:
+        return None
+
+    api_key = os.getenv('CENSUS_API_KEY')
+    acs_data = await acs_flight.do_async(
+        (fips_codes["full_tract_id"], ACS_YEAR),
+        get_acs_detailed_profile_async, fips_codes, api_key, ACS_YEAR
+    )
+
+    if acs_data:
+        # Copie profundă: rezultatul (inclusiv dicționarele interne) este partajat între cererile coalescate (block-ul poate diferi)
+        acs_data = copy.deepcopy(acs_data)
+        acs_data["fips_codes"] = fips_codes
+        acs_data["latitude"] = float(lat)
+        acs_data["longitude"] = float(lon)
+        acs_data["analysis_type"] = "detailed_residential_profile"
+
+    return acs_data
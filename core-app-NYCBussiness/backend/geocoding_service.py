@@ -0,0 +1,597 @@
+"""
+Local Geocoding Service
+
+Resolves (lat, lon) to NY state/county/tract/block FIPS codes in-process,
+without calling geocoding.geo.census.gov.
+
+Tract and block polygons are loaded once from local GeoJSON boundary files
+(TIGER/Line 2020 tracts and tabulation blocks for New York, converted to
+GeoJSON) into a uniform grid index. A lookup is a grid cell read, a bounding
+box check on a handful of candidates and a point-in-polygon test.
+
+Files (override with env vars), built by build_ny_boundaries.py from the
+Census TIGER/Line shapefiles:
+- NY_TRACTS_GEOJSON: default ny_tracts_2020.geojson next to this module
+- NY_BLOCKS_GEOJSON: default ny_blocks_2020.geojson next to this module
+
+resolve_fips() (resolve_fips_async() on the async pipeline) is the single
+entry point used per request: an in-memory LRU and the geocode_cache table
+(keyed by quantized lat/lon) sit in front of the local geocoder and the
+Census geocoding API fallback.
+"""
+
+import asyncio
+import json
+import math
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+import requests
+from sqlalchemy import select
+
+from database import SessionLocal, AsyncSessionLocal, GeocodeCache
+from ttl_cache import TTLCache, MISSING
+from singleflight import SingleFlight
+from http_client import http_get, async_http_client
+
+_BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+TRACTS_GEOJSON_PATH = os.getenv(
+    "NY_TRACTS_GEOJSON", os.path.join(_BASE_DIR, "ny_tracts_2020.geojson")
+)
+BLOCKS_GEOJSON_PATH = os.getenv(
+    "NY_BLOCKS_GEOJSON", os.path.join(_BASE_DIR, "ny_blocks_2020.geojson")
+)
+
+# New York State bounding box (lat/lon, slightly padded)
+NY_MIN_LAT, NY_MAX_LAT = 40.47, 45.02
+NY_MIN_LON, NY_MAX_LON = -79.77, -71.75
+
+NY_STATE_FIPS = "36"
+
+# Grid cell size in degrees (~1 km at NY latitudes)
+GRID_CELL_DEG = 0.01
+
+# Geocode cache tuning
+GEOCODE_CACHE_PRECISION = int(os.getenv("GEOCODE_CACHE_PRECISION", "4"))  # 4 decimals ~ 11 m
+GEOCODE_CACHE_TTL_SECONDS = int(os.getenv("GEOCODE_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+GEOCODE_NEGATIVE_TTL_SECONDS = int(os.getenv("GEOCODE_NEGATIVE_TTL_SECONDS", str(24 * 3600)))
+GEOCODE_CACHE_MAXSIZE = int(os.getenv("GEOCODE_CACHE_MAXSIZE", "10000"))
+
+CENSUS_GEOCODER_URL = "https://geocoding.geo.census.gov/geocoder/geographies/coordinates"
+
+
+def parse_coordinates(lat: Any, lon: Any) -> Optional[Tuple[float, float]]:
+    """(lat, lon) as finite floats, or None for malformed input ("abc", None, "nan")."""
+    try:
+        point = float(lat), float(lon)
+    except (TypeError, ValueError):
+        return None
+    return point if all(math.isfinite(v) for v in point) else None
+
+
+def is_inside_ny_bbox(lat: float, lon: float) -> bool:
+    """Cheap pre-check: is the point inside the NY bounding box?"""
+    return NY_MIN_LAT <= lat <= NY_MAX_LAT and NY_MIN_LON <= lon <= NY_MAX_LON
+
+
+def _point_in_rings(x: float, y: float, rings: List[Tuple[float, ...]]) -> bool:
+    """
+    Even-odd ray casting over all rings of one polygon (exterior + holes).
+    Each ring is a flat tuple (x0, y0, x1, y1, ...).
+    """
+    inside = False
+    for ring in rings:
+        n = len(ring)
+        x1, y1 = ring[n - 2], ring[n - 1]
+        for i in range(0, n, 2):
+            x2, y2 = ring[i], ring[i + 1]
+            if (y2 > y) != (y1 > y):
+                x_cross = (x1 - x2) * (y - y2) / (y1 - y2) + x2
+                if x < x_cross:
+                    inside = not inside
+            x1, y1 = x2, y2
+    return inside
+
+
+class _Shape:
+    """One boundary feature: FIPS attributes, bounding box and polygon rings."""
+
+    __slots__ = ("attrs", "min_x", "min_y", "max_x", "max_y", "polygons")
+
+    def __init__(self, attrs: Dict[str, str], polygons: List[List[Tuple[float, ...]]]):
+        self.attrs = attrs
+        self.polygons = polygons
+
+        xs = [ring[i] for poly in polygons for ring in poly for i in range(0, len(ring), 2)]
+        ys = [ring[i] for poly in polygons for ring in poly for i in range(1, len(ring), 2)]
+        self.min_x, self.max_x = min(xs), max(xs)
+        self.min_y, self.max_y = min(ys), max(ys)
+
+    def contains(self, x: float, y: float) -> bool:
+        if x < self.min_x or x > self.max_x or y < self.min_y or y > self.max_y:
+            return False
+        return any(_point_in_rings(x, y, rings) for rings in self.polygons)
+
+
+class GridIndex:
+    """Uniform grid spatial index: cell -> shapes whose bbox overlaps the cell."""
+
+    def __init__(self, cell_deg: float = GRID_CELL_DEG):
+        self.cell_deg = cell_deg
+        self.cells: Dict[Tuple[int, int], List[_Shape]] = {}
+        self.size = 0
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        return int(x // self.cell_deg), int(y // self.cell_deg)
+
+    def insert(self, shape: _Shape) -> None:
+        cx0, cy0 = self._cell(shape.min_x, shape.min_y)
+        cx1, cy1 = self._cell(shape.max_x, shape.max_y)
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                self.cells.setdefault((cx, cy), []).append(shape)
+        self.size += 1
+
+    def query(self, x: float, y: float, prefix: Optional[str] = None) -> Optional[_Shape]:
+        """Return the first shape containing (x, y), optionally limited to a GEOID prefix."""
+        for shape in self.cells.get(self._cell(x, y), ()):
+            if prefix and not shape.attrs["geoid"].startswith(prefix):
+                continue
+            if shape.contains(x, y):
+                return shape
+        return None
+
+
+def _first(props: Dict, *keys: str) -> Optional[str]:
+    for key in keys:
+        if props.get(key) is not None:
+            return str(props[key])
+    return None
+
+
+def _feature_polygons(geometry: Dict) -> List[List[Tuple[float, ...]]]:
+    """Convert a GeoJSON Polygon/MultiPolygon into lists of flat rings."""
+    if not geometry:
+        return []
+    if geometry.get("type") == "Polygon":
+        polygons = [geometry["coordinates"]]
+    elif geometry.get("type") == "MultiPolygon":
+        polygons = geometry["coordinates"]
+    else:
+        return []
+    return [
+        [tuple(c for point in ring for c in point[:2]) for ring in polygon if len(ring) >= 3]
+        for polygon in polygons
+    ]
+
+
+def _load_shapes(path: str, with_block: bool) -> Optional[GridIndex]:
+    """Load a TIGER GeoJSON file into a GridIndex. Returns None if the file is missing."""
+    if not os.path.exists(path):
+        print(f"⚠️  Fișierul de limite nu există: {path} (vezi build_ny_boundaries.py)")
+        return None
+
+    print(f"🗺️  Încărcare limite din {path}...")
+    with open(path, "r", encoding="utf-8") as f:
+        collection = json.load(f)
+
+    index = GridIndex()
+    for feature in collection.get("features", []):
+        props = feature.get("properties", {})
+        attrs = {
+            "state": _first(props, "STATEFP20", "STATEFP"),
+            "county": _first(props, "COUNTYFP20", "COUNTYFP"),
+            "tract": _first(props, "TRACTCE20", "TRACTCE"),
+        }
+        if with_block:
+            attrs["block"] = _first(props, "BLOCKCE20", "BLOCKCE")
+
+        if not all(attrs.values()) or attrs["state"] != NY_STATE_FIPS:
+            continue
+        attrs["geoid"] = "".join(attrs[k] for k in ("state", "county", "tract", "block") if k in attrs)
+
+        polygons = _feature_polygons(feature.get("geometry"))
+        if polygons:
+            index.insert(_Shape(attrs, polygons))
+
+    print(f"✅ {index.size} forme încărcate în indexul grid ({len(index.cells)} celule)")
+    return index
+
+
+class LocalGeocoder:
+    """
+    In-process point-in-tract/block geocoder for New York.
+
+    Boundary files are loaded lazily on first use. If a file is missing the
+    geocoder reports itself unavailable and callers fall back to the Census API.
+    """
+
+    def __init__(self, tracts_path: str = TRACTS_GEOJSON_PATH, blocks_path: str = BLOCKS_GEOJSON_PATH):
+        self.tracts_path = tracts_path
+        self.blocks_path = blocks_path
+        self._tracts: Optional[GridIndex] = None
+        self._blocks: Optional[GridIndex] = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def ensure_loaded(self) -> None:
+        """Parse the boundary files once (blocking; async callers run it in an executor)."""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            try:
+                self._tracts = _load_shapes(self.tracts_path, with_block=False)
+                self._blocks = _load_shapes(self.blocks_path, with_block=True)
+            except Exception as e:
+                print(f"❌ Eroare la încărcarea fișierelor de limite: {e}")
+                self._tracts = self._blocks = None
+            self._loaded = True
+
+    def has_tracts(self) -> bool:
+        self.ensure_loaded()
+        return self._tracts is not None
+
+    def has_blocks(self) -> bool:
+        self.ensure_loaded()
+        return self._blocks is not None
+
+    def lookup_tract(self, lat: float, lon: float) -> Optional[Dict[str, str]]:
+        """Return {state, county, tract} or None if no tract contains the point."""
+        if not is_inside_ny_bbox(lat, lon):
+            return None
+        self.ensure_loaded()
+
+        shape = None
+        if self._tracts is not None:
+            shape = self._tracts.query(lon, lat)
+        elif self._blocks is not None:
+            shape = self._blocks.query(lon, lat)
+        if not shape:
+            return None
+
+        return {
+            "state": shape.attrs["state"],
+            "county": shape.attrs["county"],
+            "tract": shape.attrs["tract"],
+        }
+
+    def lookup_block(self, lat: float, lon: float) -> Optional[Dict[str, str]]:
+        """Return full FIPS (state, county, tract, block + full ids) or None."""
+        if not is_inside_ny_bbox(lat, lon):
+            return None
+        self.ensure_loaded()
+        if self._blocks is None:
+            return None
+
+        # Narrow the block search to the containing tract when tracts are loaded
+        prefix = None
+        if self._tracts is not None:
+            tract = self._tracts.query(lon, lat)
+            if not tract:
+                return None
+            prefix = tract.attrs["geoid"]
+
+        shape = self._blocks.query(lon, lat, prefix=prefix)
+        if not shape:
+            return None
+
+        attrs = shape.attrs
+        full_tract_id = f"{attrs['state']}{attrs['county']}{attrs['tract']}"
+        return {
+            "state": attrs["state"],
+            "county": attrs["county"],
+            "tract": attrs["tract"],
+            "block": attrs["block"],
+            "full_tract_id": full_tract_id,
+            "full_block_id": f"{full_tract_id}{attrs['block']}",
+        }
+
+
+# Shared geocoder instance used by census_service and detailed_analysis_service
+local_geocoder = LocalGeocoder()
+
+
+# ========================================
+# GEOCODE CACHE (memory LRU + Postgres)
+# ========================================
+
+_memory_cache = TTLCache(maxsize=GEOCODE_CACHE_MAXSIZE, ttl=GEOCODE_CACHE_TTL_SECONDS)
+
+# Concurrent misses for the same quantized point share one upstream resolution
+geocode_flight = SingleFlight("geocode")
+
+_stats_lock = threading.Lock()
+_stats = {
+    "memory_hits": 0,
+    "db_hits": 0,
+    "negative_hits": 0,
+    "local_resolves": 0,
+    "remote_resolves": 0,
+    "misses": 0,
+}
+
+
+def _count(name: str) -> None:
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def quantize_key(lat: float, lon: float) -> str:
+    """Round coordinates to GEOCODE_CACHE_PRECISION decimals to form the cache key."""
+    return f"{lat:.{GEOCODE_CACHE_PRECISION}f},{lon:.{GEOCODE_CACHE_PRECISION}f}"
+
+
+def _geocoder_url(lat: float, lon: float) -> str:
+    return (
+        f"{CENSUS_GEOCODER_URL}"
+        f"?x={lon}&y={lat}"
+        f"&benchmark=Public_AR_Current"
+        f"&vintage=Current_Current"
+        f"&format=json"
+    )
+
+
+def _parse_geocoder_response(data: Dict[str, Any]) -> Optional[Dict[str, str]]:
+    geographies = data.get('result', {}).get('geographies', {})
+    tracts = geographies.get('Census Tracts', [])
+    blocks = geographies.get('2020 Census Blocks', [])
+
+    if not tracts:
+        return None
+
+    tract_info = tracts[0]
+    block_info = blocks[0] if blocks else {}
+    full_tract_id = f"{tract_info.get('STATE')}{tract_info.get('COUNTY')}{tract_info.get('TRACT')}"
+
+    return {
+        "state": tract_info.get('STATE'),
+        "county": tract_info.get('COUNTY'),
+        "tract": tract_info.get('TRACT'),
+        "block": block_info.get('BLOCK'),
+        "full_tract_id": full_tract_id,
+        "full_block_id": f"{full_tract_id}{block_info.get('BLOCK')}" if block_info else None,
+    }
+
+
+def fetch_remote_geocoding(lat: float, lon: float) -> Any:
+    """
+    Ask geocoding.geo.census.gov for tract + block FIPS.
+    Returns the FIPS dict, None if the point has no tract, or MISSING on network errors
+    (so transient failures are never negatively cached).
+    """
+    try:
+        response = http_get(_geocoder_url(lat, lon))
+        response.raise_for_status()
+        data = response.json()
+    except (requests.exceptions.RequestException, ValueError) as e:
+        print(f"Eroare la interogarea API-ului Geocoding: {e}")
+        return MISSING
+
+    return _parse_geocoder_response(data)
+
+
+async def fetch_remote_geocoding_async(lat: float, lon: float) -> Any:
+    """Async variant of fetch_remote_geocoding() on the shared httpx client."""
+    try:
+        response = await async_http_client.get(_geocoder_url(lat, lon))
+        response.raise_for_status()
+        data = response.json()
+    except (httpx.HTTPError, ValueError) as e:
+        print(f"Eroare la interogarea API-ului Geocoding: {e}")
+        return MISSING
+
+    return _parse_geocoder_response(data)
+
+
+def _resolve_local(lat: float, lon: float) -> Any:
+    """Local geocoder lookup; MISSING when no boundary files are available."""
+    if local_geocoder.has_blocks():
+        _count("local_resolves")
+        return local_geocoder.lookup_block(lat, lon)
+
+    if local_geocoder.has_tracts():
+        _count("local_resolves")
+        fips = local_geocoder.lookup_tract(lat, lon)
+        if fips:
+            fips["full_tract_id"] = f"{fips['state']}{fips['county']}{fips['tract']}"
+            fips["block"] = None
+            fips["full_block_id"] = None
+        return fips
+
+    return MISSING
+
+
+def _resolve_uncached(lat: float, lon: float) -> Any:
+    """Local geocoder first, Census API only when boundary files are missing."""
+    fips = _resolve_local(lat, lon)
+    if fips is not MISSING:
+        return fips
+
+    _count("remote_resolves")
+    return fetch_remote_geocoding(lat, lon)
+
+
+def _db_get(key: str) -> Any:
+    db = SessionLocal()
+    try:
+        row = db.query(GeocodeCache).filter(GeocodeCache.quant_key == key).first()
+        return _fips_from_row(row)
+    except Exception as e:
+        print(f"⚠️  Citirea din cache-ul de geocodare a eșuat: {e}")
+        return MISSING
+    finally:
+        db.close()
+
+
+def _db_put(key: str, fips: Optional[Dict[str, str]], ttl: int) -> None:
+    db = SessionLocal()
+    try:
+        row = db.query(GeocodeCache).filter(GeocodeCache.quant_key == key).first()
+        if not row:
+            row = GeocodeCache(quant_key=key)
+            db.add(row)
+        row.found = fips is not None
+        row.fips_json = fips
+        row.expires_at = datetime.utcnow() + timedelta(seconds=ttl)
+        db.commit()
+    except Exception as e:
+        # Unique violation from a concurrent writer or missing table - cache is best effort
+        db.rollback()
+        print(f"⚠️  Scrierea în cache-ul de geocodare a eșuat: {e}")
+    finally:
+        db.close()
+
+
+def resolve_fips(lat: float, lon: float) -> Optional[Dict[str, str]]:
+    """
+    Resolve coordinates to full FIPS codes once per request.
+
+    Returns {state, county, tract, block, full_tract_id, full_block_id} or None
+    when the point has no tract (water, out of state). Both positive and
+    negative answers are cached in memory and in Postgres.
+    """
+    if not is_inside_ny_bbox(lat, lon):
+        return None
+
+    key = quantize_key(lat, lon)
+
+    fips = _cached_fips(key)
+    if fips is not MISSING:
+        return dict(fips) if fips else None
+
+    fips = _db_get(key)
+    if fips is not MISSING:
+        _count("db_hits")
+        if fips is None:
+            _count("negative_hits")
+        ttl = GEOCODE_CACHE_TTL_SECONDS if fips else GEOCODE_NEGATIVE_TTL_SECONDS
+        _memory_cache.set(key, fips, ttl=ttl)
+        return dict(fips) if fips else None
+
+    _count("misses")
+    fips = geocode_flight.do(key, _resolve_and_store, key, lat, lon)
+    return dict(fips) if fips else None
+
+
+def _resolve_and_store(key: str, lat: float, lon: float) -> Optional[Dict[str, str]]:
+    fips = _resolve_uncached(lat, lon)
+    if fips is MISSING:
+        return None
+
+    ttl = GEOCODE_CACHE_TTL_SECONDS if fips else GEOCODE_NEGATIVE_TTL_SECONDS
+    _memory_cache.set(key, fips, ttl=ttl)
+    _db_put(key, fips, ttl)
+    return fips
+
+
+def _cached_fips(key: str) -> Any:
+    fips = _memory_cache.get(key)
+    if fips is not MISSING:
+        _count("memory_hits")
+        if fips is None:
+            _count("negative_hits")
+    return fips
+
+
+def _fips_from_row(row: Optional[GeocodeCache]) -> Any:
+    if not row or row.expires_at < datetime.utcnow():
+        return MISSING
+    return row.fips_json if row.found else None
+
+
+async def _db_get_async(key: str) -> Any:
+    try:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(GeocodeCache).where(GeocodeCache.quant_key == key))
+            return _fips_from_row(result.scalars().first())
+    except Exception as e:
+        print(f"⚠️  Citirea din cache-ul de geocodare a eșuat: {e}")
+        return MISSING
+
+
+async def _db_put_async(key: str, fips: Optional[Dict[str, str]], ttl: int) -> None:
+    try:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(GeocodeCache).where(GeocodeCache.quant_key == key))
+            row = result.scalars().first()
+            if not row:
+                row = GeocodeCache(quant_key=key)
+                db.add(row)
+            row.found = fips is not None
+            row.fips_json = fips
+            row.expires_at = datetime.utcnow() + timedelta(seconds=ttl)
+            await db.commit()
+    except Exception as e:
+        # Unique violation from a concurrent writer or missing table - cache is best effort
+        print(f"⚠️  Scrierea în cache-ul de geocodare a eșuat: {e}")
+
+
+async def _resolve_and_store_async(key: str, lat: float, lon: float) -> Optional[Dict[str, str]]:
+    if not local_geocoder.loaded:
+        # First use: parse the boundary files off the event loop
+        await asyncio.get_running_loop().run_in_executor(None, local_geocoder.ensure_loaded)
+
+    fips = _resolve_local(lat, lon)
+    if fips is MISSING:
+        _count("remote_resolves")
+        fips = await fetch_remote_geocoding_async(lat, lon)
+    if fips is MISSING:
+        return None
+
+    ttl = GEOCODE_CACHE_TTL_SECONDS if fips else GEOCODE_NEGATIVE_TTL_SECONDS
+    _memory_cache.set(key, fips, ttl=ttl)
+    await _db_put_async(key, fips, ttl)
+    return fips
+
+
+async def resolve_fips_async(lat: float, lon: float) -> Optional[Dict[str, str]]:
+    """
+    Async variant of resolve_fips() for the async request pipeline: same caches
+    and single-flight group, with the DB on the async engine and the Census
+    fallback on the shared httpx client.
+    """
+    if not is_inside_ny_bbox(lat, lon):
+        return None
+
+    key = quantize_key(lat, lon)
+
+    fips = _cached_fips(key)
+    if fips is not MISSING:
+        return dict(fips) if fips else None
+
+    fips = await _db_get_async(key)
+    if fips is not MISSING:
+        _count("db_hits")
+        if fips is None:
+            _count("negative_hits")
+        ttl = GEOCODE_CACHE_TTL_SECONDS if fips else GEOCODE_NEGATIVE_TTL_SECONDS
+        _memory_cache.set(key, fips, ttl=ttl)
+        return dict(fips) if fips else None
+
+    _count("misses")
+    fips = await geocode_flight.do_async(key, _resolve_and_store_async, key, lat, lon)
+    return dict(fips) if fips else None
+
+
+def get_geocode_cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters for tuning GEOCODE_CACHE_PRECISION."""
+    with _stats_lock:
+        counters = dict(_stats)
+    lookups = counters["memory_hits"] + counters["db_hits"] + counters["misses"]
+    return {
+        "precision": GEOCODE_CACHE_PRECISION,
+        "lookups": lookups,
+        **counters,
+        "hit_rate": round((counters["memory_hits"] + counters["db_hits"]) / lookups, 4) if lookups else 0.0,
+        "memory": _memory_cache.stats(),
+    }
@@ -0,0 +1,222 @@
+"""
+Shared outbound HTTP clients for all service modules (Census geocoder, ACS API).
+
+HttpClient (requests, thread-safe) serves the sync code paths and scripts;
+AsyncHttpClient (httpx) serves the async launch-business pipeline with the
+same policy:
+
+- One requests.Session with keep-alive connection pools per host (TLS reuse)
+- Connect/read deadlines on every call
+- Retries with full-jitter exponential backoff on 5xx/429 and connection errors
+- Per-host concurrency caps so a slow upstream cannot pin every worker thread
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.25"))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "4"))
+HTTP_PER_HOST_LIMIT = int(os.getenv("HTTP_PER_HOST_LIMIT", "8"))
+HTTP_POOL_WAIT_TIMEOUT = float(os.getenv("HTTP_POOL_WAIT_TIMEOUT", "5"))
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class HostBusyError(requests.exceptions.RequestException):
+    """Raised when the per-host concurrency cap stays saturated past the wait timeout."""
+
+
+def _backoff_delay(attempt: int, response) -> float:
+    # Honour a short Retry-After on 429/503, otherwise full jitter
+    if response is not None:
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return min(float(retry_after), HTTP_BACKOFF_MAX)
+    return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * (2 ** attempt)))
+
+
+class HttpClient:
+    """Thread-safe pooled HTTP client with deadlines, retries and per-host caps."""
+
+    def __init__(
+        self,
+        connect_timeout: float = HTTP_CONNECT_TIMEOUT,
+        read_timeout: float = HTTP_READ_TIMEOUT,
+        max_retries: int = HTTP_MAX_RETRIES,
+        per_host_limit: int = HTTP_PER_HOST_LIMIT,
+    ):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.per_host_limit = per_host_limit
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=per_host_limit, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _slots(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.per_host_limit)
+                self._stats[host] = {"requests": 0, "retries": 0, "failures": 0, "busy_rejections": 0}
+            return self._host_slots[host]
+
+    def _count(self, host: str, name: str) -> None:
+        with self._lock:
+            self._stats[host][name] += 1
+
+    def _backoff(self, attempt: int, response) -> float:
+        return _backoff_delay(attempt, response)
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None, timeout=None) -> requests.Response:
+        """
+        GET with retries. Returns the final response (callers still call
+        raise_for_status()); raises requests exceptions on network failure.
+        """
+        host = urlsplit(url).netloc
+        slots = self._slots(host)
+
+        if not slots.acquire(timeout=HTTP_POOL_WAIT_TIMEOUT):
+            self._count(host, "busy_rejections")
+            raise HostBusyError(f"Too many concurrent requests to {host}")
+
+        try:
+            attempt = 0
+            while True:
+                self._count(host, "requests")
+                response = None
+                try:
+                    response = self.session.get(url, params=params, timeout=timeout or self.timeout)
+                    if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                        return response
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                    if attempt >= self.max_retries:
+                        self._count(host, "failures")
+                        raise
+
+                self._count(host, "retries")
+                if response is not None:
+                    # Hand the connection back to the pool before backing off (headers stay readable)
+                    response.close()
+                time.sleep(self._backoff(attempt, response))
+                attempt += 1
+        finally:
+            slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "per_host_limit": self.per_host_limit,
+                "timeout": {"connect": self.timeout[0], "read": self.timeout[1]},
+                "hosts": {host: dict(counters) for host, counters in self._stats.items()},
+            }
+
+
+# Shared client used by census_service, detailed_analysis_service and geocoding_service
+http_client = HttpClient()
+
+
+def http_get(url: str, params: Optional[Dict[str, Any]] = None, timeout=None) -> requests.Response:
+    """Module-level shortcut for http_client.get()."""
+    return http_client.get(url, params=params, timeout=timeout)
+
+
+class AsyncHttpClient:
+    """
+    httpx.AsyncClient counterpart of HttpClient: shared keep-alive pool,
+    deadlines, jittered retries and per-host asyncio concurrency caps.
+    The underlying client is created lazily inside the running event loop.
+    """
+
+    def __init__(
+        self,
+        connect_timeout: float = HTTP_CONNECT_TIMEOUT,
+        read_timeout: float = HTTP_READ_TIMEOUT,
+        max_retries: int = HTTP_MAX_RETRIES,
+        per_host_limit: int = HTTP_PER_HOST_LIMIT,
+    ):
+        self.timeout = httpx.Timeout(connect=connect_timeout, read=read_timeout, write=read_timeout, pool=HTTP_POOL_WAIT_TIMEOUT)
+        self.max_retries = max_retries
+        self.per_host_limit = per_host_limit
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=64, max_keepalive_connections=self.per_host_limit * 2),
+            )
+        return self._client
+
+    def _slots(self, host: str) -> asyncio.Semaphore:
+        if host not in self._host_slots:
+            self._host_slots[host] = asyncio.Semaphore(self.per_host_limit)
+            self._stats[host] = {"requests": 0, "retries": 0, "failures": 0, "busy_rejections": 0}
+        return self._host_slots[host]
+
+    async def get(self, url: str, params: Optional[Dict[str, Any]] = None) -> httpx.Response:
+        """Async GET with retries; raises httpx.HTTPError on network failure."""
+        host = urlsplit(url).netloc
+        slots = self._slots(host)
+        stats = self._stats[host]
+
+        try:
+            await asyncio.wait_for(slots.acquire(), timeout=HTTP_POOL_WAIT_TIMEOUT)
+        except asyncio.TimeoutError:
+            stats["busy_rejections"] += 1
+            raise httpx.PoolTimeout(f"Too many concurrent requests to {host}")
+
+        try:
+            attempt = 0
+            while True:
+                stats["requests"] += 1
+                response = None
+                try:
+                    response = await self._get_client().get(url, params=params)
+                    if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                        return response
+                except (httpx.TransportError,):
+                    if attempt >= self.max_retries:
+                        stats["failures"] += 1
+                        raise
+
+                stats["retries"] += 1
+                if response is not None:
+                    await response.aclose()
+                await asyncio.sleep(_backoff_delay(attempt, response))
+                attempt += 1
+        finally:
+            slots.release()
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "per_host_limit": self.per_host_limit,
+            "hosts": {host: dict(counters) for host, counters in self._stats.items()},
+        }
+
+
+# Shared async client used by the async launch-business pipeline
+async_http_client = AsyncHttpClient()
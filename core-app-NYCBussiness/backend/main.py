@@ -1,21 +1,65 @@
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, Dict, Any
 import os
+import json
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import time
+from contextlib import asynccontextmanager
 import httpx
 
-from database import init_db, get_db, AreaOverview, DetailedAreaAnalysis, SimulationUser
-from census_service import analyze_area
-from detailed_analysis_service import analyze_area_detailed
-from trends_service import analyze_business_trends
+from database import init_db, get_db, get_async_db, SessionLocal, async_engine, AsyncSessionLocal, AreaOverview, DetailedAreaAnalysis, SimulationUser
+from census_service import analyze_area_async
+from detailed_analysis_service import analyze_area_detailed_async
+from geocoding_service import resolve_fips_async, get_geocode_cache_stats
+from area_service import get_or_create_area_async, get_area, get_detailed_for_area, get_census_payload, splice_json
+from http_client import http_client, async_http_client
+from orchestrator_client import orchestrator_client
+from next_month_speculation import next_month_speculator, following_month, decisions_fingerprint
+from singleflight import get_singleflight_stats
+from trends_service import analyze_business_trends_async, analyze_trends_window, business_category, trends_executor, get_trends_executor_stats
+from trends_seasonality import get_seasonality, get_seasonality_stats
+from trends_cache import get_trends_cache_stats
+from trends_scheduler import trends_scheduler, TRENDS_PREFETCH_ENABLED
 import business_survival_service as survival_svc
+from survival_index import reload_survival_index, get_survival_index_stats
+from business_type_classifier import business_type_classifier
 from simulation_state_service import SimulationStateService
 
-app = FastAPI(title="NYC Business Simulator Backend")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Inițializează baza de date și pornește prefetch-ul trends; la oprire închide clienții și pool-urile"""
+    print("Inițializare bază de date...")
+    init_db()
+    print("Baza de date inițializată cu succes!")
+
+    # business_survival e populat de startup.sh înainte de uvicorn
+    try:
+        reload_survival_index()
+    except Exception as e:
+        print(f"⚠️  Survival index not loaded at startup (will load on first use): {e}")
+
+    await orchestrator_client.start()
+
+    if TRENDS_PREFETCH_ENABLED:
+        trends_scheduler.start()
+
+    yield
+
+    await trends_scheduler.stop()
+    await next_month_speculator.aclose()
+    await orchestrator_client.aclose()
+    await async_http_client.aclose()
+    await async_engine.dispose()
+    trends_executor.shutdown(wait=False, cancel_futures=True)
+
+
+app = FastAPI(title="NYC Business Simulator Backend", lifespan=lifespan)
 
 # CORS configuration pentru frontend
 app.add_middleware(
@@ -46,6 +90,7 @@ class SimulationNextMonthRequest(BaseModel):
     business_type: str
     current_month: int
     current_year: int = 2024
+    session_id: Optional[str] = None  # activează rezultatul speculativ (vezi save-state)
 
 class SimulationNextMonthResponse(BaseModel):
     success: bool
@@ -53,6 +98,15 @@ class SimulationNextMonthResponse(BaseModel):
     trends: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
 
+class SimulationBatchRequest(BaseModel):
+    session_id: str
+    area_id: int
+    business_type: str
+    start_month: int
+    start_year: int = 2024
+    months: int = 12
+    player_decisions: Dict[str, Any] = {}
+
 class GetTrendsRequest(BaseModel):
     business_type: str
     location: str = "US-NY"
@@ -96,15 +150,12 @@ class SaveMonthlyStateRequest(BaseModel):
     cash_balance: float
     agent_outputs: Dict[str, Any]
     player_decisions: Dict[str, Any]
+    # Opt-in: pre-calculează luna următoare în fundal (next_month_speculation.py)
+    speculate: bool = False
+    area_id: Optional[int] = None
+    business_type: Optional[str] = None
 
 
-@app.on_event("startup")
-def startup_event():
-    """Inițializează baza de date la pornirea aplicației"""
-    print("Inițializare bază de date...")
-    init_db()
-    print("Baza de date inițializată cu succes!")
-
 # ========================================
 # AUTHENTICATION ENDPOINTS
 # ========================================
@@ -177,10 +228,17 @@ def create_simulation_session(request: CreateSessionRequest, db: Session = Depen
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/simulation/save-state")
-def save_monthly_state(request: SaveMonthlyStateRequest, db: Session = Depends(get_db)):
-    """Save monthly simulation state"""
+async def save_monthly_state(request: SaveMonthlyStateRequest, db: Session = Depends(get_db)):
+    """
+    Save monthly simulation state.
+    With speculate=true (plus area_id and business_type) the events + trends
+    for the saved month (what the next next-month call asks for) are started
+    in the background for this session.
+    """
     try:
-        result = SimulationStateService.save_monthly_state(
+        # Apelul sincron la DB rămâne în threadpool (ca înainte, când endpoint-ul era def)
+        result = await run_in_threadpool(
+            SimulationStateService.save_monthly_state,
             db,
             request.session_id,
             request.month,
@@ -192,6 +250,21 @@ def save_monthly_state(request: SaveMonthlyStateRequest, db: Session = Depends(g
             request.agent_outputs,
             request.player_decisions
         )
+        
+        if request.speculate and request.area_id is not None and request.business_type:
+            # Frontend-ul salvează luna în care intră jucătorul (M+1) și apoi cere
+            # next-month cu current_month = aceeași lună: cheia e luna salvată
+            key = (request.area_id, request.business_type, request.month, request.year)
+            # Decizii diferite pentru aceeași lună înlocuiesc speculația existentă
+            next_month_speculator.schedule(
+                request.session_id,
+                key,
+                decisions_fingerprint(request.player_decisions),
+                lambda: _generate_next_month(*key)
+            )
+        else:
+            next_month_speculator.invalidate(request.session_id)
+        
         return {"success": True, "state": result}
     except Exception as e:
         print(f"Error saving state: {e}")
@@ -222,7 +295,7 @@ def get_previous_state(session_id: str, month: int, year: int, db: Session = Dep
 
 
 @app.post("/api/simulation/revert")
-def revert_to_month(
+async def revert_to_month(
     session_id: str,
     target_month: int,
     target_year: int,
@@ -245,9 +318,11 @@ def revert_to_month(
     Example: POST /api/simulation/revert?session_id=xxx&target_month=3&target_year=2024
     """
     try:
-        result = SimulationStateService.revert_to_month(
-            db, session_id, target_month, target_year
+        result = await run_in_threadpool(
+            SimulationStateService.revert_to_month, db, session_id, target_month, target_year
         )
+        # Luna pre-calculată nu mai corespunde stării (pe event loop: speculatorul nu e thread-safe)
+        next_month_speculator.invalidate(session_id)
         return result
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -264,69 +339,48 @@ def read_root():
 def health_check():
     return {"status": "healthy"}
 
+@app.get("/api/metrics")
+def get_metrics():
+    """Cache counters for tuning (geocode quantization etc.)"""
+    return {
+        "geocode_cache": get_geocode_cache_stats(),
+        "census_http": http_client.stats(),
+        "census_http_async": async_http_client.stats(),
+        "singleflight": get_singleflight_stats(),
+        "trends_cache": get_trends_cache_stats(),
+        "trends_executor": get_trends_executor_stats(),
+        "seasonality": get_seasonality_stats(),
+        "orchestrator_http": orchestrator_client.stats(),
+        "next_month_speculation": next_month_speculator.stats(),
+        "survival_index": get_survival_index_stats(),
+        "business_type_classifier": business_type_classifier.stats(),
+    }
+
 @app.get("/api/get-area/{area_id}")
 def get_area_by_id(area_id: int, db: Session = Depends(get_db)):
     """
     Get area data by ID including census and detailed analysis
     """
     try:
-        # Get area overview
-        area = db.query(AreaOverview).filter(AreaOverview.id == area_id).first()
-        if not area:
+        # Payload pre-serializat (același ca pentru agenți), din memorie sau din area_overview
+        # (old ids of collapsed duplicates resolve to the canonical row)
+        entry = get_census_payload(db, area_id)
+        if not entry:
             raise HTTPException(status_code=404, detail=f"Area ID {area_id} not found")
         
-        # Get detailed analysis
-        detailed = db.query(DetailedAreaAnalysis).filter(
-            DetailedAreaAnalysis.area_overview_id == area_id
-        ).first()
-        
-        # Build census data structure
-        census_data = {
-            "demographics_detailed": {},
-            "derived_statistics": {},
-            "fips_codes": {
-                "state": area.state_fips,
-                "county": area.county_fips,
-                "tract": area.tract_fips,
-            },
-            "area_name": area.area_name or "Unknown Area",
-            "latitude": area.latitude,
-            "longitude": area.longitude,
-        }
-        
-        # Helper
-        def format_value(value, label):
-            return {
-                "value": value if value is not None else "N/A",
-                "label": label
-            }
-        
-        # Add demographics
-        demo = census_data["demographics_detailed"]
-        demo["B01001_001E"] = format_value(area.total_population, "Total Population")
-        demo["B01002_001E"] = format_value(area.median_age, "Median Age")
-        demo["B19013_001E"] = format_value(area.median_household_income, "Median Household Income")
-        demo["C24050_001E"] = format_value(area.total_workforce, "Total Workforce")
-        
-        if detailed:
-            census_data["derived_statistics"] = {
-                "poverty_rate": detailed.poverty_rate or 0,
-                "high_income_households_rate": detailed.high_income_households_rate or 0,
-                "bachelor_plus_rate": detailed.bachelor_plus_rate or 0,
-                "renter_rate": detailed.renter_rate or 0,
-                "work_from_home_rate": detailed.work_from_home_rate or 0,
-            }
-        
-        return {
-            "success": True,
-            "area_id": area_id,
-            "data": {
-                "area_name": area.area_name,
-                "latitude": area.latitude,
-                "longitude": area.longitude,
+        body = splice_json(
+            {
+                "success": True,
+                "area_id": area_id,
+                "data": {
+                    "area_name": entry["area_name"],
+                    "latitude": entry["latitude"],
+                    "longitude": entry["longitude"],
+                },
             },
-            "detailed_data": census_data
-        }
+            {"detailed_data": entry["census_bytes"]}
+        )
+        return Response(content=body, media_type="application/json")
         
     except HTTPException:
         raise
@@ -334,10 +388,12 @@ def get_area_by_id(area_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/launch-business", response_model=LaunchBusinessResponse)
-def launch_business(request: LaunchBusinessRequest, db: Session = Depends(get_db)):
+async def launch_business(request: LaunchBusinessRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Endpoint principal: procesează coordonatele, rulează analiza Census standard,
     analiza detaliată (din app4.py) în paralel, și salvează rezultatele în baza de date.
+    Pipeline complet async: geocodare, analize și DB rulează pe event loop,
+    fără thread-uri create per cerere.
     """
     
     try:
@@ -346,171 +402,44 @@ def launch_business(request: LaunchBusinessRequest, db: Session = Depends(get_db
         
         print(f"Procesare cerere pentru lat={lat_str}, lon={lon_str}")
         
-        # Rulăm ambele analize în paralel folosind ThreadPoolExecutor
-        with ThreadPoolExecutor(max_workers=2) as executor:
-            # Lansăm ambele analize simultan
-            future_standard = executor.submit(analyze_area, lat_str, lon_str)
-            future_detailed = executor.submit(analyze_area_detailed, lat_str, lon_str)
-            
-            # Așteptăm rezultatele
-            census_data = future_standard.result()
-            detailed_data = future_detailed.result()
-        
-        if not census_data:
+        # Geocodare o singură dată, partajată de ambele analize
+        fips = await resolve_fips_async(request.latitude, request.longitude)
+        if not fips:
             raise HTTPException(
                 status_code=400, 
                 detail="Nu s-au putut obține date Census pentru această locație"
             )
         
-        # Extragem datele demografice
-        demo = census_data.get("demographics", {})
-        fips = census_data.get("fips_codes", {})
-        
-        # Creăm înregistrarea în baza de date
-        area_record = AreaOverview(
-            latitude=census_data.get("latitude"),
-            longitude=census_data.get("longitude"),
-            state_fips=fips.get("state"),
-            county_fips=fips.get("county"),
-            tract_fips=fips.get("tract"),
-            area_name=census_data.get("area_name"),
-            
-            # Demographics
-            total_population=int(demo.get("B01001_001E", 0)) if demo.get("B01001_001E") else None,
-            median_age=float(demo.get("B01002_001E", 0)) if demo.get("B01002_001E") else None,
-            median_household_income=int(demo.get("B19013_001E", 0)) if demo.get("B19013_001E") else None,
-            per_capita_income=int(demo.get("B19301_001E", 0)) if demo.get("B19301_001E") else None,
-            poverty_population=int(demo.get("B17001_002E", 0)) if demo.get("B17001_002E") else None,
-            poverty_rate=demo.get("poverty_rate"),
-            
-            # Education
-            total_population_25_plus=int(demo.get("B15003_001E", 0)) if demo.get("B15003_001E") else None,
-            bachelors_degree=int(demo.get("B15003_022E", 0)) if demo.get("B15003_022E") else None,
-            masters_degree=int(demo.get("B15003_023E", 0)) if demo.get("B15003_023E") else None,
-            doctorate_degree=int(demo.get("B15003_025E", 0)) if demo.get("B15003_025E") else None,
-            
-            # Housing
-            total_housing_units=int(demo.get("B25003_001E", 0)) if demo.get("B25003_001E") else None,
-            owner_occupied=int(demo.get("B25003_002E", 0)) if demo.get("B25003_002E") else None,
-            renter_occupied=int(demo.get("B25003_003E", 0)) if demo.get("B25003_003E") else None,
-            renter_rate=demo.get("renter_rate"),
-            median_gross_rent=int(demo.get("B25031_001E", 0)) if demo.get("B25031_001E") else None,
-            median_home_value=int(demo.get("B25077_001E", 0)) if demo.get("B25077_001E") else None,
-            
-            # Employment
-            total_workforce=int(demo.get("C24050_001E", 0)) if demo.get("C24050_001E") else None,
-            finance_insurance_real_estate=int(demo.get("C24050_007E", 0)) if demo.get("C24050_007E") else None,
-            arts_entertainment_hospitality=int(demo.get("C24050_018E", 0)) if demo.get("C24050_018E") else None,
-            professional_services=int(demo.get("C24050_029E", 0)) if demo.get("C24050_029E") else None,
+        # Rulăm ambele analize concurent (fiecare cu propria sesiune async)
+        census_data, detailed_data = await asyncio.gather(
+            analyze_area_async(lat_str, lon_str, fips),
+            analyze_area_detailed_async(lat_str, lon_str, fips),
         )
         
-        # Salvăm în baza de date
-        db.add(area_record)
-        db.commit()
-        db.refresh(area_record)
+        if not census_data:
+            raise HTTPException(
+                status_code=400, 
+                detail="Nu s-au putut obține date Census pentru această locație"
+            )
         
-        print(f"Date standard salvate cu succes în DB cu ID={area_record.id}")
+        # Analiza este identificată prin tract + vintage: se inserează doar prima dată
+        # (o lansare care refolosește tractul primește ID propriu, cu locația ei)
+        area_record, detailed_record, created, launch_id = await get_or_create_area_async(db, census_data, detailed_data)
         
-        # Salvăm datele detaliate dacă există
-        detailed_record_id = None
-        if detailed_data:
-            try:
-                detail_demo = detailed_data.get("demographics_detailed", {})
-                detail_fips = detailed_data.get("fips_codes", {})
-                detail_stats = detailed_data.get("derived_statistics", {})
-                
-                # Helper function pentru a extrage valoarea dintr-un dict cu structura {value, label}
-                def get_value(code):
-                    item = detail_demo.get(code, {})
-                    if isinstance(item, dict):
-                        val = item.get("value")
-                        if val and val != "N/A":
-                            try:
-                                return int(val)
-                            except (ValueError, TypeError):
-                                try:
-                                    return float(val)
-                                except (ValueError, TypeError):
-                                    return None
-                    return None
-                
-                detailed_record = DetailedAreaAnalysis(
-                    area_overview_id=area_record.id,
-                    latitude=detailed_data.get("latitude"),
-                    longitude=detailed_data.get("longitude"),
-                    state_fips=detail_fips.get("state"),
-                    county_fips=detail_fips.get("county"),
-                    tract_fips=detail_fips.get("tract"),
-                    block_fips=detail_fips.get("block"),
-                    full_tract_id=detail_fips.get("full_tract_id"),
-                    full_block_id=detail_fips.get("full_block_id"),
-                    area_name=detailed_data.get("area_name"),
-                    analysis_year=detailed_data.get("year", "2021"),
-                    
-                    # Demographics
-                    total_population=get_value("B01003_001E"),
-                    median_age=get_value("B01002_001E"),
-                    
-                    # Income
-                    median_household_income=get_value("B19013_001E"),
-                    per_capita_income=get_value("B19301_001E"),
-                    total_households=get_value("B19001_001E"),
-                    households_75k_99k=get_value("B19001_013E"),
-                    households_100k_124k=get_value("B19001_014E"),
-                    households_125k_149k=get_value("B19001_015E"),
-                    households_150k_199k=get_value("B19001_016E"),
-                    households_200k_plus=get_value("B19001_017E"),
-                    
-                    # Education
-                    total_population_25_plus=get_value("B15003_001E"),
-                    bachelors_degree=get_value("B15003_022E"),
-                    masters_degree=get_value("B15003_023E"),
-                    doctorate_degree=get_value("B15003_025E"),
-                    
-                    # Housing
-                    total_housing_units=get_value("B25003_001E"),
-                    renter_occupied=get_value("B25003_003E"),
-                    median_rent_as_percent_income=get_value("B25071_001E"),
-                    
-                    # Transportation
-                    total_workers_16_plus=get_value("B08301_001E"),
-                    public_transportation=get_value("B08301_010E"),
-                    work_from_home=get_value("B08301_021E"),
-                    
-                    # Poverty
-                    poverty_population=get_value("B17001_002E"),
-                    
-                    # Derived statistics
-                    poverty_rate=detail_stats.get("poverty_rate"),
-                    high_income_households_rate=detail_stats.get("high_income_households_rate"),
-                    high_income_count=detail_stats.get("high_income_count"),
-                    bachelor_plus_rate=detail_stats.get("bachelor_plus_rate"),
-                    bachelor_plus_count=detail_stats.get("bachelor_plus_count"),
-                    renter_rate=detail_stats.get("renter_rate"),
-                    work_from_home_rate=detail_stats.get("work_from_home_rate"),
-                    
-                    # Raw JSON pentru backup
-                    raw_demographics_json=detail_demo,
-                    raw_derived_stats_json=detail_stats
-                )
-                
-                db.add(detailed_record)
-                db.commit()
-                db.refresh(detailed_record)
-                detailed_record_id = detailed_record.id
-                
-                print(f"Date detaliate salvate cu succes în DB cu ID={detailed_record.id}")
-            except Exception as e:
-                print(f"Eroare la salvarea datelor detaliate: {e}")
-                # Nu oprim procesul dacă datele detaliate nu se salvează
-                db.rollback()
+        if created:
+            print(f"Date standard salvate cu succes în DB cu ID={area_record.id}")
+        else:
+            print(f"Analiză existentă refolosită pentru tract (ID={area_record.id}, lansare ID={launch_id})")
+        
+        if detailed_record:
+            print(f"Date detaliate disponibile în DB cu ID={detailed_record.id}")
         
         print(f"Analiza detaliată completă: {detailed_data is not None}")
         
         return LaunchBusinessResponse(
             success=True,
             message="Analiza zonei a fost completată și salvată cu succes",
-            area_id=area_record.id,
+            area_id=launch_id,
             data=census_data,
             detailed_data=detailed_data
         )
@@ -521,11 +450,89 @@ def launch_business(request: LaunchBusinessRequest, db: Session = Depends(get_db
         print(f"Eroare la procesarea cererii: {e}")
         raise HTTPException(status_code=500, detail=f"Eroare internă: {str(e)}")
 
+def _format_stream_event(event: str, payload: Dict[str, Any], sse: bool) -> bytes:
+    """NDJSON: one JSON object per line. SSE: `event:` + `data:` frame."""
+    if sse:
+        return f"event: {event}\ndata: {json.dumps(payload, default=str)}\n\n".encode()
+    return (json.dumps({"event": event, **payload}, default=str) + "\n").encode()
+
+
+async def _launch_business_events(request: LaunchBusinessRequest, sse: bool):
+    """
+    Rulează același pipeline ca launch_business, dar emite câte un eveniment
+    la finalul fiecărei etape: geocode, census, area_saved, detailed, done (sau error).
+    Datele census locale (ms) ajung la client fără să aștepte profilul ACS.
+    """
+    lat_str = str(request.latitude)
+    lon_str = str(request.longitude)
+    detailed_task = None
+
+    try:
+        fips = await resolve_fips_async(request.latitude, request.longitude)
+        if not fips:
+            yield _format_stream_event("error", {
+                "status_code": 400,
+                "detail": "Nu s-au putut obține date Census pentru această locație",
+            }, sse)
+            return
+        yield _format_stream_event("geocode", {"fips_codes": fips}, sse)
+
+        detailed_task = asyncio.create_task(analyze_area_detailed_async(lat_str, lon_str, fips))
+
+        census_data = await analyze_area_async(lat_str, lon_str, fips)
+        if not census_data:
+            detailed_task.cancel()
+            yield _format_stream_event("error", {
+                "status_code": 400,
+                "detail": "Nu s-au putut obține date Census pentru această locație",
+            }, sse)
+            return
+        yield _format_stream_event("census", {"data": census_data}, sse)
+
+        async with AsyncSessionLocal() as db:
+            # Zona se salvează imediat; analiza detaliată se atașează când sosește
+            _, _, created, launch_id = await get_or_create_area_async(db, census_data)
+            yield _format_stream_event("area_saved", {"area_id": launch_id, "created": created}, sse)
+
+            detailed_data = await detailed_task
+            yield _format_stream_event("detailed", {"detailed_data": detailed_data}, sse)
+
+            if detailed_data:
+                await get_or_create_area_async(db, census_data, detailed_data, launch_id)
+
+        yield _format_stream_event("done", {
+            "success": True,
+            "message": "Analiza zonei a fost completată și salvată cu succes",
+            "area_id": launch_id,
+        }, sse)
+
+    except Exception as e:
+        print(f"Eroare la procesarea cererii (stream): {e}")
+        yield _format_stream_event("error", {"status_code": 500, "detail": f"Eroare internă: {str(e)}"}, sse)
+    finally:
+        # Clientul s-a deconectat sau a apărut o eroare: nu lăsăm analiza ACS orfană
+        if detailed_task is not None and not detailed_task.done():
+            detailed_task.cancel()
+
+
+@app.post("/api/launch-business/stream")
+async def launch_business_stream(request: LaunchBusinessRequest, format: str = "ndjson"):
+    """
+    Varianta streaming a /api/launch-business: NDJSON implicit, `?format=sse`
+    pentru Server-Sent Events. Ultimul eveniment este `done` sau `error`.
+    """
+    sse = format == "sse"
+    return StreamingResponse(
+        _launch_business_events(request, sse),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @app.get("/api/area-overview/{area_id}")
 def get_area_overview(area_id: int, db: Session = Depends(get_db)):
     """Returnează datele unei analize anterioare după ID"""
     
-    area = db.query(AreaOverview).filter(AreaOverview.id == area_id).first()
+    area = get_area(db, area_id)
     
     if not area:
         raise HTTPException(status_code=404, detail="Analiza nu a fost găsită")
@@ -543,9 +550,7 @@ def get_all_area_overviews(skip: int = 0, limit: int = 100, db: Session = Depend
 def get_detailed_analysis(area_id: int, db: Session = Depends(get_db)):
     """Returnează analiza detaliată pentru un area_id specific"""
     
-    detailed = db.query(DetailedAreaAnalysis).filter(
-        DetailedAreaAnalysis.area_overview_id == area_id
-    ).first()
+    detailed = get_detailed_for_area(db, area_id)
     
     if not detailed:
         raise HTTPException(status_code=404, detail="Analiza detaliată nu a fost găsită")
@@ -568,7 +573,8 @@ async def get_trends(request: GetTrendsRequest):
     try:
         print(f"🔍 Fetching Google Trends for: {request.business_type}")
         
-        trends_data = analyze_business_trends(
+        # pytrends rulează în trends_executor, cu deadline - event loop-ul rămâne liber
+        trends_data = await analyze_business_trends_async(
             business_type=request.business_type,
             location=request.location
         )
@@ -583,173 +589,152 @@ async def get_trends(request: GetTrendsRequest):
             "business_type": request.business_type
         }
 
+@app.get("/api/trends/prefetch-status")
+def get_trends_prefetch_status():
+    """Starea scheduler-ului de prefetch: ultimul refresh și eșecurile per categorie/geo"""
+    return trends_scheduler.status()
+
+@app.get("/api/trends/seasonality/{business_type}/{month}")
+def get_trends_seasonality(business_type: str, month: int):
+    """Indexul de sezonalitate (din memorie) al categoriei business type-ului pentru luna dată"""
+    seasonality = get_seasonality(business_category(business_type), month)
+    if not seasonality:
+        raise HTTPException(status_code=404, detail=f"Nu există index de sezonalitate pentru '{business_type}' luna {month}")
+    return seasonality
+
+@app.get("/api/trends/window/{business_type}")
+def get_trends_window(business_type: str, location: str = "US-NY", days: int = 365, comparison_window: int = 30):
+    """Rising/declining pe orice fereastră (ex: 365 de zile, ultimele 30 vs primele 30), doar din seria locală"""
+    if days < 1 or not 1 <= comparison_window <= days:
+        raise HTTPException(status_code=400, detail="Fereastra trebuie să aibă days >= 1 și 1 <= comparison_window <= days")
+    return analyze_trends_window(business_type, location, days, comparison_window)
+
+def _in_own_session(fn, *args):
+    """fn(db, *args) cu o sesiune deschisă și închisă în același apel; rulat prin run_in_threadpool,
+    deci fiecare task are sesiunea lui și nicio interogare sincronă nu blochează event loop-ul."""
+    db = SessionLocal()
+    try:
+        return fn(db, *args)
+    finally:
+        db.close()
+
+
+async def _generate_next_month(area_id: int, business_type: str, current_month: int, current_year: int) -> SimulationNextMonthResponse:
+    """Apelurile events + trends către agents-orchestrator pentru o lună (cerere sau speculativ)."""
+    # censusData pre-serializat la lansare (area_service.get_census_payload):
+    # din memorie nu se face nicio interogare și nici json.dumps pe el; la miss
+    # interogarea rulează în threadpool, nu pe event loop
+    entry = await run_in_threadpool(_in_own_session, get_census_payload, area_id)
+    if not entry:
+        raise HTTPException(status_code=404, detail=f"Area ID {area_id} nu a fost găsită")
+    
+    area_name = entry["area_name"] or "Unknown"
+    payload = {
+        "businessType": business_type,
+        "location": {
+            "address": area_name,
+            "neighborhood": area_name,
+            "lat": entry["latitude"],
+            "lng": entry["longitude"]
+        },
+        "currentMonth": current_month,
+        "currentYear": current_year
+    }
+    census_bytes = {"censusData": entry["census_bytes"]}
+    
+    # Apelează API-ul agents-orchestrator PENTRU EVENIMENTE ȘI TRENDS ÎN PARALEL
+    # (client partajat din lifespan, cu timeout-uri per rută - vezi orchestrator_client.py)
+    print(f"🔗 Calling agents orchestrator at: {orchestrator_client.base_url}")
+    
+    # Sezonalitate pre-calculată (din memorie, fără Google pe calea cererii)
+    seasonality = get_seasonality(business_category(business_type), current_month)
+    payload["seasonality"] = seasonality
+    
+    # Events agent nu depinde de trends: pornește imediat
+    print(f"🎲 Step 1: Calling events agent...")
+    events_task = asyncio.create_task(orchestrator_client.post(
+        "/api/simulation/next-month",
+        content=splice_json(payload, census_bytes)
+    ))
+    
+    try:
+        # Google Trends in-process (cache / trends_executor), în paralel cu events agent
+        print(f"📊 Step 2: Fetching Google Trends data...")
+        trends_raw_data = await analyze_business_trends_async(
+            business_type=business_type,
+            location="US-NY"
+        )
+        trends_raw_data = dict(trends_raw_data)
+        if seasonality:
+            trends_raw_data["seasonality"] = seasonality
+        print(f"✅ Trends data fetched: {trends_raw_data.get('success', False)}")
+        
+        # Trends agent (cu trends data)
+        trends_payload = {
+            **payload,
+            "trendsData": trends_raw_data
+        }
+        trends_future = orchestrator_client.post(
+            "/api/simulation/analyze-trends",
+            content=splice_json(trends_payload, census_bytes)
+        )
+        
+        # Așteaptă ambele răspunsuri
+        responses = await asyncio.gather(events_task, trends_future, return_exceptions=True)
+    finally:
+        # Eroare / anulare (batch anulat, speculație invalidată, client deconectat):
+        # events agent nu rămâne să ruleze neașteptat, iar excepția lui e preluată
+        events_task.cancel()
+        await asyncio.gather(events_task, return_exceptions=True)
+    
+    events_response = responses[0]
+    trends_response = responses[1]
+    
+    # Procesează răspunsurile
+    event_data = None
+    trends_analysis = None
+    
+    if isinstance(events_response, httpx.Response) and events_response.status_code == 200:
+        event_data = events_response.json()
+        print(f"✅ Events agent succeeded")
+    else:
+        print(f"❌ Events agent failed: {events_response}")
+    
+    if isinstance(trends_response, httpx.Response) and trends_response.status_code == 200:
+        trends_analysis = trends_response.json()
+        print(f"✅ Trends agent succeeded")
+    else:
+        print(f"❌ Trends agent failed: {trends_response}")
+    
+    return SimulationNextMonthResponse(
+        success=True,
+        event=event_data,
+        trends=trends_analysis
+    )
+
+
+def _next_month_succeeded(result: SimulationNextMonthResponse) -> bool:
+    return result.success and result.event is not None
+
+
 @app.post("/api/simulation/next-month", response_model=SimulationNextMonthResponse)
-async def simulation_next_month(request: SimulationNextMonthRequest, db: Session = Depends(get_db)):
+async def simulation_next_month(request: SimulationNextMonthRequest):
     """
     Endpoint pentru generarea evenimentelor la apăsarea butonului 'Next Month'.
     Extrage datele Census din DB și apelează agentul de evenimente din agents-orchestrator.
+    Cu session_id, o lună pre-calculată speculativ după save-state se returnează imediat.
     """
     try:
-        # Obține datele area_overview din DB
-        area = db.query(AreaOverview).filter(AreaOverview.id == request.area_id).first()
-        if not area:
-            raise HTTPException(status_code=404, detail=f"Area ID {request.area_id} nu a fost găsită")
-        
-        # Obține datele detaliate dacă există
-        detailed = db.query(DetailedAreaAnalysis).filter(
-            DetailedAreaAnalysis.area_overview_id == request.area_id
-        ).first()
-        
-        # Construiește datele Census în formatul așteptat de agent
-        census_data = {
-            "demographics_detailed": {},
-            "fips_codes": {
-                "state": area.state_fips,
-                "county": area.county_fips,
-                "tract": area.tract_fips,
-            },
-            "area_name": area.area_name or "Unknown Area",
-            "latitude": area.latitude,
-            "longitude": area.longitude,
-        }
-        
-        # Helper pentru a formata datele în structura așteptată de agent
-        def format_census_value(value, label):
-            return {
-                "value": value if value is not None else "N/A",
-                "label": label
-            }
-        
-        # Adaugă date din AreaOverview
-        demo = census_data["demographics_detailed"]
-        demo["B01001_001E"] = format_census_value(area.total_population, "Total Population")
-        demo["B01002_001E"] = format_census_value(area.median_age, "Median Age")
-        demo["B19013_001E"] = format_census_value(area.median_household_income, "Median Household Income")
-        demo["B19301_001E"] = format_census_value(area.per_capita_income, "Per Capita Income")
-        demo["B15003_001E"] = format_census_value(area.total_population_25_plus, "Total Population 25+")
-        demo["B15003_022E"] = format_census_value(area.bachelors_degree, "Bachelor's Degree")
-        demo["B15003_023E"] = format_census_value(area.masters_degree, "Master's Degree")
-        demo["B15003_025E"] = format_census_value(area.doctorate_degree, "Doctorate Degree")
-        demo["C24050_001E"] = format_census_value(area.total_workforce, "Total Workforce")
-        demo["C24050_007E"] = format_census_value(area.finance_insurance_real_estate, "Finance/Insurance/Real Estate")
-        demo["C24050_018E"] = format_census_value(area.arts_entertainment_hospitality, "Arts/Entertainment/Hospitality")
-        demo["C24050_029E"] = format_census_value(area.professional_services, "Professional Services")
-        demo["B17001_002E"] = format_census_value(area.poverty_population, "Poverty Population")
-        demo["B25003_001E"] = format_census_value(area.total_housing_units, "Total Housing Units")
-        demo["B25003_003E"] = format_census_value(area.renter_occupied, "Renter Occupied")
-        demo["B25031_001E"] = format_census_value(area.median_gross_rent, "Median Gross Rent")
-        demo["B25077_001E"] = format_census_value(area.median_home_value, "Median Home Value")
-        
-        # Adaugă date suplimentare din DetailedAreaAnalysis dacă există
-        if detailed:
-            demo["B19001_013E"] = format_census_value(detailed.households_75k_99k, "Households $75k-$99k")
-            demo["B19001_014E"] = format_census_value(detailed.households_100k_124k, "Households $100k-$124k")
-            demo["B19001_015E"] = format_census_value(detailed.households_125k_149k, "Households $125k-$149k")
-            demo["B19001_016E"] = format_census_value(detailed.households_150k_199k, "Households $150k-$199k")
-            demo["B19001_017E"] = format_census_value(detailed.households_200k_plus, "Households $200k+")
-        
-        # Construiește payload pentru agents-orchestrator
-        payload = {
-            "businessType": request.business_type,
-            "location": {
-                "address": area.area_name or "Unknown",
-                "neighborhood": area.area_name or "Unknown",
-                "lat": area.latitude,
-                "lng": area.longitude
-            },
-            "censusData": census_data,
-            "currentMonth": request.current_month,
-            "currentYear": request.current_year
-        }
-        
-        # Apelează API-ul agents-orchestrator PENTRU EVENIMENTE ȘI TRENDS ÎN PARALEL
-        agents_orchestrator_url = os.getenv("AGENTS_ORCHESTRATOR_URL", "http://localhost:3000")
-        
-        print(f"🔗 Calling agents orchestrator at: {agents_orchestrator_url}")
+        key = (request.area_id, request.business_type, request.current_month, request.current_year)
+        speculative = await next_month_speculator.take(request.session_id, key, _next_month_succeeded)
+        if speculative is not None:
+            print(f"⚡ Next month served from speculation (session {request.session_id})")
+            return speculative
         
-        # Configurez timeout-uri generoase pentru AI processing
-        timeout = httpx.Timeout(
-            connect=10.0,  # 10s pentru conectare
-            read=60.0,     # 60s pentru citire (AI processing)
-            write=10.0,    # 10s pentru scriere
-            pool=10.0      # 10s pentru pool
+        return await _generate_next_month(
+            request.area_id, request.business_type, request.current_month, request.current_year
         )
         
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            # Extrag Google Trends în paralel
-            print(f"📊 Step 1: Fetching Google Trends data...")
-            trends_data_response = await client.post(
-                "http://localhost:8000/api/get-trends",
-                json={
-                    "business_type": request.business_type,
-                    "location": "US-NY"
-                }
-            )
-            trends_raw_data = trends_data_response.json()
-            print(f"✅ Trends data fetched: {trends_raw_data.get('success', False)}")
-            
-            # Construiește payload-ul pentru agenți
-            payload = {
-                "businessType": request.business_type,
-                "location": {
-                    "address": area.area_name or "Unknown",
-                    "neighborhood": area.area_name or "Unknown",
-                    "lat": area.latitude,
-                    "lng": area.longitude
-                },
-                "censusData": census_data,
-                "currentMonth": request.current_month,
-                "currentYear": request.current_year
-            }
-            
-            # Apelează ambii agenți în paralel
-            print(f"🎲 Step 2: Calling both agents in parallel...")
-            
-            # Events agent
-            events_future = client.post(
-                f"{agents_orchestrator_url}/api/simulation/next-month",
-                json=payload
-            )
-            
-            # Trends agent (cu trends data)
-            trends_payload = {
-                **payload,
-                "trendsData": trends_raw_data
-            }
-            trends_future = client.post(
-                f"{agents_orchestrator_url}/api/simulation/analyze-trends",
-                json=trends_payload
-            )
-            
-            # Așteaptă ambele răspunsuri
-            import asyncio
-            responses = await asyncio.gather(events_future, trends_future, return_exceptions=True)
-            
-            events_response = responses[0]
-            trends_response = responses[1]
-            
-            # Procesează răspunsurile
-            event_data = None
-            trends_analysis = None
-            
-            if isinstance(events_response, httpx.Response) and events_response.status_code == 200:
-                event_data = events_response.json()
-                print(f"✅ Events agent succeeded")
-            else:
-                print(f"❌ Events agent failed: {events_response}")
-            
-            if isinstance(trends_response, httpx.Response) and trends_response.status_code == 200:
-                trends_analysis = trends_response.json()
-                print(f"✅ Trends agent succeeded")
-            else:
-                print(f"❌ Trends agent failed: {trends_response}")
-            
-            return SimulationNextMonthResponse(
-                success=True,
-                event=event_data,
-                trends=trends_analysis
-            )
-            
     except HTTPException:
         raise
     except Exception as e:
@@ -760,10 +745,201 @@ async def simulation_next_month(request: SimulationNextMonthRequest, db: Session
         )
 
 
+SIMULATION_BATCH_MAX_MONTHS = int(os.getenv("SIMULATION_BATCH_MAX_MONTHS", "24"))
+# Câte luni sunt în lucru la orchestrator simultan într-un batch
+SIMULATION_BATCH_WINDOW = int(os.getenv("SIMULATION_BATCH_WINDOW", "4"))
+
+
+def _month_financials(outputs: Dict[str, Any], previous: Dict[str, Any]) -> Dict[str, Any]:
+    """Cifrele lunii din outputs-ul run-full (aceleași reguli ca saveCurrentState din dashboard)."""
+    financial = outputs.get("financialData") or {}
+    customers = outputs.get("customerData") or {}
+    return {
+        "revenue": (financial.get("profit_loss") or {}).get("revenue") or 0,
+        "profit": (financial.get("profit_loss") or {}).get("net_profit") or 0,
+        "customers": customers.get("total_active_customers") or 0,
+        "cashBalance": (financial.get("cash_flow") or {}).get("closing_balance") or previous["cashBalance"],
+    }
+
+
+async def _run_full_month(
+    entry: Dict[str, Any],
+    request: SimulationBatchRequest,
+    month: int,
+    year: int,
+    agents: SimulationNextMonthResponse,
+    previous: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Lanțul financiar al unei luni (/api/simulation/run-full) pornind de la starea
+    lunii anterioare; events + trends vin deja calculate din fereastra batch-ului.
+    """
+    area_name = entry["area_name"] or "Unknown"
+    payload = {
+        "businessType": request.business_type,
+        "location": {
+            "address": area_name,
+            "neighborhood": area_name,
+            "lat": entry["latitude"],
+            "lng": entry["longitude"]
+        },
+        "currentMonth": month,
+        "currentYear": year,
+        # Gol -> deciziile implicite ale orchestratorului
+        "playerDecisions": request.player_decisions or None,
+        "previousMonthState": previous,
+        "eventsData": (agents.event or {}).get("event"),
+        "trendsAnalysis": (agents.trends or {}).get("analysis"),
+    }
+    response = await orchestrator_client.post(
+        "/api/simulation/run-full",
+        content=splice_json(payload, {"censusData": entry["census_bytes"]})
+    )
+    data = response.json()
+    if response.status_code != 200 or not data.get("success") or not data.get("outputs"):
+        raise RuntimeError(data.get("error") or f"run-full HTTP {response.status_code}")
+    return data["outputs"]
+
+
+async def _simulation_batch_events(request: SimulationBatchRequest, sse: bool):
+    """
+    Rulează request.months luni consecutive pe server. Apelurile events + trends
+    ale lunilor următoare (independente de luna curentă) pornesc în avans, într-o
+    fereastră de SIMULATION_BATCH_WINDOW luni; lanțul financiar (run-full) rulează
+    în ordine, fiecare lună pornind de la cifrele reale ale lunii anterioare, apoi
+    luna e salvată prin save_monthly_state și emisă imediat: month (xK), done (sau error).
+    """
+    started = time.perf_counter()
+    # Toate accesele la DB rulează în threadpool, fiecare cu sesiunea lui (_in_own_session)
+    tasks = []
+    try:
+        # Validează zona și încălzește cache-ul censusData înainte de fan-out
+        entry = await run_in_threadpool(_in_own_session, get_census_payload, request.area_id)
+        if not entry:
+            yield _format_stream_event("error", {"error": f"Area ID {request.area_id} nu a fost găsită"}, sse)
+            return
+        previous = await run_in_threadpool(
+            _in_own_session, SimulationStateService.get_batch_baseline,
+            request.session_id, request.start_month, request.start_year
+        )
+        next_month_speculator.invalidate(request.session_id)
+        
+        calendar = []
+        month, year = request.start_month, request.start_year
+        for _ in range(request.months):
+            calendar.append((month, year))
+            month, year = following_month(month, year)
+        
+        window = asyncio.Semaphore(SIMULATION_BATCH_WINDOW)
+        
+        async def run_month(month: int, year: int) -> SimulationNextMonthResponse:
+            async with window:
+                return await _generate_next_month(request.area_id, request.business_type, month, year)
+        
+        tasks = [asyncio.create_task(run_month(m, y)) for m, y in calendar]
+        
+        for index, ((month, year), task) in enumerate(zip(calendar, tasks), start=1):
+            result = await task
+            try:
+                if not _next_month_succeeded(result):
+                    raise RuntimeError(result.error or "Events agent failed")
+                outputs = await _run_full_month(entry, request, month, year, result, previous)
+            except Exception as e:
+                yield _format_stream_event("error", {
+                    "month": month,
+                    "year": year,
+                    "months_completed": index - 1,
+                    "error": str(e),
+                }, sse)
+                return
+            
+            previous = _month_financials(outputs, previous)
+            state = await run_in_threadpool(
+                _in_own_session,
+                SimulationStateService.save_monthly_state,
+                request.session_id,
+                month,
+                year,
+                previous["revenue"],
+                previous["profit"],
+                previous["customers"],
+                previous["cashBalance"],
+                outputs,
+                request.player_decisions
+            )
+            yield _format_stream_event("month", {
+                "index": index,
+                "month": month,
+                "year": year,
+                "data": outputs,
+                "state": state,
+            }, sse)
+        
+        yield _format_stream_event("done", {
+            "months_completed": len(calendar),
+            "elapsed_seconds": round(time.perf_counter() - started, 3),
+        }, sse)
+    
+    except Exception as e:
+        print(f"Eroare la simularea batch: {e}")
+        yield _format_stream_event("error", {"error": str(e)}, sse)
+    finally:
+        # Anularea ajunge și la apelurile către orchestrator din _generate_next_month
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+@app.post("/api/simulation/run-months")
+async def simulation_run_months(request: SimulationBatchRequest, format: str = "ndjson"):
+    """
+    Avansează o sesiune cu K luni într-o singură cerere (clase, testare de scenarii).
+    Răspunsul e un stream cu câte un eveniment per lună: NDJSON implicit, SSE cu ?format=sse.
+    """
+    if not 1 <= request.months <= SIMULATION_BATCH_MAX_MONTHS:
+        raise HTTPException(status_code=400, detail=f"months trebuie să fie între 1 și {SIMULATION_BATCH_MAX_MONTHS}")
+    if not 1 <= request.start_month <= 12:
+        raise HTTPException(status_code=400, detail="start_month trebuie să fie între 1 și 12")
+    
+    sse = format == "sse"
+    return StreamingResponse(
+        _simulation_batch_events(request, sse),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # ========================================
 # BUSINESS SURVIVAL ENDPOINTS
 # ========================================
 
+@app.post("/api/survival/reload")
+def reload_survival_data(db: Session = Depends(get_db)):
+    """
+    Rebuild the in-memory survival index now (a reloaded table is otherwise
+    picked up within SURVIVAL_INDEX_CHECK_SECONDS, see survival_index.py).
+    """
+    index = reload_survival_index(db)
+    return {"success": True, **index.stats()}
+
+
+@app.get("/api/survival/bundle")
+def get_survival_bundle(
+    business_type: str,
+    county: str = "New York County, New York",
+    limit: int = 5,
+    db: Session = Depends(get_db)
+):
+    """
+    Business type survival, county total, statistics, safest and riskiest
+    industries in one response (replaces four calls per simulation).
+    Missing parts are null instead of 404, like /api/business-survival/find.
+    
+    Example: /api/survival/bundle?business_type=coffee shop&county=New York County, New York
+    """
+    return survival_svc.get_survival_bundle(db, business_type, county, limit)
+
+
 @app.get("/api/survival/industry/{county_name}/{naics_code}")
 def get_industry_survival(
     county_name: str, 
@@ -910,6 +1086,50 @@ def get_lowest_survival_industries_endpoint(
     }
 
 
+@app.get("/api/survival/industries/search")
+def search_survival_industries(
+    q: str,
+    limit: int = 10,
+    db: Session = Depends(get_db)
+):
+    """
+    Fuzzy industry search (typo tolerant), ranked by trigram similarity.
+    
+    Example: /api/survival/industries/search?q=acommodation
+    """
+    return {
+        "query": q,
+        "matches": survival_svc.search_industries(db, q, limit)
+    }
+
+
+@app.get("/api/survival/ranks/{county_name}")
+def get_county_survival_ranks(
+    county_name: str,
+    naics_code: str = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Cross-county rank of a county's survival rates: rank, percentile among
+    counties, z-score vs the state mean and the firm-weighted state average.
+    
+    Example: /api/survival/ranks/Kings County, New York?naics_code=72
+    """
+    ranks = survival_svc.get_county_survival_ranks(db, county_name, naics_code)
+    
+    if not ranks:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No survival data found for {naics_code or 'any industry'} in {county_name}"
+        )
+    
+    return {
+        "county": county_name,
+        "ranks": ranks,
+        "count": len(ranks)
+    }
+
+
 @app.get("/api/survival/industry-comparison")
 def get_industry_comparison(
     naics_code: str = None,
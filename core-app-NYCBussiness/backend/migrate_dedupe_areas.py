@@ -0,0 +1,118 @@
+"""
+One-off (idempotent) migration: collapse duplicate area analyses.
+
+Before content-addressed reuse every /api/launch-business call inserted a new
+AreaOverview + DetailedAreaAnalysis pair, even for the same tract. This script:
+
+1. Fills area_overview.analysis_key for legacy rows
+2. Keeps the lowest id per analysis_key, records every other id in
+   area_overview_alias with its own coordinates (so saved area ids keep
+   resolving to the location that was launched) and re-points their
+   detailed analyses to the canonical row
+3. Keeps one detailed_area_analysis per (area_overview_id, analysis_year)
+4. Creates the unique indexes that keep the tables deduplicated
+
+Safe to run on every startup.
+"""
+
+import sys
+
+from sqlalchemy import text
+
+from database import engine, init_db
+from census_service import CENSUS_DATA_VINTAGE
+
+
+def migrate_dedupe_areas() -> bool:
+    print("🧹 Deduplicating area analyses...")
+
+    try:
+        with engine.begin() as conn:
+            # 1. Content key for legacy rows
+            filled = conn.execute(text("""
+                UPDATE area_overview
+                SET analysis_key = state_fips || county_fips || tract_fips || ':' || :vintage
+                WHERE analysis_key IS NULL AND tract_fips IS NOT NULL
+            """), {"vintage": CENSUS_DATA_VINTAGE}).rowcount
+
+            # 2. Map every duplicate id to the canonical (lowest) id of its key
+            conn.execute(text("""
+                CREATE TEMP TABLE area_dupes ON COMMIT DROP AS
+                SELECT a.id AS old_id, c.canonical_id
+                FROM area_overview a
+                JOIN (
+                    SELECT analysis_key, MIN(id) AS canonical_id
+                    FROM area_overview
+                    WHERE analysis_key IS NOT NULL
+                    GROUP BY analysis_key
+                    HAVING COUNT(*) > 1
+                ) c ON a.analysis_key = c.analysis_key
+                WHERE a.id <> c.canonical_id
+            """))
+
+            aliased = conn.execute(text("""
+                INSERT INTO area_overview_alias (old_id, canonical_id, created_at, latitude, longitude)
+                SELECT d.old_id, d.canonical_id, NOW(), a.latitude, a.longitude
+                FROM area_dupes d JOIN area_overview a ON a.id = d.old_id
+                ON CONFLICT (old_id) DO NOTHING
+            """)).rowcount
+
+            # Aliases that pointed at a row being collapsed now point at its canonical row
+            conn.execute(text("""
+                UPDATE area_overview_alias al
+                SET canonical_id = d.canonical_id
+                FROM area_dupes d
+                WHERE al.canonical_id = d.old_id
+            """))
+
+            conn.execute(text("""
+                UPDATE detailed_area_analysis da
+                SET area_overview_id = d.canonical_id
+                FROM area_dupes d
+                WHERE da.area_overview_id = d.old_id
+            """))
+
+            removed_areas = conn.execute(text("""
+                DELETE FROM area_overview WHERE id IN (SELECT old_id FROM area_dupes)
+            """)).rowcount
+
+            # 3. One detailed analysis per area and ACS year
+            removed_detailed = conn.execute(text("""
+                DELETE FROM detailed_area_analysis da
+                USING (
+                    SELECT area_overview_id, analysis_year, MIN(id) AS keep_id
+                    FROM detailed_area_analysis
+                    WHERE area_overview_id IS NOT NULL
+                    GROUP BY area_overview_id, analysis_year
+                    HAVING COUNT(*) > 1
+                ) k
+                WHERE da.area_overview_id = k.area_overview_id
+                  AND da.analysis_year IS NOT DISTINCT FROM k.analysis_year
+                  AND da.id <> k.keep_id
+            """)).rowcount
+
+            # 4. Keep it deduplicated from now on
+            conn.execute(text("""
+                CREATE UNIQUE INDEX IF NOT EXISTS uix_area_overview_analysis_key
+                ON area_overview (analysis_key)
+            """))
+            conn.execute(text("""
+                CREATE UNIQUE INDEX IF NOT EXISTS uix_detailed_area_year
+                ON detailed_area_analysis (area_overview_id, analysis_year)
+            """))
+
+        print(f"   🔑 Keys filled: {filled}")
+        print(f"   🔗 Aliases added: {aliased}")
+        print(f"   🗑️  Duplicate areas removed: {removed_areas}")
+        print(f"   🗑️  Duplicate detailed analyses removed: {removed_detailed}")
+        print("✅ Area deduplication completed")
+        return True
+
+    except Exception as e:
+        print(f"❌ Error during area deduplication: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    init_db()
+    sys.exit(0 if migrate_dedupe_areas() else 1)
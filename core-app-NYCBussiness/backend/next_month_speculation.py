@@ -0,0 +1,169 @@
+"""
+Speculative precomputation of the next simulated month.
+
+The dashboard saves the month the player is entering (M+1) and the next
+"Next Month" click asks for that same month (current_month=M+1). When
+/api/simulation/save-state persists month M with speculate=true, the events
++ trends orchestrator calls for month M are started in the background. The
+result is kept per session, so the following /api/simulation/next-month for
+the same (area, business type, month, year) returns as soon as the
+background task is done instead of waiting for the orchestrator from scratch.
+
+All methods must be called from the event loop thread.
+
+- At most SPECULATION_MAX_SESSIONS sessions are held (oldest evicted first)
+- Entries expire after SPECULATION_TTL_SECONDS
+- /api/simulation/revert and a re-save of the month with different player
+  decisions invalidate the session's entry (its task is cancelled)
+- Failed speculative runs are never served; next-month falls back to a
+  normal call
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+SPECULATION_MAX_SESSIONS = int(os.getenv("SPECULATION_MAX_SESSIONS", "256"))
+SPECULATION_TTL_SECONDS = float(os.getenv("SPECULATION_TTL_SECONDS", "900"))
+
+# (area_id, business_type, month, year)
+SpeculationKey = Tuple[int, str, int, int]
+
+
+def following_month(month: int, year: int) -> Tuple[int, int]:
+    return (1, year + 1) if month == 12 else (month + 1, year)
+
+
+def decisions_fingerprint(player_decisions: Optional[Dict[str, Any]]) -> str:
+    raw = json.dumps(player_decisions or {}, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _log_failure(task: asyncio.Task) -> None:
+    # Retrieves the exception, so dropped runs don't warn "never retrieved"
+    if not task.cancelled() and task.exception() is not None:
+        print(f"⚠️  {task.get_name()} failed: {task.exception()}")
+
+
+class NextMonthSpeculator:
+    """Bounded per-session store of in-flight / finished next-month runs."""
+
+    def __init__(self, max_sessions: int = SPECULATION_MAX_SESSIONS, ttl: float = SPECULATION_TTL_SECONDS):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.scheduled = 0
+        self.hits = 0
+        self.misses = 0
+        self.failed = 0
+        self.invalidated = 0
+        self.evicted = 0
+
+    def schedule(
+        self,
+        session_id: str,
+        key: SpeculationKey,
+        fingerprint: str,
+        run: Callable[[], Awaitable[Any]]
+    ) -> None:
+        """Start `run` for the session's next month, replacing any previous speculation."""
+        current = self._entries.get(session_id)
+        if current and current["key"] == key and current["fingerprint"] == fingerprint \
+                and not self._expired(current):
+            return
+
+        self.invalidate(session_id, count=current is not None)
+        task = asyncio.create_task(run(), name=f"speculate-{session_id}")
+        task.add_done_callback(_log_failure)
+        self._entries[session_id] = {
+            "key": key,
+            "fingerprint": fingerprint,
+            "created_at": time.monotonic(),
+            "task": task,
+        }
+        self.scheduled += 1
+
+        while len(self._entries) > self.max_sessions:
+            _, oldest = self._entries.popitem(last=False)
+            oldest["task"].cancel()
+            self.evicted += 1
+
+    def invalidate(self, session_id: str, count: bool = True) -> bool:
+        """Drop (and cancel) the session's speculation; True if there was one."""
+        entry = self._entries.pop(session_id, None)
+        if entry is None:
+            return False
+        entry["task"].cancel()
+        if count:
+            self.invalidated += 1
+        return True
+
+    async def take(
+        self,
+        session_id: Optional[str],
+        key: SpeculationKey,
+        is_success: Callable[[Any], bool]
+    ) -> Optional[Any]:
+        """
+        The speculative result for exactly this next-month request, waiting for
+        it if still running, or None (miss / expired / failed). An entry is
+        served at most once.
+        """
+        if not session_id:
+            return None
+
+        entry = self._entries.get(session_id)
+        if entry is None or entry["key"] != key or self._expired(entry):
+            if entry is not None:
+                self.invalidate(session_id)
+            self.misses += 1
+            return None
+
+        del self._entries[session_id]
+        try:
+            result = await asyncio.shield(entry["task"])
+        except asyncio.CancelledError:
+            if not entry["task"].cancelled():
+                raise
+            result = None
+        except Exception:
+            result = None
+
+        if result is None or not is_success(result):
+            self.failed += 1
+            return None
+
+        self.hits += 1
+        return result
+
+    def _expired(self, entry: Dict[str, Any]) -> bool:
+        return time.monotonic() - entry["created_at"] > self.ttl
+
+    def stats(self) -> Dict[str, Any]:
+        served = self.hits + self.misses + self.failed
+        return {
+            "sessions": len(self._entries),
+            "max_sessions": self.max_sessions,
+            "in_flight": sum(1 for e in self._entries.values() if not e["task"].done()),
+            "scheduled": self.scheduled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "failed": self.failed,
+            "invalidated": self.invalidated,
+            "evicted": self.evicted,
+            "hit_rate": round(self.hits / served, 4) if served else 0.0,
+        }
+
+    async def aclose(self) -> None:
+        tasks = [e["task"] for e in self._entries.values()]
+        self._entries.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+next_month_speculator = NextMonthSpeculator()
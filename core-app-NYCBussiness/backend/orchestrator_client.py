@@ -0,0 +1,179 @@
+"""
+Shared async HTTP client to the agents orchestrator (AGENTS_ORCHESTRATOR_URL).
+
+One httpx.AsyncClient lives for the whole app (opened and closed by the
+lifespan), so keep-alive connections and TLS sessions are reused across
+next-month calls instead of being rebuilt per request.
+
+- Pool limits and keep-alive expiry are tunable via env vars
+- HTTP/2 is opt-in (ORCHESTRATOR_HTTP2=true, needs the h2 package)
+- Each orchestrator route has its own timeout (AI routes read for long)
+- Requests wait for a pool slot through a semaphore sized like the pool,
+  which is what stats() reports as utilization and pool wait time
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+
+AGENTS_ORCHESTRATOR_URL = os.getenv("AGENTS_ORCHESTRATOR_URL", "http://localhost:3000")
+
+ORCHESTRATOR_MAX_CONNECTIONS = int(os.getenv("ORCHESTRATOR_MAX_CONNECTIONS", "50"))
+ORCHESTRATOR_MAX_KEEPALIVE = int(os.getenv("ORCHESTRATOR_MAX_KEEPALIVE", "20"))
+ORCHESTRATOR_KEEPALIVE_EXPIRY = float(os.getenv("ORCHESTRATOR_KEEPALIVE_EXPIRY", "30"))
+ORCHESTRATOR_HTTP2 = os.getenv("ORCHESTRATOR_HTTP2", "false").lower() == "true"
+ORCHESTRATOR_POOL_TIMEOUT = float(os.getenv("ORCHESTRATOR_POOL_TIMEOUT", "10"))
+
+DEFAULT_TIMEOUT = httpx.Timeout(connect=5.0, read=30.0, write=10.0, pool=ORCHESTRATOR_POOL_TIMEOUT)
+
+# Per-route timeouts: the agent routes wait on LLM calls
+ROUTE_TIMEOUTS = {
+    "/api/simulation/next-month": httpx.Timeout(
+        connect=5.0,
+        read=float(os.getenv("ORCHESTRATOR_EVENTS_READ_TIMEOUT", "60")),
+        write=10.0,
+        pool=ORCHESTRATOR_POOL_TIMEOUT,
+    ),
+    "/api/simulation/analyze-trends": httpx.Timeout(
+        connect=5.0,
+        read=float(os.getenv("ORCHESTRATOR_TRENDS_READ_TIMEOUT", "45")),
+        write=10.0,
+        pool=ORCHESTRATOR_POOL_TIMEOUT,
+    ),
+    # Full month chain: market context, suppliers, competition, customers, financials
+    "/api/simulation/run-full": httpx.Timeout(
+        connect=5.0,
+        read=float(os.getenv("ORCHESTRATOR_FULL_READ_TIMEOUT", "120")),
+        write=10.0,
+        pool=ORCHESTRATOR_POOL_TIMEOUT,
+    ),
+}
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class OrchestratorClient:
+    """Lifespan-scoped pooled client with per-route timeouts and pool metrics."""
+
+    def __init__(self, base_url: str = AGENTS_ORCHESTRATOR_URL):
+        self.base_url = base_url
+        self.max_connections = ORCHESTRATOR_MAX_CONNECTIONS
+        self.http2 = ORCHESTRATOR_HTTP2 and _http2_available()
+        self._client: Optional[httpx.AsyncClient] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._start_lock = asyncio.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.pool_waits = 0
+        self.pool_wait_total = 0.0
+        self.pool_wait_max = 0.0
+        self.routes: Dict[str, Dict[str, float]] = {}
+
+    async def start(self) -> None:
+        """Open the pooled client; a no-op if it is already open."""
+        if self._client is not None:
+            return
+        if ORCHESTRATOR_HTTP2 and not self.http2:
+            print("⚠️  ORCHESTRATOR_HTTP2=true but the h2 package is missing - using HTTP/1.1")
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=DEFAULT_TIMEOUT,
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=ORCHESTRATOR_MAX_KEEPALIVE,
+                keepalive_expiry=ORCHESTRATOR_KEEPALIVE_EXPIRY,
+            ),
+        )
+        self._slots = asyncio.Semaphore(self.max_connections)
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def post(self, path: str, json: Any = None, content: Optional[bytes] = None) -> httpx.Response:
+        """
+        POST to an orchestrator route with that route's timeout. `content` sends
+        an already serialized JSON body as-is (see area_service.splice_json).
+        """
+        if self._client is None:
+            # Used outside the app lifespan (scripts, tests): only one caller opens the client
+            async with self._start_lock:
+                await self.start()
+
+        route = self.routes.setdefault(path, {"requests": 0, "errors": 0, "latency_total": 0.0, "latency_max": 0.0})
+
+        wait_start = time.perf_counter()
+        try:
+            if self._slots.locked():
+                await asyncio.wait_for(self._slots.acquire(), timeout=ORCHESTRATOR_POOL_TIMEOUT)
+            else:
+                await self._slots.acquire()
+        except asyncio.TimeoutError:
+            route["errors"] += 1
+            raise httpx.PoolTimeout(f"Orchestrator pool exhausted ({self.max_connections} connections)")
+        waited = time.perf_counter() - wait_start
+        self.pool_waits += 1
+        self.pool_wait_total += waited
+        self.pool_wait_max = max(self.pool_wait_max, waited)
+
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        start = time.perf_counter()
+        try:
+            timeout = ROUTE_TIMEOUTS.get(path, DEFAULT_TIMEOUT)
+            if content is not None:
+                response = await self._client.post(path, content=content, headers=JSON_HEADERS, timeout=timeout)
+            else:
+                response = await self._client.post(path, json=json, timeout=timeout)
+            if response.status_code >= 500:
+                route["errors"] += 1
+            return response
+        except Exception:
+            route["errors"] += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            route["requests"] += 1
+            route["latency_total"] += elapsed
+            route["latency_max"] = max(route["latency_max"], elapsed)
+            self.in_flight -= 1
+            self._slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "base_url": self.base_url,
+            "http2": self.http2,
+            "max_connections": self.max_connections,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "utilization": round(self.in_flight / self.max_connections, 4),
+            "pool_wait_ms": {
+                "avg": round(self.pool_wait_total / self.pool_waits * 1000, 3) if self.pool_waits else 0.0,
+                "max": round(self.pool_wait_max * 1000, 3),
+            },
+            "routes": {
+                path: {
+                    "requests": int(r["requests"]),
+                    "errors": int(r["errors"]),
+                    "avg_latency_ms": round(r["latency_total"] / r["requests"] * 1000, 1) if r["requests"] else 0.0,
+                    "max_latency_ms": round(r["latency_max"] * 1000, 1),
+                }
+                for path, r in self.routes.items()
+            },
+        }
+
+
+orchestrator_client = OrchestratorClient()
@@ -0,0 +1,173 @@
+"""
+Bulk ACS ingest: loads every ACS_VARIABLES value for every NY census tract
+into the acs_tract_data table, so analyze_area_detailed never calls the ACS
+API at request time.
+
+Sources (first match wins):
+1. Local snapshot ny_acs_tracts_<year>.csv (offline runs)
+2. api.census.gov - one call per county with for=tract:* (needs CENSUS_API_KEY)
+
+After a network fetch the snapshot CSV is written next to this script so the
+next run can be offline.
+
+Derived statistics are precomputed for all tracts right after the load
+(acs_statistics.precompute_acs_statistics).
+
+Usage:
+    python populate_acs_data.py            # skip if the year is already loaded
+    python populate_acs_data.py --refresh  # reload even if rows exist
+"""
+
+import csv
+import os
+import sys
+from typing import Dict, List
+
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+
+from database import SessionLocal, AcsTractData, init_db
+from acs_statistics import precompute_acs_statistics
+from detailed_analysis_service import ACS_VARIABLES, ACS_YEAR, ACS_API_URL, fetch_acs_county_tracts
+from http_client import http_get
+
+load_dotenv()
+
+NY_STATE_FIPS = "36"
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def snapshot_path(year: str) -> str:
+    return os.path.join(SCRIPT_DIR, f"ny_acs_tracts_{year}.csv")
+
+
+def fetch_ny_county_codes(api_key: str, year: str) -> List[str]:
+    """List the 3-digit county FIPS codes for New York State."""
+    url = (
+        f"{ACS_API_URL.format(year=year)}"
+        f"?get=NAME&for=county:*&in=state:{NY_STATE_FIPS}&key={api_key}"
+    )
+    response = http_get(url)
+    response.raise_for_status()
+    data = response.json()
+    headers = data[0]
+    county_idx = headers.index("county")
+    return sorted(row[county_idx] for row in data[1:])
+
+
+def fetch_all_tracts(api_key: str, year: str) -> List[Dict[str, str]]:
+    """One ACS call per county, each returning every tract in that county."""
+    rows: List[Dict[str, str]] = []
+    counties = fetch_ny_county_codes(api_key, year)
+    print(f"🌐 Fetching ACS {year} for {len(counties)} NY counties...")
+
+    for county in counties:
+        county_rows = fetch_acs_county_tracts(NY_STATE_FIPS, county, api_key, year)
+        rows.extend(county_rows)
+        print(f"  ✅ County {county}: {len(county_rows)} tracts")
+
+    return rows
+
+
+def load_snapshot(path: str) -> List[Dict[str, str]]:
+    with open(path, "r", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def write_snapshot(path: str, rows: List[Dict[str, str]]) -> None:
+    fieldnames = list(ACS_VARIABLES.keys()) + ["state", "county", "tract"]
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"💾 Snapshot written to {path}")
+
+
+def store_rows(db: Session, rows: List[Dict[str, str]], year: str) -> int:
+    """Upsert rows keyed by (full_tract_id, acs_year)."""
+    existing = {
+        r.full_tract_id: r
+        for r in db.query(AcsTractData).filter(AcsTractData.acs_year == year).all()
+    }
+
+    stored = 0
+    for row in rows:
+        state, county, tract = row.get("state"), row.get("county"), row.get("tract")
+        if not (state and county and tract):
+            continue
+
+        full_tract_id = f"{state}{county}{tract}"
+        values = {code: row.get(code) for code in ACS_VARIABLES}
+
+        record = existing.get(full_tract_id)
+        if not record:
+            record = AcsTractData(full_tract_id=full_tract_id, acs_year=year)
+            db.add(record)
+            existing[full_tract_id] = record
+
+        record.state_fips = state
+        record.county_fips = county
+        record.tract_fips = tract
+        record.area_name = values.get("NAME")
+        record.acs_values = values
+        # New values: derived statistics are recomputed (precompute_acs_statistics)
+        record.stats_computed_at = None
+        stored += 1
+
+        if stored % 500 == 0:
+            db.commit()
+            print(f"  ✅ Stored {stored} tracts...")
+
+    db.commit()
+    return stored
+
+
+def populate_acs_data(year: str = ACS_YEAR, refresh: bool = False) -> bool:
+    print(f"📊 Starting ACS {year} tract data population...")
+
+    db: Session = SessionLocal()
+    try:
+        existing_count = db.query(AcsTractData).filter(AcsTractData.acs_year == year).count()
+        if existing_count > 0 and not refresh:
+            print(f"✅ acs_tract_data already contains {existing_count} tracts for {year} - skipping")
+            missing_stats = db.query(AcsTractData).filter(
+                AcsTractData.acs_year == year,
+                AcsTractData.stats_computed_at.is_(None)
+            ).count()
+            if missing_stats:
+                precompute_acs_statistics(db, year)
+            return True
+
+        path = snapshot_path(year)
+        if os.path.exists(path):
+            print(f"📂 Loading local snapshot: {path}")
+            rows = load_snapshot(path)
+        else:
+            api_key = os.getenv("CENSUS_API_KEY")
+            if not api_key or api_key == "CHEIA_TA_CENSUS_AICI":
+                print("❌ No local snapshot and CENSUS_API_KEY is missing - cannot load ACS data")
+                return False
+            rows = fetch_all_tracts(api_key, year)
+            write_snapshot(path, rows)
+
+        stored = store_rows(db, rows, year)
+        precompute_acs_statistics(db, year)
+
+        print("\n" + "=" * 60)
+        print(f"✅ ACS {year} population completed: {stored} tracts stored")
+        print("=" * 60)
+        return True
+
+    except Exception as e:
+        print(f"❌ Error during ACS population: {e}")
+        db.rollback()
+        return False
+
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    init_db()
+    ok = populate_acs_data(refresh="--refresh" in sys.argv)
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,92 @@
+"""
+Token-bucket rate limiter shared across requests.
+
+The bucket refills at `rate` tokens per second up to `capacity` (burst).
+acquire() blocks the calling worker thread, for calls made from executor
+threads; acquire_async() waits with asyncio.sleep, so event loop callers
+take their token before handing work to an executor instead of holding a
+worker thread just to wait. Both share one bucket (reservations are made
+under the same lock); pass a timeout (e.g. the caller's remaining
+deadline) to give up instead of waiting. release() gives back a token that
+was acquired but not used.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class TokenBucket:
+    """Thread-safe token bucket; waiters are served as tokens become available."""
+
+    def __init__(self, rate: float, capacity: float = 1.0, name: str = "default"):
+        self.rate = rate
+        self.capacity = capacity
+        self.name = name
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.acquired = 0
+        self.throttled = 0
+        self.timeouts = 0
+
+    def _reserve(self) -> float:
+        """Take one token (possibly going negative) and return how long to wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            self.acquired += 1
+            if self._tokens >= 0:
+                return 0.0
+            self.throttled += 1
+            return -self._tokens / self.rate
+
+    def _cancel(self) -> None:
+        # Give back a reserved token whose caller gave up waiting
+        self.release()
+        with self._lock:
+            self.timeouts += 1
+
+    def release(self) -> None:
+        """Return an acquired (or reserved) token that ended up unused."""
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + 1)
+            self.acquired -= 1
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Block until a token is available; False if it would take longer than timeout."""
+        wait = self._reserve()
+        if timeout is not None and wait > timeout:
+            self._cancel()
+            return False
+        if wait:
+            time.sleep(wait)
+        return True
+
+    async def acquire_async(self, timeout: Optional[float] = None) -> bool:
+        """acquire() for event loop callers: waits without blocking the loop or a worker thread."""
+        wait = self._reserve()
+        if timeout is not None and wait > timeout:
+            self._cancel()
+            return False
+        if wait:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                self.release()
+                raise
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "rate_per_second": self.rate,
+                "capacity": self.capacity,
+                "tokens": round(self._tokens, 3),
+                "acquired": self.acquired,
+                "throttled": self.throttled,
+                "timeouts": self.timeouts,
+            }
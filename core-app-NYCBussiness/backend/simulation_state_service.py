@@ -249,6 +249,27 @@ class SimulationStateService:
             "cashBalance": float(state.cash_balance)
         }
     
+    @staticmethod
+    def get_batch_baseline(db: Session, session_id: str, start_month: int, start_year: int) -> Dict:
+        """Financials carried into a batch run: previous month's state, or the session's initial budget"""
+        previous = SimulationStateService.get_previous_state(db, session_id, start_month, start_year)
+        if previous:
+            return previous
+        
+        session = db.query(SimulationSession).filter(
+            SimulationSession.id == uuid.UUID(session_id)
+        ).first()
+        
+        if not session:
+            raise ValueError(f"Session {session_id} not found")
+        
+        return {
+            "revenue": 0.0,
+            "profit": 0.0,
+            "customers": 0,
+            "cashBalance": float(session.initial_budget)
+        }
+    
     @staticmethod
     def get_session_history(db: Session, session_id: str) -> List[Dict]:
         """Get all monthly states for a session"""
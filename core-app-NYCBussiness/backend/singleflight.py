@@ -0,0 +1,147 @@
+"""
+Single-flight request coalescing.
+
+Concurrent callers asking for the same key share one in-flight execution:
+the first caller (leader) runs the function, every other caller waits for
+and receives the leader's result (or exception). Works across threads
+(do) and asyncio tasks (do_async), including mixed callers, because the
+shared slot is a concurrent.futures.Future. The one exception: a sync call
+made on an event loop thread never blocks on a do_async leader running on
+that same loop (it could never finish); it runs fn itself instead.
+
+The shared result is the same object for every caller: treat it as
+read-only and deep-copy it before changing anything nested.
+"""
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+_registry: Dict[str, "SingleFlight"] = {}
+
+
+class SingleFlight:
+    """Coalesce concurrent calls by key; only one upstream fetch runs per key."""
+
+    def __init__(self, name: str):
+        self.name = name
+        # key -> (shared future, event loop of an async leader / None for a sync leader)
+        self._calls: Dict[Hashable, Tuple[Future, Optional[asyncio.AbstractEventLoop]]] = {}
+        self._lock = threading.Lock()
+        self._tasks = set()
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.bypassed = 0
+        _registry[name] = self
+
+    def _join(self, key: Hashable, leader_loop=None, blocking_loop=None):
+        """
+        Return (future, is_leader) for key. A caller that would block
+        `blocking_loop` gets (None, False) when the in-flight leader runs on it.
+        """
+        with self._lock:
+            self.calls += 1
+            call = self._calls.get(key)
+            if call is not None:
+                fut, loop = call
+                if blocking_loop is not None and loop is blocking_loop:
+                    self.bypassed += 1
+                    return None, False
+                self.coalesced += 1
+                return fut, False
+            fut = Future()
+            self._calls[key] = (fut, leader_loop)
+            self.executions += 1
+            return fut, True
+
+    def _release(self, key: Hashable, fut: Future) -> None:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None and call[0] is fut:
+                del self._calls[key]
+
+    def _finish(self, key: Hashable, fut: Future, result: Any = None, error: BaseException = None) -> None:
+        if error is not None:
+            with self._lock:
+                self.errors += 1
+            fut.set_exception(error)
+        else:
+            fut.set_result(result)
+        self._release(key, fut)
+
+    def do(self, key: Hashable, fn: Callable, *args, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) once per key across threads; waiters share the result."""
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        fut, leader = self._join(key, blocking_loop=running_loop)
+        if fut is None:
+            # The leader needs this thread's loop to finish: waiting here would deadlock
+            return fn(*args, **kwargs)
+        if not leader:
+            return fut.result()
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            self._finish(key, fut, error=e)
+            raise
+        self._finish(key, fut, result=result)
+        return result
+
+    async def do_async(self, key: Hashable, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Async variant: fn may be a coroutine function (awaited) or a sync
+        function (run in the default executor so the loop is not blocked).
+
+        The leader's fn runs in its own task and every caller (leader included)
+        awaits the shared result through asyncio.shield, so cancelling one
+        caller (e.g. a disconnected stream) never cancels the group.
+        """
+        fut, leader = self._join(key, leader_loop=asyncio.get_running_loop())
+        if leader:
+            task = asyncio.create_task(self._lead_async(key, fut, fn, *args, **kwargs))
+            # Strong reference until done (otherwise the task can be garbage collected)
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        return await asyncio.shield(asyncio.wrap_future(fut))
+
+    async def _lead_async(self, key: Hashable, fut: Future, fn: Callable, *args, **kwargs) -> None:
+        try:
+            if asyncio.iscoroutinefunction(fn):
+                result = await fn(*args, **kwargs)
+            else:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(None, functools.partial(fn, *args, **kwargs))
+        except asyncio.CancelledError:
+            # Only the task itself was cancelled (loop shutdown): release the key, cancel the waiters
+            self._release(key, fut)
+            fut.cancel()
+            raise
+        except BaseException as e:
+            self._finish(key, fut, error=e)
+            return
+        self._finish(key, fut, result=result)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "errors": self.errors,
+                "bypassed": self.bypassed,
+                "in_flight": len(self._calls),
+            }
+
+
+def get_singleflight_stats() -> Dict[str, Dict[str, Any]]:
+    """Metrics for every SingleFlight group, keyed by group name."""
+    return {name: group.stats() for name, group in _registry.items()}
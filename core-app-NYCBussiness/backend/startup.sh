@@ -8,8 +8,14 @@ done
 
 python -c "from database import init_db; init_db(); print('Tables initialized')"
 
+python migrate_dedupe_areas.py || echo "Area deduplication failed - continuing with existing rows"
+
 python populate_census_data.py
 
 python populate_business_survival.py
 
+python populate_acs_data.py || echo "ACS bulk load failed - detailed analysis will fall back to the ACS API"
+
+python build_ny_boundaries.py || echo "Boundary files not built - geocoding will fall back to the Census API"
+
 exec uvicorn main:app --host 0.0.0.0 --port 8000 --reload
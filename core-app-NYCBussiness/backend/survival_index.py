@@ -0,0 +1,207 @@
+"""
+In-memory index over the business_survival table (NY BDS 2017-2022).
+
+The table is small (~1,240 static rows), so it is loaded once at startup into
+an immutable SurvivalIndex and every /api/survival/* lookup in
+business_survival_service is answered from memory instead of SQL:
+
+- Columnar NumPy arrays (county, label, naics, firms, survival %), row order = id
+- Per county: row positions presorted by survival rate (desc, "00" total excluded)
+  and the position of the "00" total row
+- (county, naics) and (county, label) -> row position hash maps,
+  naics -> rows across counties
+- A trigram index over the industry labels (trigram_index) for fuzzy search
+
+reload_survival_index() rebuilds the index from the DB and swaps it in
+atomically; hooks registered with register_reload_hook() run on every new
+index. The index remembers the table's data version (row count, max id):
+get_survival_index() re-checks it at most every SURVIVAL_INDEX_CHECK_SECONDS
+and reloads when it changed, so a populate_business_survival.py run (a
+separate process) reaches the server without POST /api/survival/reload.
+"""
+
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from database import BusinessSurvival, SessionLocal
+from trigram_index import TrigramIndex
+
+TOTAL_NAICS = "00"
+
+SURVIVAL_INDEX_CHECK_SECONDS = float(os.getenv("SURVIVAL_INDEX_CHECK_SECONDS", "30"))
+
+
+def _frozen(values, dtype) -> np.ndarray:
+    array = np.asarray(values, dtype=dtype)
+    array.setflags(write=False)
+    return array
+
+
+class SurvivalIndex:
+    """Immutable columnar snapshot of business_survival."""
+
+    def __init__(self, rows: List[tuple], version: Optional[tuple] = None):
+        # rows: (county_name, naics_industry_label, naics_code, firms_2017_start_pool, aggregate_5_year_survival_pct)
+        self.version = version
+        self.county = _frozen([r[0] for r in rows], object)
+        self.label = _frozen([r[1] for r in rows], object)
+        self.naics = _frozen([r[2] for r in rows], object)
+        self.firms = _frozen([r[3] for r in rows], np.int64)
+        self.rate = _frozen([r[4] for r in rows], np.float64)
+        self.loaded_at = time.time()
+
+        # (county, naics) / (county, label) -> primul rând (ordinea id, ca .first())
+        self.by_county_naics: Dict[tuple, int] = {}
+        self.by_county_label: Dict[tuple, int] = {}
+        for i, (county, naics, label) in enumerate(zip(self.county, self.naics, self.label)):
+            self.by_county_naics.setdefault((county, naics), i)
+            self.by_county_label.setdefault((county, label), i)
+
+        # Ordine stabilă: la rate egale rămâne ordinea id
+        order_desc = np.argsort(-self.rate, kind="stable")
+        self.county_sorted: Dict[str, np.ndarray] = {}
+        self.county_total: Dict[str, int] = {}
+        for county in dict.fromkeys(self.county):
+            members = order_desc[(self.county[order_desc] == county) & (self.naics[order_desc] != TOTAL_NAICS)]
+            self.county_sorted[county] = _frozen(members, np.int64)
+            total = self.by_county_naics.get((county, TOTAL_NAICS))
+            if total is not None:
+                self.county_total[county] = total
+
+        self.naics_sorted: Dict[str, np.ndarray] = {}
+        for code in dict.fromkeys(self.naics):
+            self.naics_sorted[code] = _frozen(order_desc[self.naics[order_desc] == code], np.int64)
+        self.order_desc = _frozen(order_desc, np.int64)
+
+        # Fuzzy industry label search (typo tolerant, similarity ranked)
+        self.label_search = TrigramIndex(self.label)
+
+    def __len__(self) -> int:
+        return len(self.rate)
+
+    def find(self, county_name: str, naics_code: Optional[str] = None) -> Optional[int]:
+        return self.by_county_naics.get((county_name, naics_code))
+
+    def find_label(self, county_name: str, label: str) -> Optional[int]:
+        return self.by_county_label.get((county_name, label))
+
+    def search_labels(self, text: str, limit: int = 10) -> List[Tuple[str, float]]:
+        """Industry labels similar to `text` as (label, similarity), best first."""
+        return self.label_search.search(text, limit)
+
+    def best_label(self, text: str) -> Optional[str]:
+        """The one industry label `text` clearly refers to (exact, else unambiguous fuzzy match)."""
+        if text in self.label_search.values:
+            return text
+        match = self.label_search.best_match(text)
+        return match[0] if match else None
+
+    def label_rows(self, labels: List[str]) -> np.ndarray:
+        """Mask of rows whose label is one of `labels`."""
+        return np.isin(self.label, labels)
+
+    def county_rows(self, county_name: str) -> np.ndarray:
+        """Industry rows of a county (no total), by survival rate desc."""
+        return self.county_sorted.get(county_name, np.empty(0, dtype=np.int64))
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "rows": len(self),
+            "counties": len(self.county_sorted),
+            "industries": len(self.naics_sorted),
+            "labels": len(self.label_search),
+            "loaded_at": self.loaded_at,
+            "version": list(self.version) if self.version else None,
+        }
+
+
+_lock = threading.Lock()
+_index: Optional[SurvivalIndex] = None
+_reload_hooks: List[Callable[[SurvivalIndex], None]] = []
+_checked_at = 0.0
+
+
+def survival_data_version(db: Session) -> tuple:
+    """(row count, max id) of business_survival: changes whenever the table is reloaded."""
+    count, max_id = db.query(func.count(BusinessSurvival.id), func.max(BusinessSurvival.id)).one()
+    return count, max_id
+
+
+def build_survival_index(db: Session) -> SurvivalIndex:
+    version = survival_data_version(db)
+    rows = db.query(
+        BusinessSurvival.county_name,
+        BusinessSurvival.naics_industry_label,
+        BusinessSurvival.naics_code,
+        BusinessSurvival.firms_2017_start_pool,
+        BusinessSurvival.aggregate_5_year_survival_pct,
+    ).order_by(BusinessSurvival.id).all()
+    return SurvivalIndex([tuple(r) for r in rows], version)
+
+
+def register_reload_hook(hook: Callable[[SurvivalIndex], None]) -> None:
+    """Run `hook(index)` for every newly loaded index (derived tables, caches)."""
+    _reload_hooks.append(hook)
+    if _index is not None:
+        hook(_index)
+
+
+def reload_survival_index(db: Optional[Session] = None) -> SurvivalIndex:
+    """Rebuild the index from the DB and swap it in."""
+    global _index, _checked_at
+    own_session = db is None
+    db = db or SessionLocal()
+    try:
+        index = build_survival_index(db)
+    finally:
+        if own_session:
+            db.close()
+
+    for hook in _reload_hooks:
+        hook(index)
+    with _lock:
+        _index = index
+        _checked_at = time.monotonic()
+
+    print(f"🏢 Survival index loaded: {len(index)} rows, {len(index.county_sorted)} counties")
+    return index
+
+
+def _is_current(index: SurvivalIndex, db: Optional[Session]) -> bool:
+    global _checked_at
+    if time.monotonic() - _checked_at < SURVIVAL_INDEX_CHECK_SECONDS:
+        return True
+    _checked_at = time.monotonic()
+
+    own_session = db is None
+    db = db or SessionLocal()
+    try:
+        return survival_data_version(db) == index.version
+    finally:
+        if own_session:
+            db.close()
+
+
+def get_survival_index(db: Optional[Session] = None) -> SurvivalIndex:
+    """Current index; loaded on first use if startup did not load it, reloaded when the table changed."""
+    index = _index
+    if index is None:
+        with _lock:
+            index = _index
+        if index is None:
+            index = reload_survival_index(db)
+    elif not _is_current(index, db):
+        print("🏢 business_survival changed since the index was loaded - reloading")
+        index = reload_survival_index(db)
+    return index
+
+
+def get_survival_index_stats() -> Dict[str, object]:
+    index = _index
+    return index.stats() if index is not None else {"rows": 0, "loaded": False}
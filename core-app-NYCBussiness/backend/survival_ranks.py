@@ -0,0 +1,93 @@
+"""
+Cross-county survival rank table, computed in one vectorized pass.
+
+For every (county, industry) row of the survival index:
+
+- rank / percentile of its 5-year survival rate among all counties with
+  that industry (percentile = share of counties below, ties counted half)
+- z-score versus the state mean of that industry
+- the state's firm-count-weighted average for that industry
+
+All groups are handled at once with np.bincount / np.searchsorted over the
+industry codes, no per-industry loop. The table is rebuilt from the survival
+index reload hook, i.e. at startup and on POST /api/survival/reload.
+"""
+
+import threading
+from typing import Dict, Optional
+
+import numpy as np
+
+from survival_index import SurvivalIndex, register_reload_hook
+
+
+class SurvivalRankTable:
+    """Per-row rank columns aligned with a SurvivalIndex."""
+
+    def __init__(self, index: SurvivalIndex):
+        self.index = index
+        rate = index.rate
+        firms = index.firms.astype(np.float64)
+
+        codes, group = np.unique(index.naics.astype(str), return_inverse=True)
+        size = np.bincount(group, minlength=len(codes))
+        total = np.bincount(group, weights=rate, minlength=len(codes))
+        squares = np.bincount(group, weights=rate * rate, minlength=len(codes))
+        firm_total = np.bincount(group, weights=firms, minlength=len(codes))
+        firm_weighted = np.bincount(group, weights=firms * rate, minlength=len(codes))
+
+        mean = total / size
+        std = np.sqrt(np.maximum(squares / size - mean * mean, 0.0))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            weighted = np.where(firm_total > 0, firm_weighted / firm_total, mean)
+
+        # Rates are percentages (0-100): group * 1000 + rate sorts by group, then rate
+        key = group * 1000.0 + rate
+        ordered = np.sort(key)
+        group_start = np.concatenate(([0], np.cumsum(size)[:-1]))
+        below = np.searchsorted(ordered, key, side="left") - group_start[group]
+        equal = np.searchsorted(ordered, key, side="right") - group_start[group] - below
+        above = size[group] - below - equal
+
+        peers = size[group] - 1
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.percentile = np.where(peers > 0, (below + 0.5 * (equal - 1)) / peers * 100.0, 100.0)
+            self.z_score = np.where(std[group] > 0, (rate - mean[group]) / std[group], 0.0)
+        self.rank = above + 1
+        self.counties = size[group]
+        self.state_mean = mean[group]
+        self.state_weighted_average = weighted[group]
+
+    def row(self, i: int) -> Dict[str, object]:
+        index = self.index
+        return {
+            "county": index.county[i],
+            "industry": index.label[i],
+            "naics_code": index.naics[i],
+            "survival_rate": float(index.rate[i]),
+            "firms_count": int(index.firms[i]),
+            "rank": int(self.rank[i]),
+            "counties": int(self.counties[i]),
+            "percentile": round(float(self.percentile[i]), 2),
+            "z_score": round(float(self.z_score[i]), 3),
+            "state_mean": round(float(self.state_mean[i]), 2),
+            "state_weighted_average": round(float(self.state_weighted_average[i]), 2),
+        }
+
+
+_lock = threading.Lock()
+_table: Optional[SurvivalRankTable] = None
+
+
+def rank_table_for(index: SurvivalIndex) -> SurvivalRankTable:
+    """Rank table of this index, built once per loaded index."""
+    global _table
+    table = _table
+    if table is None or table.index is not index:
+        table = SurvivalRankTable(index)
+        with _lock:
+            _table = table
+    return table
+
+
+register_reload_hook(rank_table_for)
@@ -0,0 +1,33 @@
+from unittest import mock
+
+from acs_statistics import derived_statistics_from_record, precompute_acs_statistics
+from database import AcsTractData
+
+FULL = {
+    "B01003_001E": "2000", "B17001_002E": "300",
+    "B19001_001E": "800", "B19001_013E": "50", "B19001_014E": "40", "B19001_015E": "30",
+    "B19001_016E": "20", "B19001_017E": "10",
+    "B15003_001E": "1500", "B15003_022E": "300", "B15003_023E": "100", "B15003_025E": "20",
+    "B25003_001E": "800", "B25003_003E": "600",
+    "B08301_001E": "1000", "B08301_021E": "150",
+}
+
+
+def test_rows_with_undefined_rates_are_still_marked_as_computed():
+    # Poverty inputs suppressed by the Census Bureau for the second tract
+    partial = {**FULL, "B17001_002E": None}
+    records = [
+        AcsTractData(full_tract_id="36081000100", acs_year="2021", acs_values=FULL),
+        AcsTractData(full_tract_id="36081000200", acs_year="2021", acs_values=partial),
+    ]
+    db = mock.MagicMock()
+    db.query.return_value.filter.return_value.order_by.return_value.all.return_value = records
+
+    assert derived_statistics_from_record(records[1]) is None
+    assert precompute_acs_statistics(db, "2021") == 2
+
+    stats = derived_statistics_from_record(records[1])
+    assert stats is not None
+    assert stats["poverty_rate"] is None
+    assert stats["renter_rate"] == 75.0
+    assert derived_statistics_from_record(records[0])["poverty_rate"] == 15.0
@@ -0,0 +1,94 @@
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+import area_service
+from database import AreaOverview, AreaOverviewAlias
+
+FIPS = {"state": "36", "county": "081", "tract": "014500"}
+
+
+def _launch(latitude, longitude, block=None):
+    census = {"latitude": latitude, "longitude": longitude, "area_name": "Astoria", "fips_codes": FIPS}
+    detailed = {"fips_codes": {**FIPS, "block": block}} if block else None
+    return census, detailed
+
+
+def _stored_area():
+    return AreaOverview(id=5, latitude=40.70, longitude=-73.90, area_name="Astoria",
+                        census_payload='{"area_name":"Astoria","latitude":40.7,"longitude":-73.9}')
+
+
+def test_reused_tract_gets_its_own_launch_with_the_launchers_location():
+    db = mock.MagicMock()
+    db.execute.return_value.scalar.return_value = 901
+    census, _ = _launch(40.76, -73.93)
+
+    with mock.patch.object(area_service, "_find_area", return_value=_stored_area()):
+        area, detailed, created, launch_id = area_service.get_or_create_area(db, census)
+
+    assert (area.id, detailed, created, launch_id) == (5, None, False, 901)
+    alias = db.add.call_args.args[0]
+    assert isinstance(alias, AreaOverviewAlias)
+    assert (alias.old_id, alias.canonical_id, alias.latitude, alias.longitude) == (901, 5, 40.76, -73.93)
+
+
+def test_launch_payload_carries_the_launch_coordinates_over_the_shared_tract_data():
+    db = mock.MagicMock()
+    db.query.return_value.filter.return_value.first.return_value = SimpleNamespace(
+        area_name="Astoria", latitude=40.70, longitude=-73.90, census_payload=_stored_area().census_payload
+    )
+    area_service._launches.clear()
+    area_service._payload_cache.clear()
+
+    with mock.patch.object(area_service, "resolve_launch", side_effect=lambda db, area_id: {
+        5: (5, None, None), 901: (5, 40.76, -73.93)
+    }[area_id]):
+        first = area_service.get_census_payload(db, 5)
+        launch = area_service.get_census_payload(db, 901)
+
+    assert (first["latitude"], first["longitude"]) == (40.70, -73.90)
+    assert (launch["area_id"], launch["latitude"], launch["longitude"]) == (5, 40.76, -73.93)
+    parsed = json.loads(launch["census_bytes"])
+    assert (parsed["area_name"], parsed["latitude"], parsed["longitude"]) == ("Astoria", 40.76, -73.93)
+    # The tract payload was read from the database once, for both launches
+    assert db.query.call_count == 1
+
+
+def test_integrity_error_without_a_winning_row_is_raised():
+    db = mock.MagicMock()
+    db.commit.side_effect = IntegrityError("INSERT", {}, Exception("null value in column latitude"))
+    census, _ = _launch(None, None)
+
+    with mock.patch.object(area_service, "_find_area", return_value=None), \
+            pytest.raises(IntegrityError):
+        area_service.get_or_create_area(db, census)
+    db.rollback.assert_called_once()
+
+
+def test_streamed_detailed_analysis_attaches_to_the_same_launch():
+    db = mock.MagicMock()
+    db.commit = mock.AsyncMock()
+    db.execute = mock.AsyncMock()
+    census, detailed = _launch(40.76, -73.93, block="2001")
+    detailed["year"] = "2021"
+    existing_detailed = SimpleNamespace(id=3)
+
+    async def go():
+        with mock.patch.object(area_service, "_find_area_async", mock.AsyncMock(return_value=_stored_area())), \
+                mock.patch.object(area_service, "_find_detailed_async",
+                                  mock.AsyncMock(return_value=existing_detailed)):
+            return await area_service.get_or_create_area_async(db, census, detailed, launch_id=901)
+
+    _, detailed_record, created, launch_id = asyncio.run(go())
+
+    assert (detailed_record, created, launch_id) == (existing_detailed, False, 901)
+    # No second launch row; the block lands on the existing one
+    db.add.assert_not_called()
+    statement = db.execute.call_args.args[0]
+    assert statement.table.name == "area_overview_alias"
+    assert statement.compile().params["block_fips"] == "2001"
@@ -0,0 +1,44 @@
+import pytest
+
+from business_type_classifier import BusinessTypeClassifier, TYPE_MAPPING
+
+BDS_LABELS = [
+    "Total for all sectors",
+    "Utilities",
+    "Construction",
+    "Manufacturing",
+    "Wholesale trade",
+    "Retail trade",
+    "Transportation and warehousing",
+    "Real estate and rental and leasing",
+    "Professional, scientific, and technical services",
+    "Administrative and support and waste management and remediation services",
+    "Educational services",
+    "Health care and social assistance",
+    "Arts, entertainment, and recreation",
+    "Accommodation and food services",
+    "Other services (except public administration)",
+]
+
+
+@pytest.fixture
+def classifier():
+    c = BusinessTypeClassifier(TYPE_MAPPING)
+    c.set_labels(BDS_LABELS)
+    return c
+
+
+@pytest.mark.parametrize("business_type", ["dog walking and grooming", "cleaning services", "trade school"])
+def test_generic_label_words_do_not_classify(classifier, business_type):
+    assert classifier.classify(business_type) == []
+
+
+@pytest.mark.parametrize("business_type, label", [
+    ("coffee shops", "Accommodation and food services"),
+    ("IT consulting", "Professional, scientific, and technical services"),
+    ("Utilities", "Utilities"),
+    ("fitness studio", "Arts, entertainment, and recreation"),
+    ("Real estate agency", "Real estate and rental and leasing"),
+])
+def test_best_candidate(classifier, business_type, label):
+    assert classifier.classify(business_type)[0][0] == label
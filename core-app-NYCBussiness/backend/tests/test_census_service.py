@@ -0,0 +1,48 @@
+import asyncio
+from unittest import mock
+
+import census_service
+import detailed_analysis_service
+
+
+def test_malformed_coordinates_are_not_found_instead_of_raising():
+    with mock.patch.object(census_service, "resolve_fips") as resolve, \
+            mock.patch.object(detailed_analysis_service, "resolve_fips") as resolve_detailed:
+        assert census_service.get_census_tract("abc", "-73.9") is None
+        assert census_service.get_census_tract("40.7", None) is None
+        assert census_service.analyze_area("nan", "-73.9") is None
+        assert detailed_analysis_service.get_full_geocoding("40.7", "") is None
+        assert detailed_analysis_service.analyze_area_detailed("40.7", "west") is None
+
+    resolve.assert_not_called()
+    resolve_detailed.assert_not_called()
+
+
+def test_numeric_strings_still_resolve():
+    fips = {"state": "36", "county": "081", "tract": "000100"}
+    with mock.patch.object(census_service, "resolve_fips", return_value=fips) as resolve:
+        assert census_service.get_census_tract(" 40.76 ", "-73.92") == fips
+    resolve.assert_called_once_with(40.76, -73.92)
+
+
+def test_coalesced_launches_do_not_share_nested_census_data():
+    fips = {"state": "36", "county": "081", "tract": "000100"}
+    shared = {"area_name": "Astoria", "demographics": {"B01001_001E": 4100}}
+
+    async def from_db(fips_codes):
+        await asyncio.sleep(0.01)
+        return shared
+
+    async def scenario():
+        return await asyncio.gather(
+            census_service.analyze_area_async("40.76", "-73.92", fips),
+            census_service.analyze_area_async("40.77", "-73.93", fips),
+        )
+
+    with mock.patch.object(census_service, "get_census_data_from_db_async", side_effect=from_db) as db_read:
+        first, second = asyncio.run(scenario())
+
+    assert db_read.call_count == 1
+    first["demographics"]["B01001_001E"] = 0
+    assert second["demographics"]["B01001_001E"] == 4100
+    assert shared["demographics"]["B01001_001E"] == 4100
@@ -0,0 +1,77 @@
+import asyncio
+from unittest import mock
+
+import pytest
+
+import main
+
+ENTRY = {"area_name": "Astoria", "latitude": 40.7, "longitude": -73.9, "census_bytes": b"{}"}
+
+
+def _patches(post, trends):
+    return [
+        mock.patch.object(main, "SessionLocal", mock.MagicMock),
+        mock.patch.object(main, "get_census_payload", return_value=ENTRY),
+        mock.patch.object(main, "get_seasonality", return_value=None),
+        mock.patch.object(main.orchestrator_client, "post", side_effect=post),
+        mock.patch.object(main, "analyze_business_trends_async", side_effect=trends),
+    ]
+
+
+def _run(post, trends, scenario):
+    patches = _patches(post, trends)
+    for p in patches:
+        p.start()
+    try:
+        return asyncio.run(scenario())
+    finally:
+        for p in patches:
+            p.stop()
+
+
+def test_events_call_is_cancelled_when_trends_fail():
+    events = {}
+
+    async def post(path, json=None, content=None):
+        events["started"] = True
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            events["cancelled"] = True
+            raise
+
+    async def trends(business_type, location):
+        await asyncio.sleep(0.01)
+        raise RuntimeError("trends down")
+
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            await main._generate_next_month(7, "coffee shop", 4, 2024)
+        # Already cancelled when the error propagates, not left for loop shutdown
+        assert events == {"started": True, "cancelled": True}
+
+    _run(post, trends, scenario)
+
+
+def test_cancelling_the_month_cancels_the_events_call():
+    events = {}
+
+    async def post(path, json=None, content=None):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            events[path] = "cancelled"
+            raise
+
+    async def trends(business_type, location):
+        await asyncio.sleep(10)
+
+    async def scenario():
+        task = asyncio.create_task(main._generate_next_month(7, "coffee shop", 4, 2024))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert events == {"/api/simulation/next-month": "cancelled"}
+
+    _run(post, trends, scenario)
@@ -0,0 +1,46 @@
+import asyncio
+from unittest import mock
+
+import httpx
+
+import http_client
+from http_client import AsyncHttpClient, HttpClient
+
+
+def test_retried_response_is_closed_before_the_next_attempt():
+    client = HttpClient(max_retries=2)
+    busy, ok = mock.Mock(status_code=503, headers={}), mock.Mock(status_code=200, headers={})
+    client.session = mock.Mock()
+    client.session.get.side_effect = [busy, ok]
+
+    with mock.patch.object(http_client, "_backoff_delay", return_value=0), \
+            mock.patch.object(HttpClient, "_backoff", return_value=0):
+        assert client.get("https://api.census.gov/data") is ok
+
+    busy.close.assert_called_once()
+    ok.close.assert_not_called()
+
+
+def test_async_retried_response_is_closed_before_the_next_attempt():
+    statuses = iter([503, 200])
+    closed = []
+    aclose = httpx.Response.aclose
+
+    async def tracked_aclose(response):
+        closed.append(response.status_code)
+        await aclose(response)
+
+    async def scenario():
+        client = AsyncHttpClient(max_retries=2)
+        client._client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(next(statuses))))
+        try:
+            return await client.get("https://api.census.gov/data")
+        finally:
+            await client.aclose()
+
+    with mock.patch.object(http_client, "_backoff_delay", return_value=0), \
+            mock.patch.object(httpx.Response, "aclose", tracked_aclose):
+        response = asyncio.run(scenario())
+
+    assert response.status_code == 200
+    assert 503 in closed and 200 not in closed
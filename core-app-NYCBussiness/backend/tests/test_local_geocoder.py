@@ -0,0 +1,90 @@
+import json
+import struct
+
+from build_ny_boundaries import LAYERS, shapefile_to_geojson
+from geocoding_service import LocalGeocoder
+
+# One Astoria-sized tract split into two blocks, with a hole (a park, counterclockwise) in the west block
+TRACT = [(-73.93, 40.76), (-73.93, 40.78), (-73.91, 40.78), (-73.91, 40.76), (-73.93, 40.76)]
+WEST = [(-73.93, 40.76), (-73.93, 40.78), (-73.92, 40.78), (-73.92, 40.76), (-73.93, 40.76)]
+PARK = [(-73.928, 40.765), (-73.922, 40.765), (-73.922, 40.768), (-73.928, 40.768), (-73.928, 40.765)]
+EAST = [(-73.92, 40.76), (-73.92, 40.78), (-73.91, 40.78), (-73.91, 40.76), (-73.92, 40.76)]
+
+
+def _shp(records):
+    """Minimal .shp bytes: Polygon records, each a list of rings (exterior clockwise)."""
+    body = b""
+    for number, rings in enumerate(records, 1):
+        points = [p for ring in rings for p in ring]
+        parts, start = [], 0
+        for ring in rings:
+            parts.append(start)
+            start += len(ring)
+        xs, ys = [x for x, _ in points], [y for _, y in points]
+        content = struct.pack("<i4d2i", 5, min(xs), min(ys), max(xs), max(ys), len(rings), len(points))
+        content += struct.pack(f"<{len(parts)}i", *parts)
+        content += struct.pack(f"<{2 * len(points)}d", *[c for p in points for c in p])
+        body += struct.pack(">ii", number, len(content) // 2) + content
+    header = struct.pack(">7i", 9994, 0, 0, 0, 0, 0, (100 + len(body)) // 2) + struct.pack("<2i", 1000, 5)
+    return header + b"\x00" * (100 - len(header)) + body
+
+
+def _dbf(fields, rows):
+    """Minimal dBASE III bytes with character fields."""
+    widths = [max(len(name), *(len(r[name]) for r in rows)) for name in fields]
+    record_len = 1 + sum(widths)
+    header_len = 32 + 32 * len(fields) + 1
+    data = struct.pack("<B3BIHH20x", 3, 24, 1, 1, len(rows), header_len, record_len)
+    for name, width in zip(fields, widths):
+        data += name.encode().ljust(11, b"\x00") + b"C" + b"\x00" * 4 + bytes([width, 0]) + b"\x00" * 14
+    data += b"\x0D"
+    for row in rows:
+        data += b" " + b"".join(row[name].encode().ljust(width) for name, width in zip(fields, widths))
+    return data + b"\x1A"
+
+
+def _write(path, collection):
+    path.write_text(json.dumps(collection))
+    return str(path)
+
+
+def _fixture_geocoder(tmp_path):
+    tract_props = LAYERS["tracts"][3]
+    block_props = LAYERS["blocks"][3]
+    tracts = shapefile_to_geojson(
+        _shp([[TRACT]]),
+        _dbf(tract_props, [dict(zip(tract_props, ["36", "081", "014500"]))]),
+        tract_props,
+    )
+    blocks = shapefile_to_geojson(
+        _shp([[WEST, PARK], [EAST]]),
+        _dbf(block_props, [dict(zip(block_props, ["36", "081", "014500", b])) for b in ("1000", "2000")]),
+        block_props,
+    )
+    return LocalGeocoder(_write(tmp_path / "tracts.geojson", tracts), _write(tmp_path / "blocks.geojson", blocks))
+
+
+def test_tiger_shapefile_converts_to_geojson_the_geocoder_reads(tmp_path):
+    geocoder = _fixture_geocoder(tmp_path)
+
+    assert geocoder.lookup_tract(40.77, -73.915) == {"state": "36", "county": "081", "tract": "014500"}
+    assert geocoder.lookup_block(40.775, -73.925) == {
+        "state": "36", "county": "081", "tract": "014500", "block": "1000",
+        "full_tract_id": "36081014500", "full_block_id": "360810145001000",
+    }
+    assert geocoder.lookup_block(40.77, -73.915)["block"] == "2000"
+
+
+def test_points_outside_the_fixture_polygons_are_not_found(tmp_path):
+    geocoder = _fixture_geocoder(tmp_path)
+
+    # Inside the park (a hole of the west block), next to the tract, outside NY
+    assert geocoder.lookup_block(40.766, -73.925) is None
+    assert geocoder.lookup_tract(40.77, -73.90) is None
+    assert geocoder.lookup_tract(34.05, -118.24) is None
+
+
+def test_missing_boundary_files_leave_the_geocoder_unavailable(tmp_path):
+    geocoder = LocalGeocoder(str(tmp_path / "none.geojson"), str(tmp_path / "none.geojson"))
+    assert not geocoder.has_tracts() and not geocoder.has_blocks()
+    assert geocoder.lookup_tract(40.77, -73.915) is None
@@ -0,0 +1,108 @@
+import asyncio
+from unittest import mock
+
+import httpx
+
+import main
+from next_month_speculation import NextMonthSpeculator
+
+
+def _save_body(month, year, decisions=None, speculate=True):
+    # Shape sent by the dashboard's saveMonthlyState, plus the opt-in fields
+    return {
+        "session_id": "00000000-0000-0000-0000-000000000001",
+        "month": month,
+        "year": year,
+        "revenue": 1000.0,
+        "profit": 100.0,
+        "customers": 50,
+        "cash_balance": 9000.0,
+        "agent_outputs": {},
+        "player_decisions": decisions or {"price": 5},
+        "speculate": speculate,
+        "area_id": 7,
+        "business_type": "coffee shop",
+    }
+
+
+def _next_month_body(month, year):
+    # Shape sent by the dashboard's handleNextMonth, plus session_id
+    return {
+        "area_id": 7,
+        "business_type": "coffee shop",
+        "current_month": month,
+        "current_year": year,
+        "session_id": "00000000-0000-0000-0000-000000000001",
+    }
+
+
+def _run(scenario):
+    calls = []
+
+    async def fake_generate(area_id, business_type, month, year):
+        calls.append((area_id, business_type, month, year))
+        await asyncio.sleep(0.05)
+        return main.SimulationNextMonthResponse(success=True, event={"month": month}, trends=None)
+
+    speculator = NextMonthSpeculator()
+    patches = [
+        mock.patch.object(main, "_generate_next_month", fake_generate),
+        mock.patch.object(main, "next_month_speculator", speculator),
+        mock.patch.object(main, "SessionLocal", mock.MagicMock),
+        mock.patch.object(main.SimulationStateService, "save_monthly_state",
+                          staticmethod(lambda db, sid, month, year, *a: {"month": month, "year": year})),
+        mock.patch.object(main.SimulationStateService, "revert_to_month",
+                          staticmethod(lambda db, sid, month, year: {"success": True})),
+    ]
+    for p in patches:
+        p.start()
+    main.app.dependency_overrides[main.get_db] = lambda: mock.MagicMock()
+    try:
+        async def go():
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                await scenario(client, speculator, calls)
+        asyncio.run(go())
+    finally:
+        main.app.dependency_overrides.clear()
+        for p in patches:
+            p.stop()
+
+
+def test_save_state_then_next_month_hits_speculation():
+    async def scenario(client, speculator, calls):
+        # After simulating month 3 the dashboard saves month 4, then asks next-month for month 4
+        assert (await client.post("/api/simulation/save-state", json=_save_body(4, 2024))).status_code == 200
+        response = await client.post("/api/simulation/next-month", json=_next_month_body(4, 2024))
+
+        assert response.json()["event"] == {"month": 4}
+        assert speculator.hits == 1
+        assert calls == [(7, "coffee shop", 4, 2024)]
+
+    _run(scenario)
+
+
+def test_revert_invalidates_speculation():
+    async def scenario(client, speculator, calls):
+        await client.post("/api/simulation/save-state", json=_save_body(12, 2024))
+        await client.post("/api/simulation/revert", params={
+            "session_id": "00000000-0000-0000-0000-000000000001", "target_month": 2, "target_year": 2024
+        })
+        await client.post("/api/simulation/next-month", json=_next_month_body(12, 2024))
+
+        assert speculator.hits == 0
+        assert speculator.invalidated == 1
+
+    _run(scenario)
+
+
+def test_changed_decisions_replace_speculation():
+    async def scenario(client, speculator, calls):
+        await client.post("/api/simulation/save-state", json=_save_body(5, 2024, {"price": 5}))
+        await client.post("/api/simulation/save-state", json=_save_body(5, 2024, {"price": 6}))
+        await client.post("/api/simulation/next-month", json=_next_month_body(5, 2024))
+
+        assert speculator.invalidated == 1
+        assert speculator.hits == 1
+
+    _run(scenario)
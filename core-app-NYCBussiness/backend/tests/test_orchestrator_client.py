@@ -0,0 +1,30 @@
+import asyncio
+from unittest import mock
+
+import httpx
+
+import orchestrator_client
+from orchestrator_client import OrchestratorClient
+
+
+def test_concurrent_first_posts_open_one_client():
+    real_client = httpx.AsyncClient
+    created = []
+
+    def make_client(**kwargs):
+        kwargs.pop("http2", None)
+        client = real_client(transport=httpx.MockTransport(lambda request: httpx.Response(200, json={})), **kwargs)
+        created.append(client)
+        return client
+
+    async def scenario():
+        client = OrchestratorClient("http://orchestrator.test")
+        responses = await asyncio.gather(*(client.post("/api/simulation/next-month", json={}) for _ in range(5)))
+        await client.aclose()
+        return responses
+
+    with mock.patch.object(orchestrator_client.httpx, "AsyncClient", side_effect=make_client):
+        responses = asyncio.run(scenario())
+
+    assert [r.status_code for r in responses] == [200] * 5
+    assert len(created) == 1
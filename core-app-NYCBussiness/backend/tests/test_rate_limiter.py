@@ -0,0 +1,50 @@
+import asyncio
+import time
+
+from rate_limiter import TokenBucket
+
+
+def test_async_waiters_are_paced_without_blocking_the_loop():
+    bucket = TokenBucket(rate=20, capacity=1)
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        tick_task = asyncio.create_task(ticker())
+        started = time.monotonic()
+        assert all(await asyncio.gather(*(bucket.acquire_async() for _ in range(3))))
+        elapsed = time.monotonic() - started
+        tick_task.cancel()
+        return elapsed, ticks
+
+    elapsed, ticks = asyncio.run(scenario())
+
+    # 1 burst token + 2 at 20/s: ~0.1s, during which the loop kept running
+    assert elapsed >= 0.09
+    assert ticks > 5
+    assert bucket.stats()["throttled"] == 2
+
+
+def test_async_timeout_and_cancellation_give_the_token_back():
+    bucket = TokenBucket(rate=1, capacity=1)
+
+    async def scenario():
+        assert await bucket.acquire_async()
+        assert not await bucket.acquire_async(timeout=0.01)
+        waiter = asyncio.create_task(bucket.acquire_async())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+
+    asyncio.run(scenario())
+
+    stats = bucket.stats()
+    assert (stats["acquired"], stats["timeouts"]) == (1, 1)
+    # Only the first token is spent: the next one is ~1s away, not ~3s
+    assert stats["tokens"] > -0.1
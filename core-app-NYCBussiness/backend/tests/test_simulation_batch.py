@@ -0,0 +1,158 @@
+import asyncio
+import json
+import threading
+from unittest import mock
+
+import httpx
+
+import main
+
+BODY = {
+    "session_id": "00000000-0000-0000-0000-000000000001",
+    "area_id": 7,
+    "business_type": "coffee shop",
+    "start_month": 11,
+    "start_year": 2024,
+    "months": 3,
+}
+BASELINE = {"revenue": 0.0, "profit": 0.0, "customers": 0, "cashBalance": 50000.0}
+# post() below shadows the json module with its json= argument
+_loads = json.loads
+ENTRY = {"area_name": "Astoria", "latitude": 40.7, "longitude": -73.9, "census_bytes": b"{}"}
+
+
+def _run_full_response(payload):
+    # The orchestrator's financial chain: each month builds on previousMonthState
+    previous = payload["previousMonthState"]
+    revenue = 1000.0 * payload["currentMonth"]
+    profit = revenue / 10
+    return {
+        "success": True,
+        "outputs": {
+            "eventsData": payload["eventsData"],
+            "trendsData": payload["trendsAnalysis"],
+            "customerData": {"total_active_customers": previous["customers"] + 10},
+            "financialData": {
+                "profit_loss": {"revenue": revenue, "net_profit": profit},
+                "cash_flow": {"closing_balance": previous["cashBalance"] + profit},
+            },
+        },
+    }
+
+
+def _run_batch(post, body=BODY):
+    sessions = []
+    census_calls = []
+    saved = []
+
+    def session_factory():
+        session = mock.MagicMock(name=f"session-{len(sessions)}")
+        sessions.append(session)
+        return session
+
+    def get_census_payload(db, area_id):
+        census_calls.append((db, threading.get_ident()))
+        return ENTRY
+
+    def save_monthly_state(db, sid, month, year, revenue, profit, customers, cash, outputs, decisions):
+        saved.append((month, year, revenue, profit, customers, cash))
+        return {"month": month, "year": year}
+
+    async def trends(business_type, location):
+        return {"success": True}
+
+    async def go():
+        loop_thread = threading.get_ident()
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/api/simulation/run-months", json=body)
+        return loop_thread, [json.loads(line) for line in response.text.splitlines()]
+
+    with mock.patch.object(main, "SessionLocal", side_effect=session_factory), \
+            mock.patch.object(main, "get_census_payload", side_effect=get_census_payload), \
+            mock.patch.object(main.orchestrator_client, "post", side_effect=post), \
+            mock.patch.object(main, "analyze_business_trends_async", side_effect=trends), \
+            mock.patch.object(main, "get_seasonality", return_value=None), \
+            mock.patch.object(main.SimulationStateService, "get_batch_baseline",
+                              staticmethod(lambda db, sid, month, year: dict(BASELINE))), \
+            mock.patch.object(main.SimulationStateService, "save_monthly_state", staticmethod(save_monthly_state)):
+        loop_thread, events = asyncio.run(go())
+    return loop_thread, events, sessions, census_calls, saved
+
+
+def _orchestrator(run_full=_run_full_response):
+    async def post(path, json=None, content=None):
+        await asyncio.sleep(0.01)
+        if path == "/api/simulation/run-full":
+            return httpx.Response(200, json=run_full(_loads(content)))
+        if path == "/api/simulation/analyze-trends":
+            return httpx.Response(200, json={"success": True, "analysis": {"momentum": "stable"}})
+        return httpx.Response(200, json={"success": True, "event": {"name": "heatwave"}})
+    return post
+
+
+def test_batch_carries_each_months_real_financials_forward():
+    _, events, _, _, saved = _run_batch(_orchestrator())
+
+    assert [e["event"] for e in events] == ["month", "month", "month", "done"]
+    assert [(e["month"], e["year"]) for e in events[:3]] == [(11, 2024), (12, 2024), (1, 2025)]
+    assert saved == [
+        (11, 2024, 11000.0, 1100.0, 10, 51100.0),
+        (12, 2024, 12000.0, 1200.0, 20, 52300.0),
+        (1, 2025, 1000.0, 100.0, 30, 52400.0),
+    ]
+    # Precomputed agent outputs are handed to the financial chain
+    assert events[0]["data"]["eventsData"] == {"name": "heatwave"}
+    assert events[0]["data"]["trendsData"] == {"momentum": "stable"}
+
+
+def test_failed_financial_chain_saves_nothing_for_that_month():
+    def run_full(payload):
+        if payload["currentMonth"] == 12:
+            return {"success": False, "error": "financial agent down"}
+        return _run_full_response(payload)
+
+    _, events, _, _, saved = _run_batch(_orchestrator(run_full))
+
+    assert [e["event"] for e in events] == ["month", "error"]
+    assert events[1]["months_completed"] == 1
+    assert events[1]["error"] == "financial agent down"
+    assert [s[:2] for s in saved] == [(11, 2024)]
+
+
+def test_batch_months_use_their_own_sessions_off_the_event_loop():
+    loop_thread, events, sessions, census_calls, _ = _run_batch(_orchestrator())
+
+    assert events[-1]["event"] == "done"
+    # Validation + one load per month, each with a fresh session, none on the event loop thread
+    assert len(census_calls) == 4
+    assert len({id(db) for db, _ in census_calls}) == 4
+    assert all(thread != loop_thread for _, thread in census_calls)
+    assert all(session.close.called for session in sessions)
+
+
+def test_stopping_the_batch_cancels_the_pending_agent_calls():
+    cancelled = []
+    ok = _orchestrator()
+
+    async def post(path, json=None, content=None):
+        month = _loads(content)["currentMonth"]
+        if path == "/api/simulation/run-full":
+            return httpx.Response(200, json={"success": False, "error": "financial agent down"})
+        if month == 11:
+            return await ok(path, content=content)
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append((path, month))
+            raise
+
+    _, events, _, _, saved = _run_batch(post)
+
+    assert [e["event"] for e in events] == ["error"]
+    assert saved == []
+    # Both agent calls of the months still in flight, cancelled before the response ends
+    assert sorted(cancelled) == [
+        ("/api/simulation/analyze-trends", 1), ("/api/simulation/analyze-trends", 12),
+        ("/api/simulation/next-month", 1), ("/api/simulation/next-month", 12),
+    ]
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def test_leader_cancelled_while_waiter_pending():
+    async def scenario():
+        flight = SingleFlight("test-cancel-leader")
+        started = asyncio.Event()
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            started.set()
+            await asyncio.sleep(0.05)
+            return "tract-data"
+
+        leader = asyncio.create_task(flight.do_async("tract", fetch))
+        await started.wait()
+        waiter = asyncio.create_task(flight.do_async("tract", fetch))
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+
+        assert await waiter == "tract-data"
+        assert calls == 1
+        assert flight.stats()["in_flight"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_waiter_cancelled_does_not_affect_leader():
+    async def scenario():
+        flight = SingleFlight("test-cancel-waiter")
+
+        async def fetch():
+            await asyncio.sleep(0.05)
+            return 42
+
+        leader = asyncio.create_task(flight.do_async("k", fetch))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(flight.do_async("k", fetch))
+        await asyncio.sleep(0)
+        waiter.cancel()
+
+        assert await leader == 42
+
+    asyncio.run(scenario())
+
+
+def test_errors_are_shared():
+    async def scenario():
+        flight = SingleFlight("test-errors")
+
+        async def fetch():
+            await asyncio.sleep(0.01)
+            raise ValueError("upstream down")
+
+        results = await asyncio.gather(
+            flight.do_async("k", fetch), flight.do_async("k", fetch), return_exceptions=True
+        )
+        assert all(isinstance(r, ValueError) for r in results)
+        assert flight.stats()["executions"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_sync_call_on_the_loop_thread_does_not_wait_for_an_async_leader():
+    async def scenario():
+        flight = SingleFlight("test-sync-on-loop")
+        started = asyncio.Event()
+
+        async def fetch():
+            started.set()
+            await asyncio.sleep(0.05)
+            return "tract-data"
+
+        leader = asyncio.create_task(flight.do_async("tract", fetch))
+        await started.wait()
+
+        # Blocking on the leader here would stall the loop it needs to finish
+        assert flight.do("tract", lambda: "own-data") == "own-data"
+        assert await leader == "tract-data"
+        assert flight.stats()["bypassed"] == 1
+
+    asyncio.run(scenario())
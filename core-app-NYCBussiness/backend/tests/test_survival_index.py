@@ -0,0 +1,45 @@
+import time
+from unittest import mock
+
+import survival_index
+from survival_index import SurvivalIndex
+
+ROWS = [
+    ("Kings County, New York", "Total", "00", 1000, 50.0),
+    ("Kings County, New York", "Food Services", "722", 200, 40.0),
+]
+
+
+def test_a_reloaded_table_replaces_the_index_without_the_reload_endpoint():
+    table = {"rows": ROWS[:1], "version": (1, 1)}
+    db = mock.MagicMock()
+
+    def build(db):
+        return SurvivalIndex(table["rows"], table["version"])
+
+    with mock.patch.object(survival_index, "build_survival_index", side_effect=build), \
+            mock.patch.object(survival_index, "survival_data_version", side_effect=lambda db: table["version"]), \
+            mock.patch.object(survival_index, "SURVIVAL_INDEX_CHECK_SECONDS", 0), \
+            mock.patch.object(survival_index, "_index", None):
+        first = survival_index.get_survival_index(db)
+        assert survival_index.get_survival_index(db) is first
+
+        # populate_business_survival.py cleared and re-inserted the table
+        table.update(rows=ROWS, version=(2, 3))
+        reloaded = survival_index.get_survival_index(db)
+
+    assert reloaded is not first
+    assert len(reloaded) == 2
+    assert reloaded.stats()["version"] == [2, 3]
+
+
+def test_version_is_checked_at_most_once_per_interval():
+    index = SurvivalIndex(ROWS, (2, 2))
+    with mock.patch.object(survival_index, "survival_data_version", return_value=(2, 2)) as version, \
+            mock.patch.object(survival_index, "SURVIVAL_INDEX_CHECK_SECONDS", 3600), \
+            mock.patch.object(survival_index, "_checked_at", time.monotonic() - 7200), \
+            mock.patch.object(survival_index, "_index", index):
+        for _ in range(5):
+            assert survival_index.get_survival_index(mock.MagicMock()) is index
+
+    assert version.call_count == 1
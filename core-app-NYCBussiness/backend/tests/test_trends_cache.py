@@ -0,0 +1,37 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from unittest import mock
+
+import trends_cache
+
+
+def _stale_entry():
+    fetched_at = datetime.utcnow() - timedelta(seconds=trends_cache.TRENDS_CACHE_TTL_SECONDS + 60)
+    return trends_cache._entry({"success": True, "value": "old"}, fetched_at)
+
+
+def test_stale_hits_submit_one_refresh_per_key_to_the_executor():
+    release = threading.Event()
+    fetches = []
+
+    def fetch():
+        fetches.append(1)
+        release.wait(5)
+        return {"success": True, "value": "new"}
+
+    executor = ThreadPoolExecutor(max_workers=2)
+    entry = _stale_entry()
+    with mock.patch.object(trends_cache._memory_cache, "get", return_value=entry), \
+            mock.patch.object(trends_cache, "_remember"), \
+            mock.patch.object(trends_cache, "_db_put"), \
+            mock.patch.object(executor, "submit", wraps=executor.submit) as submit:
+        first = trends_cache.get_cached_trends(["cafe"], "US-NY", "today 1-m", fetch, executor)
+        second = trends_cache.get_cached_trends(["cafe"], "US-NY", "today 1-m", fetch, executor)
+        release.set()
+        executor.shutdown(wait=True)
+
+    assert first["cache"]["status"] == second["cache"]["status"] == "stale"
+    assert submit.call_count == 1
+    assert fetches == [1]
+    assert not trends_cache._refreshing
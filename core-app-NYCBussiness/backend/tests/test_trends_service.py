@@ -0,0 +1,112 @@
+import asyncio
+import time
+from unittest import mock
+
+import pandas as pd
+
+import trends_service
+from rate_limiter import TokenBucket
+
+INDEX = pd.to_datetime(["2026-10-15", "2026-10-16"])
+
+
+def _pytrends():
+    client = mock.Mock()
+    client.related_queries.return_value = {}
+    client.trending_searches.side_effect = RuntimeError("offline")
+    return client
+
+
+def test_batch_results_are_renormalized_per_type():
+    service = trends_service.TrendsService()
+    service._pytrends = _pytrends()
+    # The second payload's anchor is half the first's, so its keywords are doubled onto the common scale
+    service._pytrends.interest_over_time.side_effect = [
+        pd.DataFrame({"restaurant": [50.0, 50.0], "coffee shop": [40.0, 60.0], "cafe": [30.0, 20.0],
+                      "specialty coffee": [10.0, 10.0], "espresso": [5.0, 5.0]}, index=INDEX),
+        pd.DataFrame({"restaurant": [25.0, 25.0], "gym": [80.0, 100.0], "fitness": [50.0, 50.0],
+                      "workout": [10.0, 10.0], "yoga": [5.0, 5.0]}, index=INDEX),
+    ]
+
+    results = service.get_batch_business_trends(["coffee", "fitness"], "US-NY")
+
+    fitness = results["fitness"]
+    assert fitness["trends"]["peak_interest"] == 100
+    assert fitness["trends"]["keywords_performance"]["gym"]["average_interest"] == 90.0
+    # Value on the common (anchor) scale = value / type_scale
+    assert fitness["normalization"]["type_scale"] == 0.5
+    assert results["coffee"]["trends"]["peak_interest"] == 100
+
+
+def test_fetch_stops_at_the_deadline_instead_of_running_on():
+    client = _pytrends()
+    built = []
+
+    def update_series(keywords, geo, fetch, history_days, seed):
+        time.sleep(0.1)  # The caller's deadline passes while the window payload is stored
+        fetch(keywords, "2026-05-01 2026-09-07")
+        return 2
+
+    client.build_payload.side_effect = lambda *args, **kwargs: built.append(kwargs["timeframe"])
+    client.interest_over_time.return_value = pd.DataFrame()
+
+    with mock.patch.object(trends_service.TrendsService, "pytrends", new_callable=mock.PropertyMock, return_value=client), \
+            mock.patch.object(trends_service, "google_trends_limiter", TokenBucket(100, 10)), \
+            mock.patch.object(trends_service, "update_series", side_effect=update_series), \
+            mock.patch.object(trends_service, "get_cached_trends", side_effect=lambda k, g, t, fetch, executor: fetch()):
+        result = trends_service.analyze_business_trends("cafe", "US-NY", deadline_at=time.monotonic() + 0.05)
+
+    assert not result["success"]
+    assert "deadline" in result["error"]
+    assert built == ["today 1-m"]
+
+
+class _CountingBucket(TokenBucket):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.blocking_waits = 0
+
+    def acquire(self, timeout=None):
+        self.blocking_waits += 1
+        return super().acquire(timeout)
+
+
+def _analyze_async(limiter, need_fetch, get_cached_trends):
+    fetched = []
+
+    def get_business_trends(self, business_type, location, timeframe, before_request):
+        before_request()
+        fetched.append(business_type)
+        return {"success": True, "business_type": business_type}
+
+    with mock.patch.object(trends_service, "google_trends_limiter", limiter), \
+            mock.patch.object(trends_service, "trends_need_fetch", return_value=need_fetch), \
+            mock.patch.object(trends_service, "get_fresh_trends_from_memory", return_value=None), \
+            mock.patch.object(trends_service, "get_cached_trends", side_effect=get_cached_trends), \
+            mock.patch.object(trends_service.TrendsService, "get_business_trends", get_business_trends):
+        result = asyncio.run(trends_service.analyze_business_trends_async("cafe", "US-NY"))
+    return result, fetched
+
+
+def test_a_miss_waits_for_its_google_token_on_the_loop():
+    limiter = _CountingBucket(rate=20, capacity=1)
+    limiter.acquire()  # Bucket empty: the request has to wait ~50ms
+    limiter.blocking_waits = 0
+
+    result, fetched = _analyze_async(limiter, True, lambda k, g, t, fetch, executor: fetch())
+
+    assert result["success"] and fetched == ["cafe"]
+    # The token was taken with acquire_async before the job reached trends_executor
+    assert limiter.blocking_waits == 0
+    assert limiter.stats()["acquired"] == 2
+
+
+def test_a_token_prepaid_for_a_fetch_that_never_happens_is_refunded():
+    limiter = _CountingBucket(rate=1, capacity=1)
+    cached = {"success": True, "business_type": "cafe", "cache": {"status": "hit"}}
+
+    result, fetched = _analyze_async(limiter, True, lambda k, g, t, fetch, executor: dict(cached))
+
+    assert result["cache"]["status"] == "hit" and fetched == []
+    assert limiter.stats()["acquired"] == 0
+    assert limiter.stats()["tokens"] == 1
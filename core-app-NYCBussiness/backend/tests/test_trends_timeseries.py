@@ -0,0 +1,92 @@
+from datetime import date, timedelta
+from unittest import mock
+
+import pandas as pd
+
+import trends_service
+from trends_timeseries import TRENDS_MAX_WINDOW_DAYS, TRENDS_OVERLAP_DAYS, plan_fetch_windows
+
+TODAY = date(2026, 10, 17)
+
+
+def _covered_in_order(ranges, windows):
+    """Every window must overlap days already on the stored scale when it is fetched."""
+    covered = set()
+    for stored in ranges.values():
+        if stored:
+            first, last = stored
+            covered.update(first + timedelta(days=i) for i in range((last - first).days + 1))
+    for start, end in windows:
+        days = {start + timedelta(days=i) for i in range((end - start).days + 1)}
+        assert len(days) <= TRENDS_MAX_WINDOW_DAYS
+        assert not covered or covered & days, (start, end)
+        covered |= days
+    return covered
+
+
+def test_up_to_date_series_fetches_nothing():
+    ranges = {"cafe": (TODAY - timedelta(days=400), TODAY - timedelta(days=1))}
+    assert plan_fetch_windows(ranges, TODAY, history_days=365) == []
+
+
+def test_missing_tail_starts_at_overlap():
+    ranges = {"cafe": (TODAY - timedelta(days=400), TODAY - timedelta(days=10))}
+    windows = plan_fetch_windows(ranges, TODAY, history_days=365)
+    assert windows == [(TODAY - timedelta(days=10 + TRENDS_OVERLAP_DAYS), TODAY)]
+
+
+def test_longer_history_backfills_head_through_overlap():
+    first = TODAY - timedelta(days=30)
+    ranges = {"cafe": (first, TODAY - timedelta(days=1)), "bar": (first, TODAY - timedelta(days=1))}
+    windows = plan_fetch_windows(ranges, TODAY, history_days=1100)
+
+    assert windows[0][1] == first + timedelta(days=TRENDS_OVERLAP_DAYS)
+    assert windows[-1][0] == TODAY - timedelta(days=1100)
+    covered = _covered_in_order(ranges, windows)
+    assert TODAY - timedelta(days=1100) in covered
+
+
+def test_head_and_tail_both_overlap_stored_days():
+    ranges = {"cafe": (TODAY - timedelta(days=300), TODAY - timedelta(days=20))}
+    windows = plan_fetch_windows(ranges, TODAY, history_days=700)
+    covered = _covered_in_order(ranges, windows)
+    assert TODAY in covered and TODAY - timedelta(days=700) in covered
+
+
+def test_new_keyword_backfills_newest_first():
+    ranges = {"cafe": (TODAY - timedelta(days=100), TODAY - timedelta(days=1)), "espresso": None}
+    windows = plan_fetch_windows(ranges, TODAY, history_days=1100)
+    assert windows[0][1] == TODAY
+    covered = _covered_in_order(ranges, windows)
+    assert TODAY - timedelta(days=1100) in covered
+
+
+def test_business_trends_fetch_the_window_once_and_renormalize_the_series():
+    service = trends_service.TrendsService()
+    service._pytrends = mock.Mock()
+    window = pd.DataFrame({"cafe": [40.0, 100.0]}, index=pd.to_datetime(["2026-10-15", "2026-10-16"]))
+    service._pytrends.interest_over_time.return_value = window
+    service._pytrends.related_queries.return_value = {}
+    service._pytrends.trending_searches.side_effect = RuntimeError("offline")
+    # Stored series drifted above 100 through overlap rescaling
+    stored = pd.DataFrame({"cafe": [60.0, 150.0]}, index=window.index)
+    tokens = []
+    seeds = []
+
+    def update_series(keywords, geo, fetch, history_days, seed):
+        seeds.append(seed)
+        fetch(keywords, "2026-05-01 2026-09-07")  # A missing head chunk
+        return 2
+
+    with mock.patch.object(trends_service, "update_series", side_effect=update_series), \
+            mock.patch.object(trends_service, "read_series", return_value=stored):
+        result = service.get_business_trends("cafe", "US-NY", before_request=lambda: tokens.append(1))
+
+    assert result["success"]
+    # The requested window (interest + related queries) is one payload and seeds the series
+    timeframes = [call.kwargs["timeframe"] for call in service._pytrends.build_payload.call_args_list]
+    assert timeframes == ["today 1-m", "2026-05-01 2026-09-07"]
+    assert seeds == [window]
+    assert len(tokens) == 2
+    assert result["trends"]["peak_interest"] == 100
+    assert result["trends"]["keywords_performance"]["cafe"]["average_interest"] == 70.0
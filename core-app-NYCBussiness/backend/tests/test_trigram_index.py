@@ -0,0 +1,40 @@
+import pytest
+
+from trigram_index import TrigramIndex
+
+LABELS = [
+    "Accommodation and food services",
+    "Educational services",
+    "Other services (except public administration)",
+    "Health care and social assistance",
+    "Manufacturing",
+    "Real estate and rental and leasing",
+]
+
+
+@pytest.fixture
+def index():
+    return TrigramIndex(LABELS)
+
+
+@pytest.mark.parametrize("query, label", [
+    ("acommodation", "Accommodation and food services"),
+    ("helth care", "Health care and social assistance"),
+    ("manufactur", "Manufacturing"),
+])
+def test_typos_resolve(index, query, label):
+    assert index.best_match(query)[0] == label
+
+
+@pytest.mark.parametrize("query", ["xyz services", "cleaning services", "services"])
+def test_one_common_word_is_not_an_answer(index, query):
+    assert index.best_match(query) is None
+
+
+def test_search_ranks_by_word_score(index):
+    results = index.search("services")
+    assert {label for label, _ in results} == {
+        "Accommodation and food services",
+        "Educational services",
+        "Other services (except public administration)",
+    }
@@ -0,0 +1,273 @@
+"""
+Google Trends result cache.
+
+Trends data changes at most daily, while every uncached call costs three
+Google round trips (interest_over_time, related_queries, trending_searches)
+and risks a 429. Results are cached by (keywords, geo, timeframe) in an
+in-process LRU in front of the trends_cache table:
+
+- fresh (age < TRENDS_CACHE_TTL_SECONDS): served directly
+- stale (within TRENDS_CACHE_STALE_SECONDS after that): served directly while
+  one background refresh per key runs on the caller's executor
+  (stale-while-revalidate)
+- expired / missing: fetched synchronously; concurrent misses share one fetch
+
+Only successful results are cached, so a Google error is retried next time.
+"""
+
+import json
+import os
+import threading
+from concurrent.futures import Executor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from database import SessionLocal, TrendsCache
+from ttl_cache import TTLCache, MISSING
+from singleflight import SingleFlight
+
+TRENDS_CACHE_TTL_SECONDS = int(os.getenv("TRENDS_CACHE_TTL_SECONDS", str(12 * 3600)))
+TRENDS_CACHE_STALE_SECONDS = int(os.getenv("TRENDS_CACHE_STALE_SECONDS", str(48 * 3600)))
+TRENDS_CACHE_MAXSIZE = int(os.getenv("TRENDS_CACHE_MAXSIZE", "512"))
+
+_memory_cache = TTLCache(
+    maxsize=TRENDS_CACHE_MAXSIZE,
+    ttl=TRENDS_CACHE_TTL_SECONDS + TRENDS_CACHE_STALE_SECONDS,
+)
+
+# Concurrent misses / refreshes for the same key share one Google fetch
+trends_flight = SingleFlight("trends")
+
+_refreshing = set()
+_stats_lock = threading.Lock()
+_stats = {
+    "fresh_hits": 0,
+    "stale_hits": 0,
+    "db_hits": 0,
+    "misses": 0,
+    "refreshes": 0,
+    "fetch_errors": 0,
+}
+
+
+def _count(name: str) -> None:
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def make_trends_key(keywords: List[str], geo: str, timeframe: str) -> str:
+    """Cache key: "<keyword1,keyword2,...>|<geo>|<timeframe>" (lowercased)."""
+    return f"{','.join(k.strip().lower() for k in keywords)}|{geo.upper()}|{timeframe.lower()}"
+
+
+def _jsonable(payload: Dict[str, Any]) -> Dict[str, Any]:
+    # pandas/numpy scalars (e.g. related query values) -> plain JSON types for the JSON column
+    return json.loads(json.dumps(payload, default=lambda v: v.item() if hasattr(v, "item") else str(v)))
+
+
+def _entry(payload: Dict[str, Any], fetched_at: datetime) -> Dict[str, Any]:
+    return {
+        "payload": _jsonable(payload),
+        "fetched_at": fetched_at,
+        "fresh_until": fetched_at + timedelta(seconds=TRENDS_CACHE_TTL_SECONDS),
+        "stale_until": fetched_at + timedelta(seconds=TRENDS_CACHE_TTL_SECONDS + TRENDS_CACHE_STALE_SECONDS),
+    }
+
+
+def _remember(key: str, entry: Dict[str, Any]) -> None:
+    ttl = (entry["stale_until"] - datetime.utcnow()).total_seconds()
+    if ttl > 0:
+        _memory_cache.set(key, entry, ttl=ttl)
+
+
+def _db_get(key: str) -> Any:
+    db = SessionLocal()
+    try:
+        row = db.query(TrendsCache).filter(TrendsCache.cache_key == key).first()
+        if not row or row.stale_until < datetime.utcnow():
+            return MISSING
+        return {
+            "payload": row.payload,
+            "fetched_at": row.fetched_at,
+            "fresh_until": row.fresh_until,
+            "stale_until": row.stale_until,
+        }
+    except Exception as e:
+        print(f"⚠️  Trends cache read failed: {e}")
+        return MISSING
+    finally:
+        db.close()
+
+
+def _db_put(key: str, keywords: List[str], geo: str, timeframe: str, entry: Dict[str, Any]) -> None:
+    db = SessionLocal()
+    try:
+        row = db.query(TrendsCache).filter(TrendsCache.cache_key == key).first()
+        if not row:
+            row = TrendsCache(cache_key=key, keywords=keywords, geo=geo, timeframe=timeframe)
+            db.add(row)
+        row.payload = entry["payload"]
+        row.fetched_at = entry["fetched_at"]
+        row.fresh_until = entry["fresh_until"]
+        row.stale_until = entry["stale_until"]
+        db.commit()
+    except Exception as e:
+        # Unique violation from a concurrent writer or missing table - cache is best effort
+        db.rollback()
+        print(f"⚠️  Trends cache write failed: {e}")
+    finally:
+        db.close()
+
+
+def _fetch_and_store(
+    key: str,
+    keywords: List[str],
+    geo: str,
+    timeframe: str,
+    fetch: Callable[[], Dict[str, Any]]
+) -> Dict[str, Any]:
+    """Run the Google fetch; the entry is cached only if the fetch succeeded."""
+    payload = fetch()
+    if not payload or not payload.get("success"):
+        _count("fetch_errors")
+        return {"payload": payload, "fetched_at": None}
+
+    entry = _entry(payload, datetime.utcnow())
+    _remember(key, entry)
+    _db_put(key, keywords, geo, timeframe, entry)
+    return entry
+
+
+def _refresh_in_background(
+    key: str,
+    keywords: List[str],
+    geo: str,
+    timeframe: str,
+    fetch: Callable,
+    executor: Executor
+) -> None:
+    """Submit one refresh per key to `executor`; stale hits for a key already refreshing submit nothing."""
+    with _stats_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+        _stats["refreshes"] += 1
+
+    def run():
+        try:
+            trends_flight.do(key, _fetch_and_store, key, keywords, geo, timeframe, fetch)
+        except Exception as e:
+            print(f"⚠️  Trends background refresh failed for {key}: {e}")
+        finally:
+            with _stats_lock:
+                _refreshing.discard(key)
+
+    try:
+        executor.submit(run)
+    except RuntimeError:
+        # Executor shut down (app stopping): keep serving the stale entry
+        with _stats_lock:
+            _refreshing.discard(key)
+
+
+def _with_cache_info(entry: Dict[str, Any], status: str) -> Dict[str, Any]:
+    result = dict(entry["payload"])
+    result["cache"] = {
+        "status": status,
+        "fetched_at": entry["fetched_at"].isoformat() if entry.get("fetched_at") else None,
+    }
+    return result
+
+
+def get_cached_trends(
+    keywords: List[str],
+    geo: str,
+    timeframe: str,
+    fetch: Callable[[], Dict[str, Any]],
+    refresh_executor: Executor
+) -> Dict[str, Any]:
+    """
+    Return the trends payload for (keywords, geo, timeframe), calling
+    `fetch()` (the uncached Google request) only on a miss or expiry;
+    stale-while-revalidate refreshes run on `refresh_executor`.
+    The result carries a "cache" field (hit, stale or miss); failed
+    fetches are returned as-is and not cached.
+    """
+    key = make_trends_key(keywords, geo, timeframe)
+    now = datetime.utcnow()
+
+    entry = _memory_cache.get(key)
+    if entry is MISSING:
+        entry = _db_get(key)
+        if entry is not MISSING:
+            _count("db_hits")
+            _remember(key, entry)
+
+    if entry is not MISSING:
+        if now < entry["fresh_until"]:
+            _count("fresh_hits")
+            return _with_cache_info(entry, "hit")
+        if now < entry["stale_until"]:
+            _count("stale_hits")
+            _refresh_in_background(key, keywords, geo, timeframe, fetch, refresh_executor)
+            return _with_cache_info(entry, "stale")
+
+    _count("misses")
+    entry = trends_flight.do(key, _fetch_and_store, key, keywords, geo, timeframe, fetch)
+    if entry["fetched_at"] is None:
+        return entry["payload"]
+    return _with_cache_info(entry, "miss")
+
+
+def get_fresh_trends_from_memory(keywords: List[str], geo: str, timeframe: str) -> Optional[Dict[str, Any]]:
+    """Fresh in-memory hit only (no DB, no fetch) - safe to call on the event loop."""
+    key = make_trends_key(keywords, geo, timeframe)
+    entry = _memory_cache.get(key)
+    if entry is MISSING or datetime.utcnow() >= entry["fresh_until"]:
+        return None
+    _count("fresh_hits")
+    return _with_cache_info(entry, "hit")
+
+
+def trends_fresh_for(keywords: List[str], geo: str, timeframe: str) -> float:
+    """Seconds until the cached result stops being fresh (0 if missing or stale)."""
+    key = make_trends_key(keywords, geo, timeframe)
+    entry = _memory_cache.get(key)
+    if entry is MISSING:
+        entry = _db_get(key)
+        if entry is MISSING:
+            return 0.0
+        _remember(key, entry)
+    return max(0.0, (entry["fresh_until"] - datetime.utcnow()).total_seconds())
+
+
+def trends_need_fetch(keywords: List[str], geo: str, timeframe: str) -> bool:
+    """True when get_cached_trends() would call Google synchronously (missing or expired)."""
+    key = make_trends_key(keywords, geo, timeframe)
+    entry = _memory_cache.get(key)
+    if entry is MISSING:
+        entry = _db_get(key)
+        if entry is MISSING:
+            return True
+        _remember(key, entry)
+    return datetime.utcnow() >= entry["stale_until"]
+
+
+def store_trends(keywords: List[str], geo: str, timeframe: str, payload: Dict[str, Any]) -> None:
+    """Cache an already fetched successful result (batch refresh)."""
+    key = make_trends_key(keywords, geo, timeframe)
+    entry = _entry(payload, datetime.utcnow())
+    _remember(key, entry)
+    _db_put(key, keywords, geo, timeframe, entry)
+
+
+def get_trends_cache_stats() -> Dict[str, Any]:
+    with _stats_lock:
+        counters = dict(_stats)
+        counters["refreshing"] = len(_refreshing)
+    return {
+        "ttl_seconds": TRENDS_CACHE_TTL_SECONDS,
+        "stale_seconds": TRENDS_CACHE_STALE_SECONDS,
+        **counters,
+        "memory": _memory_cache.stats(),
+    }
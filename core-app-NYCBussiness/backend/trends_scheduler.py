@@ -0,0 +1,200 @@
+"""
+Background Google Trends prefetch.
+
+Keeps trends_cache warm for every category in BUSINESS_KEYWORDS_MAP and every
+geo in TRENDS_PREFETCH_GEOS, so /api/get-trends and next-month calls for the
+known categories are served from cache instead of fetching on the hot path.
+
+Each cycle re-fetches only the entries that would stop being fresh before the
+next cycle, batched per geo into shared anchor-normalized payloads
+(refresh_business_trends_batch) on trends_executor and through the shared
+google_trends_limiter, so the scheduler never competes with user requests
+for more than one Google slot. The first token of every job is awaited on
+the event loop (run_with_prepaid_token), so a job waiting for its turn does
+not hold a trends_executor thread. The same categories' daily series in
+trends_timeseries are backfilled / extended afterwards, and the in-memory
+seasonality index (trends_seasonality) is rebuilt from them after every
+cycle. Started and stopped by the app lifespan.
+"""
+
+import asyncio
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from trends_service import (
+    BUSINESS_KEYWORDS_MAP,
+    GoogleTrendsTokens,
+    business_trends_fresh_for,
+    refresh_business_trends_batch,
+    run_with_prepaid_token,
+    trends_executor,
+    update_business_series,
+)
+from trends_seasonality import rebuild_seasonality
+
+TRENDS_PREFETCH_ENABLED = os.getenv("TRENDS_PREFETCH_ENABLED", "true").lower() == "true"
+TRENDS_PREFETCH_INTERVAL_SECONDS = int(os.getenv("TRENDS_PREFETCH_INTERVAL_SECONDS", str(6 * 3600)))
+TRENDS_PREFETCH_GEOS = [g.strip() for g in os.getenv("TRENDS_PREFETCH_GEOS", "US-NY").split(",") if g.strip()]
+TRENDS_PREFETCH_SPACING_SECONDS = float(os.getenv("TRENDS_PREFETCH_SPACING_SECONDS", "5"))
+TRENDS_PREFETCH_START_DELAY_SECONDS = float(os.getenv("TRENDS_PREFETCH_START_DELAY_SECONDS", "10"))
+
+
+class TrendsPrefetchScheduler:
+    """Periodic asyncio task refreshing trends for (category, geo) pairs."""
+
+    def __init__(
+        self,
+        categories: List[str],
+        geos: List[str],
+        interval: float = TRENDS_PREFETCH_INTERVAL_SECONDS,
+        spacing: float = TRENDS_PREFETCH_SPACING_SECONDS,
+    ):
+        self.categories = categories
+        self.geos = geos
+        self.interval = interval
+        self.spacing = spacing
+        self._task: Optional[asyncio.Task] = None
+        self.cycles = 0
+        self.last_cycle_started: Optional[datetime] = None
+        self.last_cycle_finished: Optional[datetime] = None
+        self.next_cycle_at: Optional[datetime] = None
+        self.entries: Dict[str, Dict[str, Any]] = {
+            f"{category}|{geo}": {
+                "category": category,
+                "geo": geo,
+                "last_refresh": None,
+                "last_error": None,
+                "refreshes": 0,
+                "skipped": 0,
+                "failures": 0,
+                "consecutive_failures": 0,
+                "series_failures": 0,
+            }
+            for category in categories for geo in geos
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, delay: float = TRENDS_PREFETCH_START_DELAY_SECONDS) -> None:
+        if not self.running:
+            self._task = asyncio.create_task(self._run(delay), name="trends-prefetch")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        # Seasonality din seriile deja stocate, înainte de primul refresh
+        await self.rebuild_seasonality()
+        while True:
+            await self.run_cycle()
+            await self.rebuild_seasonality()
+            self.next_cycle_at = datetime.utcnow() + timedelta(seconds=self.interval)
+            await asyncio.sleep(self.interval)
+
+    async def run_cycle(self) -> None:
+        loop = asyncio.get_running_loop()
+        self.last_cycle_started = datetime.utcnow()
+        print(f"🔄 Trends prefetch: {len(self.entries)} category/geo pairs")
+
+        for geo in self.geos:
+            entries = [e for e in self.entries.values() if e["geo"] == geo]
+
+            # Refresh only what would go stale before the next cycle
+            due = []
+            for entry in entries:
+                fresh_for = await loop.run_in_executor(
+                    trends_executor, business_trends_fresh_for, entry["category"], geo
+                )
+                if fresh_for > self.interval:
+                    entry["skipped"] += 1
+                else:
+                    due.append(entry)
+
+            if not due:
+                continue
+
+            # Toate categoriile scadente într-un singur set de payload-uri partajate
+            try:
+                results = await run_with_prepaid_token(
+                    refresh_business_trends_batch, [e["category"] for e in due], geo,
+                    tokens=GoogleTrendsTokens(max_wait=None)
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                results = {entry["category"]: {"success": False, "error": str(e)} for entry in due}
+
+            for entry in due:
+                self._record(entry, results.get(entry["category"]))
+
+            # Seria zilnică (trends_timeseries): backfill TRENDS_HISTORY_DAYS, apoi doar coada lipsă
+            for entry in due:
+                try:
+                    await run_with_prepaid_token(
+                        update_business_series, entry["category"], geo, tokens=GoogleTrendsTokens(max_wait=None)
+                    )
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    entry["series_failures"] += 1
+                    print(f"⚠️  Trends series update failed for {entry['category']} ({geo}): {e}")
+
+            await asyncio.sleep(self.spacing)
+
+        self.cycles += 1
+        self.last_cycle_finished = datetime.utcnow()
+
+    async def rebuild_seasonality(self) -> None:
+        loop = asyncio.get_running_loop()
+        categories = {c: BUSINESS_KEYWORDS_MAP[c] for c in self.categories if c in BUSINESS_KEYWORDS_MAP}
+        try:
+            await loop.run_in_executor(trends_executor, rebuild_seasonality, categories, self.geos[0])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"⚠️  Seasonality rebuild failed: {e}")
+
+    def _record(self, entry: Dict[str, Any], result: Optional[Dict[str, Any]]) -> None:
+        if result and result.get("success"):
+            entry["refreshes"] += 1
+            entry["consecutive_failures"] = 0
+            entry["last_refresh"] = datetime.utcnow()
+            entry["last_error"] = None
+        else:
+            entry["failures"] += 1
+            entry["consecutive_failures"] += 1
+            entry["last_error"] = (result or {}).get("error", "unknown error")
+            print(f"⚠️  Trends prefetch failed for {entry['category']} ({entry['geo']}): {entry['last_error']}")
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "enabled": TRENDS_PREFETCH_ENABLED,
+            "running": self.running,
+            "interval_seconds": self.interval,
+            "cycles": self.cycles,
+            "last_cycle_started": _iso(self.last_cycle_started),
+            "last_cycle_finished": _iso(self.last_cycle_finished),
+            "next_cycle_at": _iso(self.next_cycle_at),
+            "total_failures": sum(e["failures"] for e in self.entries.values()),
+            "entries": [
+                {**entry, "last_refresh": _iso(entry["last_refresh"])}
+                for entry in self.entries.values()
+            ],
+        }
+
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+trends_scheduler = TrendsPrefetchScheduler(list(BUSINESS_KEYWORDS_MAP.keys()), TRENDS_PREFETCH_GEOS)
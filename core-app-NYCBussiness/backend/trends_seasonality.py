@@ -0,0 +1,171 @@
+"""
+Monthly seasonality index per business keyword and category.
+
+Built from the stored daily series in trends_timeseries (no Google request):
+
+1. Daily values -> calendar-month means (months x keywords)
+2. Each keyword's long-run level is removed with a least-squares linear
+   trend fitted to all keywords at once (np.polyfit on the 2-D matrix)
+3. Detrended ratios are averaged per calendar month across years
+4. The 12 values are normalized so they average 1.0
+
+An index of 1.15 for December means December interest runs 15% above an
+average month. Indexes are rebuilt by the trends prefetch scheduler and
+served from memory by get_seasonality().
+"""
+
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from trends_timeseries import TRENDS_HISTORY_DAYS, read_series
+
+# Calendar months with fewer observed days are ignored (partial first/last month)
+MIN_DAYS_PER_MONTH = 20
+
+_lock = threading.Lock()
+_index: Dict[str, Dict[str, Any]] = {}
+
+
+def compute_seasonality_index(frame: pd.DataFrame) -> Dict[str, Any]:
+    """
+    12-value seasonality index per keyword column of a daily series frame.
+    Returns {"keywords": {keyword: [12 floats]}, "weights": {keyword: mean level},
+    "months_observed": int}; months with no data get 1.0.
+    """
+    if frame.empty:
+        return {"keywords": {}, "weights": {}, "months_observed": 0}
+
+    grouped = frame.groupby(frame.index.to_period("M"))
+    counts = grouped.size().to_numpy()
+    monthly = grouped.mean()[counts >= MIN_DAYS_PER_MONTH]
+
+    values = monthly.to_numpy(dtype=float)          # (months, keywords)
+    months = monthly.index.month.to_numpy() - 1     # 0..11
+    if values.shape[0] < 2:
+        return {"keywords": {}, "weights": {}, "months_observed": int(values.shape[0])}
+
+    # Linear trend per keyword, fitted in one call
+    t = np.arange(values.shape[0], dtype=float)
+    filled = np.where(np.isnan(values), np.nanmean(values, axis=0), values)
+    slope, intercept = np.polyfit(t, filled, 1)
+    trend = np.outer(t, slope) + intercept
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratios = np.where(trend > 0, values / trend, np.nan)
+
+    # Mean ratio per calendar month: one-hot (12 x months) @ ratios
+    one_hot = (months[None, :] == np.arange(12)[:, None]).astype(float)
+    observed = ~np.isnan(ratios)
+    sums = one_hot @ np.nan_to_num(ratios)
+    counts_per_month = one_hot @ observed.astype(float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        index = np.where(counts_per_month > 0, sums / counts_per_month, np.nan)
+
+    # Normalize to mean 1.0 over the observed months; unobserved months are neutral
+    with np.errstate(invalid="ignore"):
+        index = index / np.nanmean(index, axis=0)
+    index = np.nan_to_num(index, nan=1.0)
+
+    columns = list(monthly.columns)
+    levels = np.nanmean(values, axis=0)
+    return {
+        "keywords": {k: [round(float(v), 4) for v in index[:, i]] for i, k in enumerate(columns)},
+        "weights": {k: float(levels[i]) if not np.isnan(levels[i]) else 0.0 for i, k in enumerate(columns)},
+        "months_observed": int(values.shape[0]),
+    }
+
+
+def category_index(keyword_index: Dict[str, Any]) -> List[float]:
+    """Category index: keyword indexes averaged, weighted by each keyword's interest level."""
+    keywords = list(keyword_index["keywords"].keys())
+    if not keywords:
+        return [1.0] * 12
+
+    matrix = np.array([keyword_index["keywords"][k] for k in keywords])  # (keywords, 12)
+    weights = np.array([keyword_index["weights"].get(k, 0.0) for k in keywords])
+    if weights.sum() <= 0:
+        weights = np.ones(len(keywords))
+
+    combined = weights @ matrix / weights.sum()
+    combined = combined / combined.mean()
+    return [round(float(v), 4) for v in combined]
+
+
+def rebuild_seasonality(
+    categories: Dict[str, List[str]],
+    geo: str = "US-NY",
+    days: int = TRENDS_HISTORY_DAYS
+) -> int:
+    """Recompute every category's index from the stored series; returns categories indexed."""
+    built = {}
+    for category, keywords in categories.items():
+        try:
+            frame = read_series(keywords, geo, days)
+        except Exception as e:
+            print(f"⚠️  Seasonality: cannot read series for {category}: {e}")
+            continue
+
+        keyword_index = compute_seasonality_index(frame)
+        if not keyword_index["keywords"]:
+            continue
+
+        built[category] = {
+            "category": category,
+            "geo": geo,
+            "index": category_index(keyword_index),
+            "keywords": keyword_index["keywords"],
+            "months_observed": keyword_index["months_observed"],
+            "computed_at": datetime.utcnow().isoformat(),
+        }
+
+    with _lock:
+        _index.update(built)
+
+    print(f"📈 Seasonality index rebuilt for {len(built)}/{len(categories)} categories")
+    return len(built)
+
+
+def _label(value: float) -> str:
+    if value >= 1.15:
+        return "peak"
+    if value >= 1.05:
+        return "high"
+    if value <= 0.85:
+        return "low"
+    if value <= 0.95:
+        return "soft"
+    return "normal"
+
+
+def get_seasonality(category: Optional[str], month: int) -> Optional[Dict[str, Any]]:
+    """In-memory lookup: seasonality of `month` (1-12) for a category, or None if not indexed."""
+    if not category or not 1 <= month <= 12:
+        return None
+
+    with _lock:
+        entry = _index.get(category)
+    if not entry:
+        return None
+
+    index = entry["index"]
+    return {
+        "category": category,
+        "month": month,
+        "index": index[month - 1],
+        "label": _label(index[month - 1]),
+        "next_month_index": index[month % 12],
+        "monthly_index": index,
+        "months_observed": entry["months_observed"],
+        "computed_at": entry["computed_at"],
+    }
+
+
+def get_seasonality_stats() -> Dict[str, Any]:
+    with _lock:
+        return {
+            "categories": sorted(_index.keys()),
+            "months_observed": {c: e["months_observed"] for c, e in _index.items()},
+        }
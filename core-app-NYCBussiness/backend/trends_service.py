@@ -3,23 +3,107 @@ Google Trends Service
 Extrage trenuri relevante pentru business folosind pytrends.
 """
 from pytrends.request import TrendReq
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional
+import pandas as pd
+import asyncio
+import functools
+import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
+from trends_cache import get_cached_trends, get_fresh_trends_from_memory, store_trends, trends_fresh_for, trends_need_fetch
+from trends_timeseries import TRENDS_HISTORY_DAYS, update_series, read_series
+from rate_limiter import TokenBucket
+
+# pytrends este complet sincron: rulează într-un pool dedicat și limitat,
+# niciodată pe event loop-ul uvicorn
+TRENDS_MAX_WORKERS = int(os.getenv("TRENDS_MAX_WORKERS", "4"))
+TRENDS_DEADLINE_SECONDS = float(os.getenv("TRENDS_DEADLINE_SECONDS", "20"))
+
+# Rate limiting pentru Google Trends API, partajat între toate cererile
+# (înlocuiește time.sleep(1) per cerere)
+TRENDS_RATE_PER_SECOND = float(os.getenv("TRENDS_RATE_PER_SECOND", "1"))
+TRENDS_RATE_BURST = float(os.getenv("TRENDS_RATE_BURST", "2"))
+
+# Mapare business types la keywords (și lista de categorii pre-încărcate de trends_scheduler)
+BUSINESS_KEYWORDS_MAP = {
+    "coffee": ["coffee shop", "cafe", "specialty coffee", "espresso"],
+    "restaurant": ["restaurant", "dining", "food delivery", "takeout"],
+    "retail": ["retail store", "shopping", "boutique"],
+    "fitness": ["gym", "fitness", "workout", "yoga"],
+    "beauty": ["salon", "spa", "beauty services"],
+    "tech": ["tech services", "IT support", "software"],
+    "bar": ["bar", "cocktails", "nightlife", "drinks"],
+    "bakery": ["bakery", "pastry", "bread", "desserts"]
+}
+
+TRENDS_TIMEFRAME = 'today 1-m'
+
+# Keyword comun inclus în fiecare payload batch: toate batch-urile se rescalează
+# pe scala primului batch prin raportul mediilor acestui keyword
+TRENDS_ANCHOR_KEYWORD = os.getenv("TRENDS_ANCHOR_KEYWORD", "restaurant")
+
+# pytrends acceptă maxim 5 keywords per payload (unul este anchor-ul)
+TRENDS_PAYLOAD_SIZE = 5
+
+def business_category(business_type: str) -> Optional[str]:
+    """Categoria din BUSINESS_KEYWORDS_MAP care se potrivește business type-ului (sau None)."""
+    business_lower = business_type.lower()
+    for key in BUSINESS_KEYWORDS_MAP:
+        if key in business_lower:
+            return key
+    return None
+
+
+def timeframe_days(timeframe: str) -> Optional[int]:
+    """Nr. de zile pentru timeframe-uri zilnice relative ('today 1-m', 'today 12-m'); None altfel."""
+    parts = timeframe.split()
+    if len(parts) != 2 or parts[0] != "today":
+        return None
+    amount, _, unit = parts[1].partition("-")
+    if not amount.isdigit():
+        return None
+    return {"d": 1, "m": 30, "y": 365}.get(unit, 0) * int(amount) or None
+
+
+trends_executor = ThreadPoolExecutor(max_workers=TRENDS_MAX_WORKERS, thread_name_prefix="trends")
+google_trends_limiter = TokenBucket(TRENDS_RATE_PER_SECOND, TRENDS_RATE_BURST, name="google_trends")
+
+
+class TrendsRateLimited(Exception):
+    """Nu s-a obținut un token din google_trends_limiter la timp."""
+
+
+def _renormalize(frame: pd.DataFrame):
+    """Readuce un frame rescalat pe anchor la 0-100 (maximul = 100), ca un payload Google; (frame, factor)."""
+    peak = float(frame.max().max()) if not frame.empty else 0.0
+    if not peak > 0:
+        return frame, 1.0
+    scale = 100.0 / peak
+    return frame * scale, round(scale, 4)
+
 
 class TrendsService:
     """Service pentru extragerea și analiza Google Trends."""
     
     def __init__(self):
-        """Inițializează conexiunea cu Google Trends."""
-        self.pytrends = TrendReq(hl='en-US', tz=360)
+        """Conexiunea cu Google Trends se creează doar la primul request (cache miss)."""
+        self._pytrends = None
+
+    @property
+    def pytrends(self) -> TrendReq:
+        if self._pytrends is None:
+            self._pytrends = TrendReq(hl='en-US', tz=360)
+        return self._pytrends
         
     def get_business_trends(
         self, 
         business_type: str, 
         location: str = "US",
-        timeframe: str = 'today 1-m'
+        timeframe: str = 'today 1-m',
+        before_request: Optional[Callable[[], None]] = None
     ) -> Dict[str, Any]:
         """
         Extrage trends pentru un tip de business.
@@ -28,6 +112,7 @@ class TrendsService:
             business_type: Tipul de business (ex: "coffee shop", "restaurant")
             location: Locația (default: "US")
             timeframe: Perioada de analiză (default: ultima lună)
+            before_request: Apelat înaintea fiecărui payload (rate limiting)
             
         Returns:
             Dict cu trends și insights
@@ -40,21 +125,15 @@ class TrendsService:
             print(f"📍 Location: {location}")
             print(f"📅 Timeframe: {timeframe}")
             
-            # Build payload pentru Google Trends
-            self.pytrends.build_payload(
-                keywords,
-                cat=0,
-                timeframe=timeframe,
-                geo=location,
-                gprop=''
-            )
-            
-            # Extrage interest over time
-            interest_over_time = self.pytrends.interest_over_time()
-            
-            # Extrage related queries
+            # Un singur payload pe fereastra cerută: interest over time + related queries
+            fetch = self._fetch_interest(location, before_request)
+            window_frame = fetch(keywords, timeframe)
             related_queries = self.pytrends.related_queries()
             
+            # Interest over time din seria locală, completată cu payload-ul de mai sus
+            # (se descarcă separat doar zilele pe care acesta nu le acoperă)
+            interest_over_time = self._interest_over_time(keywords, location, timeframe, fetch, window_frame)
+            
             # Extrage trending searches
             try:
                 trending = self.pytrends.trending_searches(pn='united_states')
@@ -89,6 +168,159 @@ class TrendsService:
                 "business_type": business_type
             }
     
+    def _fetch_interest(self, location: str, before_request: Optional[Callable[[], None]] = None):
+        """Fetcher pentru trends_timeseries: un payload + interest_over_time()."""
+
+        def fetch(keywords: List[str], timeframe: str) -> pd.DataFrame:
+            if before_request:
+                before_request()
+            self.pytrends.build_payload(keywords, cat=0, timeframe=timeframe, geo=location, gprop='')
+            return self.pytrends.interest_over_time()
+
+        return fetch
+
+    def _interest_over_time(
+        self,
+        keywords: List[str],
+        location: str,
+        timeframe: str,
+        fetch: Callable[[List[str], str], pd.DataFrame],
+        window_frame: pd.DataFrame
+    ) -> pd.DataFrame:
+        """
+        Interest over time pentru `timeframe`, asamblat din trends_timeseries și
+        readus la 0-100 (seria stocată e pe scala primului fetch), deci același
+        format ca un payload Google. `window_frame` (payload-ul deja descărcat pe
+        fereastra cerută) intră primul în serie; fallback când seria nu e disponibilă.
+        """
+        days = timeframe_days(timeframe)
+        if days:
+            try:
+                update_series(keywords, location, fetch, history_days=days, seed=window_frame)
+                frame = read_series(keywords, location, days)
+                if not frame.empty:
+                    return _renormalize(frame)[0]
+            except TrendsRateLimited:
+                raise
+            except Exception as e:
+                print(f"Warning: trends time-series store unavailable, using the window payload: {e}")
+
+        return window_frame
+
+    def get_batch_business_trends(
+        self,
+        business_types: List[str],
+        location: str = "US",
+        timeframe: str = 'today 1-m',
+        anchor: str = TRENDS_ANCHOR_KEYWORD,
+        before_request: Optional[Callable[[], None]] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Extrage trends pentru mai multe business types cu payload-uri partajate.
+
+        Keywords unice din toate tipurile sunt împachetate câte 4 + anchor per
+        payload; fiecare batch este rescalat cu raportul dintre media anchor-ului
+        din primul batch și media lui din batch-ul curent, deci toate valorile
+        ajung pe aceeași scală. Apoi fiecare tip este readus la 0-100 (ca un
+        payload propriu, deci rezultatul poate înlocui get_business_trends() în
+        cache); factorul este în normalization.type_scale, iar valoarea pe scala
+        comună = valoare / type_scale. Trending searches se cer o singură dată.
+
+        Args:
+            business_types: Tipurile de business
+            location: Locația (default: "US")
+            timeframe: Perioada de analiză (default: ultima lună)
+            anchor: Keyword-ul comun de normalizare
+            before_request: Apelat înaintea fiecărui payload (rate limiting)
+
+        Returns:
+            Dict business_type -> același rezultat ca get_business_trends()
+        """
+        groups = {business_type: self._generate_keywords(business_type) for business_type in business_types}
+
+        unique_keywords = []
+        for keywords in groups.values():
+            for keyword in keywords:
+                if keyword != anchor and keyword not in unique_keywords:
+                    unique_keywords.append(keyword)
+
+        batch_size = TRENDS_PAYLOAD_SIZE - 1
+        batches = [unique_keywords[i:i + batch_size] for i in range(0, len(unique_keywords), batch_size)]
+
+        print(f"🔍 Batch Google Trends: {len(business_types)} types, {len(unique_keywords)} keywords, {len(batches)} payloads")
+
+        try:
+            frames = []
+            related_queries = {}
+            scales = []
+            reference_mean = None
+
+            for batch in batches:
+                if before_request:
+                    before_request()
+
+                self.pytrends.build_payload(
+                    [anchor] + batch,
+                    cat=0,
+                    timeframe=timeframe,
+                    geo=location,
+                    gprop=''
+                )
+                interest_over_time = self.pytrends.interest_over_time()
+                related_queries.update(self.pytrends.related_queries() or {})
+
+                if interest_over_time.empty:
+                    scales.append({"keywords": batch, "scale": None})
+                    continue
+
+                anchor_mean = float(interest_over_time[anchor].mean())
+                if reference_mean is None:
+                    reference_mean = anchor_mean
+                    frames.append(interest_over_time[[anchor]].astype(float))
+
+                # Anchor-ul absent (0) în ambele batch-uri nu permite rescalarea
+                scale = reference_mean / anchor_mean if anchor_mean > 0 and reference_mean > 0 else 1.0
+                frames.append(interest_over_time[batch].astype(float) * scale)
+                scales.append({"keywords": batch, "scale": round(scale, 4)})
+
+            combined = pd.concat(frames, axis=1) if frames else pd.DataFrame()
+
+            try:
+                trending = self.pytrends.trending_searches(pn='united_states')
+                trending_list = trending[0].tolist()[:10]
+            except Exception as e:
+                print(f"Warning: Could not fetch trending searches: {e}")
+                trending_list = []
+
+        except Exception as e:
+            print(f"❌ Error fetching batch trends: {e}")
+            return {
+                business_type: {"success": False, "error": str(e), "business_type": business_type}
+                for business_type in business_types
+            }
+
+        timestamp = datetime.now().isoformat()
+        results = {}
+        for business_type, keywords in groups.items():
+            columns = [k for k in keywords if k in combined.columns]
+            frame, type_scale = _renormalize(combined[columns]) if columns else (pd.DataFrame(), None)
+            results[business_type] = {
+                "success": True,
+                "business_type": business_type,
+                "location": location,
+                "timeframe": timeframe,
+                "keywords_analyzed": keywords,
+                "trends": self._process_trends_data(
+                    frame,
+                    related_queries,
+                    trending_list,
+                    keywords
+                ),
+                "normalization": {"anchor": anchor, "batches": scales, "type_scale": type_scale},
+                "timestamp": timestamp
+            }
+        return results
+
     def _generate_keywords(self, business_type: str) -> List[str]:
         """
         Generează keywords relevante pentru business type.
@@ -99,23 +331,10 @@ class TrendsService:
         Returns:
             Listă de keywords pentru search
         """
-        # Mapare business types la keywords
-        business_keywords_map = {
-            "coffee": ["coffee shop", "cafe", "specialty coffee", "espresso"],
-            "restaurant": ["restaurant", "dining", "food delivery", "takeout"],
-            "retail": ["retail store", "shopping", "boutique"],
-            "fitness": ["gym", "fitness", "workout", "yoga"],
-            "beauty": ["salon", "spa", "beauty services"],
-            "tech": ["tech services", "IT support", "software"],
-            "bar": ["bar", "cocktails", "nightlife", "drinks"],
-            "bakery": ["bakery", "pastry", "bread", "desserts"]
-        }
-        
         # Găsește keywords relevante
-        business_lower = business_type.lower()
-        for key, keywords in business_keywords_map.items():
-            if key in business_lower:
-                return keywords[:5]  # Max 5 keywords pentru API limits
+        category = business_category(business_type)
+        if category:
+            return BUSINESS_KEYWORDS_MAP[category][:5]  # Max 5 keywords pentru API limits
         
         # Default: folosește business type-ul direct
         return [business_type, f"{business_type} near me"][:5]
@@ -125,7 +344,8 @@ class TrendsService:
         interest_over_time,
         related_queries,
         trending_list: List[str],
-        keywords: List[str]
+        keywords: List[str],
+        comparison_window: int = 7
     ) -> Dict[str, Any]:
         """
         Procesează și analizează datele de trends.
@@ -135,6 +355,7 @@ class TrendsService:
             related_queries: Dict cu related queries
             trending_list: Lista de trending searches
             keywords: Keywords analizate
+            comparison_window: Nr. de zile comparate (ultimele vs primele) pentru rising/declining
             
         Returns:
             Dict cu trends procesate
@@ -162,8 +383,8 @@ class TrendsService:
                     
                     # Calculează trend (ultimele valori vs primele valori)
                     if len(values) > 1:
-                        recent_avg = values[-7:].mean()  # Ultima săptămână
-                        older_avg = values[:7].mean()    # Prima săptămână
+                        recent_avg = values[-comparison_window:].mean()  # Ultima fereastră
+                        older_avg = values[:comparison_window].mean()    # Prima fereastră
                         
                         if recent_avg > older_avg * 1.1:
                             trend = "rising"
@@ -186,8 +407,8 @@ class TrendsService:
             trends_summary["peak_interest"] = int(all_values.max())
             
             # Determine overall trend
-            recent_avg = all_values[-len(numeric_cols)*7:].mean()
-            older_avg = all_values[:len(numeric_cols)*7].mean()
+            recent_avg = all_values[-len(numeric_cols)*comparison_window:].mean()
+            older_avg = all_values[:len(numeric_cols)*comparison_window].mean()
             
             if recent_avg > older_avg * 1.1:
                 trends_summary["interest_trend"] = "rising"
@@ -226,24 +447,227 @@ class TrendsService:
         return trends_summary
 
 
-def analyze_business_trends(business_type: str, location: str = "US-NY") -> Dict[str, Any]:
+class GoogleTrendsTokens:
+    """
+    before_request cu un token din google_trends_limiter per payload, așteptând
+    cel mult max_wait secunde și niciodată după deadline_at (time.monotonic()).
+
+    Apelanții de pe event loop plătesc primul token dinainte (prepay(), cu
+    acquire_async) și abia apoi trimit job-ul în trends_executor, deci niciun
+    thread din pool nu stă doar ca să aștepte un token; payload-urile următoare
+    ale aceluiași job (chunk-uri de serie, batch-uri) iau tokenul în worker.
+    Un token plătit și nefolosit (cache, fetch coalescat) se returnează cu refund().
+    """
+
+    def __init__(self, deadline_at: Optional[float] = None, max_wait: Optional[float] = TRENDS_DEADLINE_SECONDS):
+        self.deadline_at = deadline_at
+        self.max_wait = max_wait
+        self._prepaid = False
+        self._lock = threading.Lock()
+
+    def _timeout(self) -> Optional[float]:
+        timeout = self.max_wait
+        if self.deadline_at is not None:
+            remaining = self.deadline_at - time.monotonic()
+            if remaining <= 0:
+                raise TrendsRateLimited("Google Trends deadline exceeded before the next request")
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        return timeout
+
+    async def prepay(self) -> None:
+        if not await google_trends_limiter.acquire_async(timeout=self._timeout()):
+            raise TrendsRateLimited("Google Trends rate limit: too many pending requests")
+        with self._lock:
+            self._prepaid = True
+
+    def refund(self) -> None:
+        with self._lock:
+            prepaid, self._prepaid = self._prepaid, False
+        if prepaid:
+            google_trends_limiter.release()
+
+    def __call__(self) -> None:
+        with self._lock:
+            if self._prepaid:
+                self._prepaid = False
+                return
+        if not google_trends_limiter.acquire(timeout=self._timeout()):
+            raise TrendsRateLimited("Google Trends rate limit: too many pending requests")
+
+
+async def run_with_prepaid_token(fn: Callable, *args, tokens: GoogleTrendsTokens) -> Any:
+    """fn(*args, tokens=tokens) în trends_executor, după ce primul token a fost așteptat pe event loop."""
+    await tokens.prepay()
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(trends_executor, functools.partial(fn, *args, tokens=tokens))
+    finally:
+        tokens.refund()
+
+
+def _rate_limited_fetch(service: TrendsService, business_type: str, location: str, tokens: GoogleTrendsTokens):
+    """Fetch-ul Google necache-uit, cu un token din google_trends_limiter per payload."""
+
+    def fetch():
+        return service.get_business_trends(
+            business_type=business_type,
+            location=location,
+            timeframe=TRENDS_TIMEFRAME,
+            before_request=tokens
+        )
+
+    return fetch
+
+
+def analyze_business_trends(
+    business_type: str,
+    location: str = "US-NY",
+    deadline_at: Optional[float] = None,
+    tokens: Optional[GoogleTrendsTokens] = None
+) -> Dict[str, Any]:
     """
     Funcție helper pentru analiză trends.
+    Rezultatele sunt servite din trends_cache (LRU + Postgres) când sunt disponibile.
     
     Args:
         business_type: Tipul de business
         location: Locația (ex: "US-NY" pentru New York)
+        deadline_at: time.monotonic() după care nu se mai trimite niciun payload la Google
+        tokens: Tokenii Google ai apelantului (eventual cu primul plătit pe event loop)
         
     Returns:
         Dict cu rezultatele analizei
     """
     service = TrendsService()
-    
-    # Rate limiting pentru Google Trends API
-    time.sleep(1)
-    
-    return service.get_business_trends(
-        business_type=business_type,
+    keywords = service._generate_keywords(business_type)
+    fetch = _rate_limited_fetch(service, business_type, location, tokens or GoogleTrendsTokens(deadline_at))
+
+    result = get_cached_trends(keywords, location, TRENDS_TIMEFRAME, fetch, trends_executor)
+    if result.get("success"):
+        # Același set de keywords poate proveni din business types diferite ("coffee" / "coffee shop")
+        result["business_type"] = business_type
+    return result
+
+
+async def analyze_business_trends_async(
+    business_type: str,
+    location: str = "US-NY",
+    deadline: float = TRENDS_DEADLINE_SECONDS
+) -> Dict[str, Any]:
+    """
+    Varianta non-blocantă a analyze_business_trends() pentru endpoint-urile async.
+    Hit-urile proaspete din memorie se servesc direct; restul rulează în
+    trends_executor, cu deadline. Când e nevoie de Google, tokenul din
+    google_trends_limiter se așteaptă pe event loop (acquire_async), înainte
+    de a ocupa un thread din pool. La timeout, un fetch încă în coada pool-ului
+    este anulat, iar unul pornit se oprește înaintea următorului payload
+    (tokenul nu se mai așteaptă după deadline); nimic nu se scrie în cache.
+    """
+    keywords = TrendsService()._generate_keywords(business_type)
+    cached = get_fresh_trends_from_memory(keywords, location, TRENDS_TIMEFRAME)
+    if cached is not None:
+        cached["business_type"] = business_type
+        return cached
+
+    loop = asyncio.get_running_loop()
+    deadline_at = time.monotonic() + deadline
+
+    async def fetch():
+        # Cache-ul (memorie / Postgres) nu are nevoie de token; doar un fetch sincron are
+        if await loop.run_in_executor(None, trends_need_fetch, keywords, location, TRENDS_TIMEFRAME):
+            return await run_with_prepaid_token(
+                analyze_business_trends, business_type, location, tokens=GoogleTrendsTokens(deadline_at)
+            )
+        return await loop.run_in_executor(trends_executor, analyze_business_trends, business_type, location, deadline_at)
+
+    try:
+        # Anularea de către wait_for anulează și future-ul din trends_executor, dacă nu a pornit
+        return await asyncio.wait_for(fetch(), timeout=deadline)
+    except TrendsRateLimited as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "business_type": business_type
+        }
+    except asyncio.TimeoutError:
+        print(f"⏱️  Google Trends deadline ({deadline}s) exceeded for: {business_type}")
+        return {
+            "success": False,
+            "error": f"Google Trends did not respond within {deadline}s",
+            "business_type": business_type
+        }
+
+
+def business_trends_fresh_for(business_type: str, location: str = "US-NY") -> float:
+    """Secunde până când trends-urile cache-uite ale unei categorii nu mai sunt proaspete."""
+    keywords = TrendsService()._generate_keywords(business_type)
+    return trends_fresh_for(keywords, location, TRENDS_TIMEFRAME)
+
+
+def refresh_business_trends_batch(
+    business_types: List[str],
+    location: str = "US-NY",
+    tokens: Optional[GoogleTrendsTokens] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Re-fetch și scrie în cache trends-urile mai multor categorii cu payload-uri
+    partajate (get_batch_business_trends); un token din google_trends_limiter per payload.
+    """
+    service = TrendsService()
+    results = service.get_batch_business_trends(
+        business_types,
         location=location,
-        timeframe='today 1-m'
+        timeframe=TRENDS_TIMEFRAME,
+        before_request=tokens or google_trends_limiter.acquire
     )
+    for business_type, result in results.items():
+        if result.get("success"):
+            store_trends(service._generate_keywords(business_type), location, TRENDS_TIMEFRAME, result)
+    return results
+
+
+def update_business_series(
+    business_type: str,
+    location: str = "US-NY",
+    history_days: int = TRENDS_HISTORY_DAYS,
+    tokens: Optional[GoogleTrendsTokens] = None
+) -> int:
+    """Backfill / actualizare incrementală a seriei zilnice pentru o categorie (trends_scheduler)."""
+    service = TrendsService()
+    keywords = service._generate_keywords(business_type)
+    fetch = service._fetch_interest(location, before_request=tokens or google_trends_limiter.acquire)
+    return update_series(keywords, location, fetch, history_days=history_days)
+
+
+def analyze_trends_window(
+    business_type: str,
+    location: str = "US-NY",
+    days: int = 365,
+    comparison_window: int = 30
+) -> Dict[str, Any]:
+    """
+    Rezumat trends pe orice fereastră, calculat doar din seria locală (fără request Google).
+    Ex: 365 de zile comparând ultimele 30 cu primele 30.
+    """
+    service = TrendsService()
+    keywords = service._generate_keywords(business_type)
+    frame = read_series(keywords, location, days)
+    return {
+        "success": not frame.empty,
+        "business_type": business_type,
+        "location": location,
+        "days": days,
+        "comparison_window": comparison_window,
+        "keywords_analyzed": keywords,
+        "points": len(frame),
+        "trends": service._process_trends_data(frame, {}, [], keywords, comparison_window)
+    }
+
+
+def get_trends_executor_stats() -> Dict[str, Any]:
+    return {
+        "max_workers": TRENDS_MAX_WORKERS,
+        "deadline_seconds": TRENDS_DEADLINE_SECONDS,
+        "queued": trends_executor._work_queue.qsize(),
+        "rate_limiter": google_trends_limiter.stats(),
+    }
@@ -0,0 +1,249 @@
+"""
+Incremental Google Trends time-series store.
+
+Daily interest values per (keyword, geo) are kept in trends_timeseries.
+Instead of re-downloading a whole window on every call, update_series()
+fetches only the missing tail, and the missing head when history_days reaches
+further back than the stored series, each plus TRENDS_OVERLAP_DAYS already
+stored days, and rescales them onto the stored series using the overlap,
+because every Google payload is normalized to its own 0-100 range. Long histories
+(TRENDS_HISTORY_DAYS, 12+ months) are backfilled in chunks of at most
+TRENDS_MAX_WINDOW_DAYS, the longest window Google still returns daily.
+
+load_series_frame() rebuilds an interest_over_time()-shaped DataFrame for any
+window from local rows, so callers need no upstream request at all.
+"""
+
+import os
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from database import SessionLocal, TrendsTimeSeries
+
+# 3 years: enough calendar months for trends_seasonality
+TRENDS_HISTORY_DAYS = int(os.getenv("TRENDS_HISTORY_DAYS", "1100"))
+TRENDS_OVERLAP_DAYS = int(os.getenv("TRENDS_OVERLAP_DAYS", "7"))
+TRENDS_MAX_WINDOW_DAYS = 240
+
+# fetch(keywords, timeframe) -> interest_over_time() DataFrame
+Fetcher = Callable[[List[str], str], pd.DataFrame]
+
+
+def timeframe_for(start: date, end: date) -> str:
+    """pytrends explicit date-range timeframe."""
+    return f"{start:%Y-%m-%d} {end:%Y-%m-%d}"
+
+
+def stored_date_ranges(db: Session, keywords: List[str], geo: str) -> Dict[str, Optional[Tuple[date, date]]]:
+    """(first, last) complete (non-partial) stored day per keyword, None if nothing is stored."""
+    rows = db.query(
+        TrendsTimeSeries.keyword,
+        func.min(TrendsTimeSeries.date),
+        func.max(TrendsTimeSeries.date)
+    ).filter(
+        TrendsTimeSeries.keyword.in_(keywords),
+        TrendsTimeSeries.geo == geo,
+        TrendsTimeSeries.is_partial.is_(False)
+    ).group_by(TrendsTimeSeries.keyword).all()
+
+    ranges = {keyword: None for keyword in keywords}
+    for keyword, first, last in rows:
+        ranges[keyword] = (first, last)
+    return ranges
+
+
+def plan_fetch_windows(
+    ranges: Dict[str, Optional[Tuple[date, date]]],
+    today: date,
+    history_days: int = TRENDS_HISTORY_DAYS
+) -> List[Tuple[date, date]]:
+    """
+    Daily-resolution windows to fetch, in fetch order; [] when every keyword
+    already covers [today - history_days, yesterday]. Every window overlaps
+    days that are already on the stored scale, so store_fetched_frame() can
+    rescale it:
+
+    - A keyword with nothing stored: the whole history, newest first (the
+      first chunk overlaps the other keywords' recent days)
+    - Tail: the days after the oldest last stored day, plus the overlap,
+      oldest first
+    - Head: the days between today - history_days and the newest first stored
+      day, plus the overlap, newest first
+    """
+    if not ranges:
+        return []
+    history_start = today - timedelta(days=history_days)
+    overlap = timedelta(days=TRENDS_OVERLAP_DAYS)
+
+    if any(stored is None for stored in ranges.values()):
+        return _chunks_backward(history_start, today)
+
+    windows = []
+    last = min(stored[1] for stored in ranges.values())
+    if last < today - timedelta(days=1):
+        windows += _chunks(last - overlap, today)
+    first = max(stored[0] for stored in ranges.values())
+    if first > history_start + timedelta(days=1):
+        windows += _chunks_backward(history_start, min(first + overlap, today))
+    return windows
+
+
+def _chunks(start: date, end: date) -> List[Tuple[date, date]]:
+    """Split [start, end] into daily-resolution windows that overlap by TRENDS_OVERLAP_DAYS, oldest first."""
+    windows = []
+    chunk_start = start
+    while True:
+        chunk_end = min(end, chunk_start + timedelta(days=TRENDS_MAX_WINDOW_DAYS - 1))
+        windows.append((chunk_start, chunk_end))
+        if chunk_end >= end:
+            return windows
+        chunk_start = chunk_end - timedelta(days=TRENDS_OVERLAP_DAYS - 1)
+
+
+def _chunks_backward(start: date, end: date) -> List[Tuple[date, date]]:
+    """Same split as _chunks, newest first."""
+    windows = []
+    chunk_end = end
+    while True:
+        chunk_start = max(start, chunk_end - timedelta(days=TRENDS_MAX_WINDOW_DAYS - 1))
+        windows.append((chunk_start, chunk_end))
+        if chunk_start <= start:
+            return windows
+        chunk_end = chunk_start + timedelta(days=TRENDS_OVERLAP_DAYS - 1)
+
+
+def load_series_frame(
+    db: Session,
+    keywords: List[str],
+    geo: str,
+    start: date,
+    end: Optional[date] = None
+) -> pd.DataFrame:
+    """Stored values as an interest_over_time()-shaped frame (date index, one column per keyword)."""
+    query = db.query(
+        TrendsTimeSeries.keyword, TrendsTimeSeries.date, TrendsTimeSeries.value
+    ).filter(
+        TrendsTimeSeries.keyword.in_(keywords),
+        TrendsTimeSeries.geo == geo,
+        TrendsTimeSeries.date >= start
+    )
+    if end is not None:
+        query = query.filter(TrendsTimeSeries.date <= end)
+
+    rows = query.all()
+    if not rows:
+        return pd.DataFrame()
+
+    frame = pd.DataFrame(rows, columns=["keyword", "date", "value"]).pivot(
+        index="date", columns="keyword", values="value"
+    ).sort_index()
+    frame.index = pd.to_datetime(frame.index)
+    frame.columns.name = None
+    return frame[[k for k in keywords if k in frame.columns]]
+
+
+def _rescale(fetched: pd.Series, stored: pd.Series) -> float:
+    """Factor mapping a fetched series onto the stored one, from their common days."""
+    common = fetched.index.intersection(stored.index)
+    if len(common) == 0:
+        return 1.0
+    fetched_mean = float(fetched.loc[common].mean())
+    stored_mean = float(stored.loc[common].mean())
+    if fetched_mean <= 0 or stored_mean <= 0:
+        return 1.0
+    return stored_mean / fetched_mean
+
+
+def store_fetched_frame(db: Session, keywords: List[str], geo: str, fetched: pd.DataFrame) -> int:
+    """Rescale a fetched interest_over_time() frame onto the stored series and upsert it."""
+    if fetched.empty:
+        return 0
+
+    start = fetched.index.min().date()
+    stored = load_series_frame(db, keywords, geo, start)
+    partial_days = set()
+    if "isPartial" in fetched.columns:
+        partial_days = {ts.date() for ts, flag in fetched["isPartial"].items() if bool(flag)}
+
+    now = datetime.utcnow()
+    rows = []
+    for keyword in keywords:
+        if keyword not in fetched.columns:
+            continue
+        series = fetched[keyword].astype(float)
+        scale = _rescale(series, stored[keyword]) if keyword in stored.columns else 1.0
+        for ts, value in series.items():
+            rows.append({
+                "keyword": keyword,
+                "geo": geo,
+                "date": ts.date(),
+                "value": round(float(value) * scale, 4),
+                "is_partial": ts.date() in partial_days,
+                "fetched_at": now,
+            })
+
+    if not rows:
+        return 0
+
+    statement = insert(TrendsTimeSeries).values(rows)
+    statement = statement.on_conflict_do_update(
+        constraint="uix_trends_keyword_geo_date",
+        set_={
+            "value": statement.excluded.value,
+            "is_partial": statement.excluded.is_partial,
+            "fetched_at": statement.excluded.fetched_at,
+        }
+    )
+    db.execute(statement)
+    db.commit()
+    return len(rows)
+
+
+def update_series(
+    keywords: List[str],
+    geo: str,
+    fetch: Fetcher,
+    history_days: int = TRENDS_HISTORY_DAYS,
+    today: Optional[date] = None,
+    seed: Optional[pd.DataFrame] = None
+) -> int:
+    """
+    Bring the stored series of up to 5 keywords up to date, fetching only the
+    missing tail and head (or the backfill for new keywords). `seed`, a frame
+    the caller already fetched, is stored first so its days are not fetched
+    again. Returns stored row count; 0 means nothing was missing.
+    """
+    today = today or date.today()
+    db = SessionLocal()
+    try:
+        stored = 0
+        if seed is not None:
+            stored += store_fetched_frame(db, keywords, geo, seed)
+
+        windows = plan_fetch_windows(stored_date_ranges(db, keywords, geo), today, history_days)
+        for chunk_start, chunk_end in windows:
+            fetched = fetch(keywords, timeframe_for(chunk_start, chunk_end))
+            stored += store_fetched_frame(db, keywords, geo, fetched)
+        return stored
+
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def read_series(keywords: List[str], geo: str, days: int, end: Optional[date] = None) -> pd.DataFrame:
+    """Last `days` days of stored values (no upstream request); gaps are interpolated."""
+    end = end or date.today()
+    db = SessionLocal()
+    try:
+        frame = load_series_frame(db, keywords, geo, end - timedelta(days=days - 1), end)
+    finally:
+        db.close()
+    return frame.interpolate(limit_direction="both") if not frame.empty else frame
@@ -0,0 +1,100 @@
+"""
+In-memory trigram index for fuzzy text search (pg_trgm semantics).
+
+Trigrams are extracted like pg_trgm: lowercase alphanumeric words, each
+padded with two leading spaces and one trailing space. Candidates are the
+strings sharing at least one trigram with the query (inverted index), ranked
+by:
+
+- word score: every query word is matched against its closest word of the
+  candidate (shared / |query word trigrams|, pg_trgm's word_similarity per
+  word) and the scores are averaged, so one common word ("services") cannot
+  carry an unrelated query, while "acommodation" still finds
+  "Accommodation and food services"
+- similarity: shared / |union| over the whole strings, like similarity(),
+  as the tie-breaker
+
+best_match() only answers when the top candidate clears the threshold and no
+other candidate has the same word score. Used for industry label lookups in
+survival_index, where the labels are already in memory, instead of a pg_trgm
+GIN index.
+"""
+
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+TRIGRAM_THRESHOLD = float(os.getenv("TRIGRAM_THRESHOLD", "0.75"))
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _word_trigrams(word: str) -> Set[str]:
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def word_trigrams(text: str) -> List[Set[str]]:
+    """Trigram set of every word of `text`."""
+    return [_word_trigrams(word) for word in _WORD.findall(text.lower())]
+
+
+def trigrams(text: str) -> Set[str]:
+    return set().union(*word_trigrams(text))
+
+
+class TrigramIndex:
+    """Inverted trigram index over a fixed set of strings."""
+
+    def __init__(self, values: Iterable[str]):
+        self.values: List[str] = list(dict.fromkeys(values))
+        self._words: List[List[Set[str]]] = [word_trigrams(v) for v in self.values]
+        self._grams: List[Set[str]] = [set().union(*words) for words in self._words]
+        self._postings: Dict[str, List[int]] = {}
+        for position, grams in enumerate(self._grams):
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(position)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def _scored(self, query: str, threshold: float) -> List[Tuple[float, float, int]]:
+        query_words = word_trigrams(query)
+        if not query_words:
+            return []
+        query_grams = set().union(*query_words)
+
+        candidates = set()
+        for gram in query_grams:
+            candidates.update(self._postings.get(gram, ()))
+
+        scored = []
+        for position in candidates:
+            words = self._words[position]
+            word_score = sum(
+                max(len(q & w) for w in words) / len(q) for q in query_words
+            ) / len(query_words)
+            if word_score < threshold:
+                continue
+            grams = self._grams[position]
+            shared = len(query_grams & grams)
+            similarity = shared / (len(query_grams) + len(grams) - shared)
+            scored.append((round(word_score, 4), round(similarity, 4), position))
+
+        scored.sort(key=lambda item: (-item[0], -item[1]))
+        return scored
+
+    def search(self, query: str, limit: int = 10, threshold: float = TRIGRAM_THRESHOLD) -> List[Tuple[str, float]]:
+        """(value, word score) pairs at or above threshold, best first."""
+        return [(self.values[position], score) for score, _, position in self._scored(query, threshold)[:limit]]
+
+    def best_match(self, query: str, threshold: float = TRIGRAM_THRESHOLD) -> Optional[Tuple[str, float]]:
+        """The single best value, or None if nothing clears threshold or the best is ambiguous."""
+        scored = self._scored(query, threshold)
+        if not scored:
+            return None
+        # Equal word scores: the query fits several values equally well (e.g. "services")
+        if len(scored) > 1 and scored[0][0] == scored[1][0]:
+            return None
+        score, _, position = scored[0]
+        return self.values[position], score